@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import IO, NamedTuple
+
+# Classes whose instantiations `allocs` counts, by name
+ALLOC_CLASSES = ["Context", "SymbolTable", "RTResult", "Value", "Position"]
+
+# Runs radon.py with the constructors of ALLOC_CLASSES counting calls, writing the counts as JSON to argv[1]
+ALLOC_SCRIPT = """
+import atexit, json, sys
+from core.datatypes import Value
+from core.parser import Context, RTResult, SymbolTable
+from core.tokens import Position
+
+counts = {}
+
+def count_instances(cls):
+    init = cls.__init__
+    def counting_init(self, *args, **kwargs):
+        counts[cls.__name__] = counts.get(cls.__name__, 0) + 1
+        init(self, *args, **kwargs)
+    cls.__init__ = counting_init
+
+for cls in (Context, SymbolTable, RTResult, Value, Position):
+    count_instances(cls)
+
+out_file = sys.argv.pop(1)
+atexit.register(lambda: open(out_file, "w").write(json.dumps(counts)))
+
+import radon
+radon.main(sys.argv)
+"""
+
+
+class Timing(NamedTuple):
+    best: float
+    mean: float
+
+
+def run_benchmark(benchmark: str, repeat: int, engine: str) -> Timing:
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "radon.py", "-s", benchmark, "-A", f"--engine={engine}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        times.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"benchmark {benchmark!r} failed:\n{proc.stderr.decode('utf-8')}")
+    return Timing(min(times), sum(times) / len(times))
+
+
+def count_allocations(benchmark: str, engine: str) -> dict[str, int]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_file = os.path.join(tmp_dir, "counts.json")
+        proc = subprocess.run(
+            [sys.executable, "-c", ALLOC_SCRIPT, out_file, "-s", benchmark, "-A", f"--engine={engine}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"benchmark {benchmark!r} failed:\n{proc.stderr.decode('utf-8')}")
+        with open(out_file) as f:
+            counts: dict[str, int] = json.load(f)
+        return counts
+
+
+def measure_memory(benchmark: str, engine: str) -> int:
+    """Return the peak resident memory of a run of `benchmark`, in KiB"""
+    proc = subprocess.Popen(
+        [sys.executable, "radon.py", "-s", benchmark, "-A", f"--engine={engine}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    assert proc.stderr is not None
+    stderr = proc.stderr.read()
+    proc.stderr.close()
+    # Unlike `resource.getrusage`, which reports the peak of all children so far, this is the peak of this one
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark {benchmark!r} failed:\n{stderr.decode('utf-8')}")
+    # macOS reports bytes, Linux KiB
+    return rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+
+
+def generate_sources(size: int) -> dict[str, str]:
+    """Return generated Radon sources of at least `size` bytes each, by name"""
+    from core.lexer import Lexer
+
+    # Every program of the repository which lexes, one after another
+    programs: list[str] = []
+    for directory in ("benchmarks", "examples", "stdlib", "tests"):
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".rn"):
+                continue
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                program = f.read()
+            try:
+                _, error = Lexer(name, program).make_tokens()
+            except UnicodeDecodeError:
+                continue
+            if error is None:
+                programs.append(program)
+
+    units = {
+        "programs": "\n".join(programs) + "\n",
+        "expressions": "".join(
+            f"var value_{i} = (count_{i} + {i}.25) * scale // 3 - items[{i}:{i + 8}] ^ 2\n" for i in range(1000)
+        ),
+        "strings": "".join(
+            f'print("line {i}: a string with \\"quotes\\" and escapes\\tin it\\n")\n' for i in range(1000)
+        ),
+        "comments": "".join(
+            f"# comment {i} about the line below\nx += {i} #! and a multi-line\ncomment !#\n" for i in range(1000)
+        ),
+    }
+    return {name: unit * (size // len(unit) + 1) for name, unit in units.items()}
+
+
+def run_lexer(size: int, repeat: int) -> int:
+    from core.lexer import Lexer
+
+    print(f"{'source':<24} {'size':>10} {'best':>10} {'mean':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, source in generate_sources(size).items():
+            path = os.path.join(tmp_dir, f"{name}.rn")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            megabytes = len(text.encode("utf-8")) / 1e6
+            print(f"{name:<24} {megabytes:>8.1f}MB", end="", flush=True)
+
+            speeds: list[float] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _, error = Lexer(path, text).make_tokens()
+                speeds.append(megabytes / (time.perf_counter() - start))
+                if error is not None:
+                    print()
+                    print(f"ERROR: generated source {name!r} failed to lex:\n{error.as_string()}", file=sys.stderr)
+                    return 1
+            print(f" {max(speeds):>6.2f}MB/s {sum(speeds) / len(speeds):>6.2f}MB/s")
+    return 0
+
+
+def find_benchmarks(names: list[str], directory: str) -> list[str]:
+    benchmarks = sorted(name for name in os.listdir(directory) if name.endswith(".rn"))
+    if len(names) > 0:
+        benchmarks = [name for name in benchmarks if name.removesuffix(".rn") in names or name in names]
+        if len(benchmarks) == 0:
+            print(f"ERROR: no benchmarks matching {names!r}", file=sys.stderr)
+    return benchmarks
+
+
+def run_benchmarks(names: list[str], repeat: int, engine: str, directory: str = "benchmarks") -> int:
+    benchmarks = find_benchmarks(names, directory)
+    if len(benchmarks) == 0:
+        return 1
+
+    print(f"{'benchmark':<24} {'best':>10} {'mean':>10}")
+    for benchmark in benchmarks:
+        print(f"{benchmark:<24}", end="", flush=True)
+        try:
+            timing = run_benchmark(f"{directory}/{benchmark}", repeat, engine)
+        except RuntimeError as e:
+            print()
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        print(f" {timing.best:>9.3f}s {timing.mean:>9.3f}s")
+    return 0
+
+
+def run_allocs(names: list[str], engine: str, directory: str = "benchmarks") -> int:
+    benchmarks = find_benchmarks(names, directory)
+    if len(benchmarks) == 0:
+        return 1
+
+    print(f"{'benchmark':<24}" + "".join(f" {name:>12}" for name in ALLOC_CLASSES))
+    for benchmark in benchmarks:
+        print(f"{benchmark:<24}", end="", flush=True)
+        try:
+            counts = count_allocations(f"{directory}/{benchmark}", engine)
+        except RuntimeError as e:
+            print()
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        print("".join(f" {counts.get(name, 0):>12}" for name in ALLOC_CLASSES))
+    return 0
+
+
+def run_memory(names: list[str], engine: str, directory: str = "benchmarks/memory") -> int:
+    benchmarks = find_benchmarks(names, directory)
+    if len(benchmarks) == 0:
+        return 1
+
+    print(f"{'benchmark':<24} {'peak':>12}")
+    for benchmark in benchmarks:
+        print(f"{benchmark:<24}", end="", flush=True)
+        try:
+            peak = measure_memory(f"{directory}/{benchmark}", engine)
+        except RuntimeError as e:
+            print()
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        print(f" {peak / 1024:>9.1f}MiB")
+    return 0
+
+
+def usage(program_name: str, stream: IO[str]) -> None:
+    print(
+        f"""Usage: {program_name} <subcommand> [args]
+SUBCOMMANDS:
+    help                  - Print this help message to stdout and exit successfully
+    run [-n N] [-e ENGINE] [names...]
+                          - Time the benchmarks (all of them by default), best of N runs (default 3),
+                            on the given execution engine (default tree)
+    allocs [-e ENGINE] [names...]
+                          - Count the scopes, results, values and positions the benchmarks allocate
+    memory [-e ENGINE] [names...]
+                          - Measure the peak memory of the benchmarks in benchmarks/memory (all of them by default)
+    lex [-n N] [-s MB]    - Measure the throughput of the lexer on generated sources of MB megabytes (default 4),
+                            best of N runs (default 3)
+""",
+        file=stream,
+    )
+
+
+def main(argv: list[str]) -> int:
+    program_name = argv.pop(0)
+    if len(argv) == 0:
+        usage(program_name, sys.stderr)
+        print("ERROR: no subcommand provided", file=sys.stderr)
+        return 1
+
+    subcommand = argv.pop(0)
+    match subcommand:
+        case "help":
+            usage(program_name, sys.stdout)
+            return 0
+        case "run":
+            repeat = 3
+            engine = "tree"
+            names: list[str] = []
+            while len(argv) > 0:
+                arg = argv.pop(0)
+                if arg == "-n":
+                    if len(argv) == 0 or not argv[0].isdigit():
+                        usage(program_name, sys.stderr)
+                        print("ERROR: -n requires a number", file=sys.stderr)
+                        return 1
+                    repeat = int(argv.pop(0))
+                elif arg == "-e":
+                    if len(argv) == 0:
+                        usage(program_name, sys.stderr)
+                        print("ERROR: -e requires an engine name", file=sys.stderr)
+                        return 1
+                    engine = argv.pop(0)
+                else:
+                    names.append(arg)
+            return run_benchmarks(names, repeat, engine)
+        case "allocs":
+            engine = "tree"
+            names = []
+            while len(argv) > 0:
+                arg = argv.pop(0)
+                if arg == "-e":
+                    if len(argv) == 0:
+                        usage(program_name, sys.stderr)
+                        print("ERROR: -e requires an engine name", file=sys.stderr)
+                        return 1
+                    engine = argv.pop(0)
+                else:
+                    names.append(arg)
+            return run_allocs(names, engine)
+        case "memory":
+            engine = "tree"
+            names = []
+            while len(argv) > 0:
+                arg = argv.pop(0)
+                if arg == "-e":
+                    if len(argv) == 0:
+                        usage(program_name, sys.stderr)
+                        print("ERROR: -e requires an engine name", file=sys.stderr)
+                        return 1
+                    engine = argv.pop(0)
+                else:
+                    names.append(arg)
+            return run_memory(names, engine)
+        case "lex":
+            repeat = 3
+            size = 4
+            while len(argv) > 0:
+                arg = argv.pop(0)
+                if arg == "-n" or arg == "-s":
+                    if len(argv) == 0 or not argv[0].isdigit():
+                        usage(program_name, sys.stderr)
+                        print(f"ERROR: {arg} requires a number", file=sys.stderr)
+                        return 1
+                    if arg == "-n":
+                        repeat = int(argv.pop(0))
+                    else:
+                        size = int(argv.pop(0))
+                else:
+                    usage(program_name, sys.stderr)
+                    print(f"ERROR: unknown argument '{arg}'", file=sys.stderr)
+                    return 1
+            return run_lexer(size * 1_000_000, repeat)
+        case unknown:
+            usage(program_name, sys.stderr)
+            print(f"ERROR: unknown subcommand '{unknown}'", file=sys.stderr)
+            return 1
+
+
+if __name__ == "__main__":
+    exit(main(sys.argv))
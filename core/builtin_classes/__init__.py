@@ -1,8 +1,25 @@
+from core.builtin_classes.array_object import ArrayObject
 from core.builtin_classes.base_classes import BuiltInClass
 from core.builtin_classes.builtins_object import BuiltinsObject
 from core.builtin_classes.file_object import FileObject
 from core.builtin_classes.json_object import JSONObject
+from core.builtin_classes.numarray_object import NumArrayObject
 from core.builtin_classes.requests_object import RequestsObject
+from core.builtin_classes.set_object import SetObject
+from core.builtin_classes.string_builder_object import StringBuilderObject
+from core.builtin_classes.string_module_object import StringModuleObject
 from core.builtin_classes.string_object import StringObject
 
-__all__ = ["BuiltInClass", "FileObject", "StringObject", "JSONObject", "RequestsObject", "BuiltinsObject"]
+__all__ = [
+    "BuiltInClass",
+    "FileObject",
+    "StringObject",
+    "JSONObject",
+    "RequestsObject",
+    "BuiltinsObject",
+    "NumArrayObject",
+    "SetObject",
+    "StringBuilderObject",
+    "ArrayObject",
+    "StringModuleObject",
+]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from core.builtin_classes.base_classes import BuiltInObject, attribute, check, method, operator
+from core.builtin_funcs import args
+from core.datatypes import Array, Boolean, Null, Number, String, Value
+from core.errors import RTError
+from core.parser import Context, RTResult
+
+
+class ArrayObject(BuiltInObject):
+    """The array class of the `array` standard library module, a wrapper with methods around an array.
+    `Array(list)` wraps `list` without copying it, the methods change it in place and `this.list` is the array."""
+
+    list = attribute(Array)
+
+    @operator("__constructor__")
+    @check([Array])
+    def constructor(self, list: Array) -> RTResult[Value]:
+        self.list = list
+        return RTResult[Value]().success(Null.null())
+
+    def __string_display__(self) -> str:
+        """Display like instances of the class written in Radon this one replaces."""
+        return f"<instance of class {self.parent_class.name}>"
+
+    def __len__(self) -> int:
+        """Return array total length."""
+        return len(self.list.elements)
+
+    @args(["func"])
+    @method
+    def map(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        func = ctx.symbol_table.get("func")
+        assert func is not None
+        new_elements: list[Value] = []
+        # Only the elements there when mapping starts, like a loop over the array
+        for element in list(self.list.elements):
+            new_element = res.register(func.execute([element], {}))
+            if res.should_return():
+                return res
+            assert new_element is not None
+            new_elements.append(new_element)
+        return res.success(Array(new_elements))
+
+    @args(["item"])
+    @method
+    def append(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        item = ctx.symbol_table.get("item")
+        assert item is not None
+        self.list.mutable_elements().append(item)
+        return res.success(Null.null())
+
+    @args(["index"])
+    @method
+    def pop(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        index = ctx.symbol_table.get("index")
+        assert index is not None
+        if not isinstance(index, Number):
+            return res.failure(RTError(index.pos_start, index.pos_end, "Index must be a number", ctx))
+        try:
+            return res.success(self.list.mutable_elements().pop(int(index.value)))
+        except IndexError:
+            return res.failure(
+                RTError(
+                    index.pos_start,
+                    index.pos_end,
+                    "Element at this index could not be removed from array because index is out of bounds",
+                    ctx,
+                )
+            )
+
+    @args(["list"])
+    @method
+    def extend(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        other = ctx.symbol_table.get("list")
+        assert other is not None
+        if not isinstance(other, Array):
+            return res.failure(RTError(other.pos_start, other.pos_end, "Can only extend with an array", ctx))
+        self.list.mutable_elements().extend(other.elements)
+        return res.success(Null.null())
+
+    @args(["index"])
+    @method
+    def find(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        index = ctx.symbol_table.get("index")
+        assert index is not None
+        value, error = self.list.get_index(index)
+        if error is not None:
+            return res.failure(error)
+        assert value is not None
+        return res.success(value)
+
+    @args(["start", "end"])
+    @method
+    def slice(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        start = ctx.symbol_table.get("start")
+        end = ctx.symbol_table.get("end")
+        value, error = self.list.get_slice(start, end, None)
+        if error is not None:
+            return res.failure(error)
+        assert value is not None
+        return res.success(value)
+
+    @args([])
+    @method
+    def is_empty(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Boolean.of(len(self.list.elements) == 0))
+
+    @args([])
+    @method
+    def to_string(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(String(str(self.list)))
+
+    @args([])
+    @method
+    def is_array(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Boolean.true())
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Optional, Sequence, TypeAlias, TypeVar
+from typing import Any, Callable, Generator, Generic, Optional, Sequence, TypeAlias, TypeVar, overload
 
 from core.builtin_funcs import BuiltInFunction, args
 from core.datatypes import BaseClass, BaseFunction, BaseInstance, ResultTuple, Value
@@ -9,6 +9,8 @@ from core.parser import Context, RTResult, SymbolTable
 
 
 class BuiltInClass(BaseClass):
+    __slots__ = ("instance_class",)
+
     desc: Optional[str]
     instance_class: BuiltInObjectMeta
 
@@ -44,9 +46,12 @@ class BuiltInClass(BaseClass):
 
 
 class BuiltInInstance(BaseInstance):
+    __slots__ = ("obj",)
+
     def __init__(self, parent_class: BuiltInClass, obj: BuiltInObject) -> None:
         super().__init__(parent_class, parent_class.instance_class.__symbol_table__)
         self.obj = obj
+        obj.symbol_table = self.symbol_table
         self.symbol_table.set("this", self)
 
     def bind_method(self, method: BaseFunction) -> RTResult[BaseFunction]:
@@ -60,6 +65,10 @@ class BuiltInInstance(BaseInstance):
 
         return RTResult[BaseFunction]().success(BuiltInFunction(method.name, new_func))
 
+    def attribute_type(self, name: str) -> Optional[type[Value]]:
+        attr = getattr(type(self.obj), name, None)
+        return attr.type if isinstance(attr, attribute) else None
+
     def operator(self, operator: str, *args: Value) -> ResultTuple:
         try:
             op = type(self.obj).__operators__[operator]
@@ -73,6 +82,12 @@ class BuiltInInstance(BaseInstance):
         assert value is not None
         return value, None
 
+    def gen(self) -> Generator[RTResult[Value], None, None]:
+        if not hasattr(self.obj, "gen"):
+            yield from super().gen()
+            return
+        yield from self.obj.gen()
+
     def __repr__(self) -> str:
         if "__string_display__" in dir(self.obj):
             return str(getattr(self.obj, "__string_display__")())
@@ -99,6 +114,9 @@ class BuiltInObjectMeta(type):
                 assert hasattr(value, "arg_names"), "Make sure to use the args() decorator on any built-in methods!"
                 assert hasattr(value, "defaults"), "Unreachable. The first `assert` should have ensured this."
                 symbols[name] = BuiltInFunction(value.__name__, value)
+            elif isinstance(value, Value):
+                # Class attributes, shared by every instance
+                symbols[name] = value
         symbol_table = SymbolTable(None)
         symbol_table.symbols = symbols
 
@@ -109,6 +127,8 @@ class BuiltInObjectMeta(type):
 
 class BuiltInObject(metaclass=BuiltInObjectMeta):
     parent_class: BuiltInClass
+    # The symbol table of the instance wrapping the object, which holds its attributes
+    symbol_table: SymbolTable
 
     def __init__(self, parent_class: BuiltInClass) -> None:
         self.parent_class = parent_class
@@ -120,6 +140,39 @@ class BuiltInObject(metaclass=BuiltInObjectMeta):
         return self.parent_class.name
 
 
+V = TypeVar("V", bound=Value)
+
+
+class attribute(Generic[V]):
+    """An attribute of the instances of a built-in class, like the ones `this.name = value` sets in a class written in
+    Radon. It is kept in the symbol table of the instance, so Radon code reading or assigning it and the object share
+    the same value. Radon code can only assign values of type `type` to it."""
+
+    name: str
+
+    def __init__(self, type_: type[V]) -> None:
+        self.type = type_
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    @overload
+    def __get__(self, obj: None, objtype: Optional[type] = None) -> attribute[V]: ...
+
+    @overload
+    def __get__(self, obj: BuiltInObject, objtype: Optional[type] = None) -> V: ...
+
+    def __get__(self, obj: Optional[BuiltInObject], objtype: Optional[type] = None) -> attribute[V] | V:
+        if obj is None:
+            return self
+        value = obj.symbol_table.symbols[self.name]
+        assert isinstance(value, self.type)
+        return value
+
+    def __set__(self, obj: BuiltInObject, value: V) -> None:
+        obj.symbol_table.symbols[self.name] = value
+
+
 # Decorators for methods and operators
 C = TypeVar("C", bound=Callable)  # type: ignore
 
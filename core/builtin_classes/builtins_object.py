@@ -16,14 +16,14 @@ class BuiltinsObject(BuiltInObject):
     @args([])
     @method
     def show(self, ctx: Context) -> RTResult[Value]:
-        from core.builtin_funcs import global_symbol_table  # Lazy import
+        from core.builtin_funcs import program_builtins  # Lazy import
 
-        return RTResult[Value]().success(Array(list(map(String, global_symbol_table.symbols.keys()))))
+        return RTResult[Value]().success(Array(list(map(String, program_builtins().symbols.keys()))))
 
     @args(["name", "obj"])
     @method
     def set(self, ctx: Context) -> RTResult[Value]:
-        from core.builtin_funcs import global_symbol_table  # Lazy import
+        from core.builtin_funcs import program_builtins  # Lazy import
 
         res = RTResult[Value]()
         name = ctx.symbol_table.get("name")
@@ -39,15 +39,15 @@ class BuiltinsObject(BuiltInObject):
         #     return res.failure(RTError(obj.pos_start, obj.pos_end, "Can't set a non-value", ctx))
 
         try:
-            global_symbol_table.set(str(name), obj)
-            return res.success(Boolean(True))
+            program_builtins().set(str(name), obj)
+            return res.success(Boolean.true())
         except Exception as e:
             return res.failure(RTError(name.pos_start, obj.pos_end, f"Error settting builtins: {str(e)}", ctx))
 
     @args(["name"])
     @method
     def remove(self, ctx: Context) -> RTResult[Value]:
-        from core.builtin_funcs import global_symbol_table  # Lazy import
+        from core.builtin_funcs import program_builtins  # Lazy import
 
         res = RTResult[Value]()
         name = ctx.symbol_table.get("name")
@@ -56,8 +56,8 @@ class BuiltinsObject(BuiltInObject):
         if not isinstance(name, String):
             return res.failure(RTError(name.pos_start, name.pos_end, "Can't set a non-string", ctx))
 
-        global_symbol_table.remove(str(name))
+        program_builtins().remove(str(name))
         try:
-            return res.success(Boolean(True))
+            return res.success(Boolean.true())
         except Exception as e:
             return res.failure(RTError(name.pos_start, name.pos_end, f"Error removing builtins: {str(e)}", ctx))
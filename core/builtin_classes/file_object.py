@@ -31,7 +31,7 @@ class FileObject(BuiltInObject):
             )
         return res.success(Null.null())
 
-    @args(["count"], [Number(-1)])
+    @args(["count"], [Number.of(-1)])
     @method
     def read(self, ctx: Context) -> RTResult[Value]:
         security.security_prompt("disk_access")
@@ -92,7 +92,7 @@ class FileObject(BuiltInObject):
 
         try:
             bytes_written = self.file.write(data.value)
-            return res.success(Number(bytes_written))
+            return res.success(Number.of(bytes_written))
         except OSError as e:
             return res.failure(
                 RTError(data.pos_start, data.pos_end, f"Could not read from file: {e.strerror}", data.context)
@@ -113,4 +113,4 @@ class FileObject(BuiltInObject):
         security.security_prompt("disk_access")
 
         res = RTResult[Value]()
-        return res.success(Boolean(self.file.closed))
+        return res.success(Boolean.of(self.file.closed))
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import operator as op
+from array import array
+from itertools import repeat
+from typing import Callable, Optional
+
+from core.builtin_classes.base_classes import BuiltInInstance, BuiltInObject, check, method, operator
+from core.builtin_funcs import args
+from core.datatypes import Array, Boolean, Null, Number, Value
+from core.errors import RNIndexError, RTError
+from core.parser import Context, RTResult
+
+
+TOO_LARGE = "Number too large to store in a NumArray"
+
+
+class NumArrayObject(BuiltInObject):
+    """Built-in array of numbers, stored unboxed as floats so that arithmetic and reductions run over the whole array
+    at once instead of one Radon value at a time. `NumArray(n)` makes `n` zeros, `NumArray(array)` copies an array of
+    numbers. Slices are views: writing to them writes to the array they were taken from."""
+
+    values: memoryview
+
+    @operator("__constructor__")
+    @check([Value], [Number.of(0)])
+    def constructor(self, values: Value) -> RTResult[Value]:
+        res = RTResult[Value]()
+        if isinstance(values, Number):
+            if not isinstance(values.value, int) or values.value < 0:
+                return res.failure(
+                    RTError(
+                        values.pos_start,
+                        values.pos_end,
+                        "NumArray length must be a non-negative integer",
+                        values.context,
+                    )
+                )
+            self.values = memoryview(array("d", bytes(8 * values.value)))
+        elif isinstance(values, Array):
+            floats: list[float] = []
+            for element in values.elements:
+                if not isinstance(element, Number):
+                    return res.failure(
+                        RTError(element.pos_start, element.pos_end, "NumArray elements must be numbers", values.context)
+                    )
+                if (value := to_float(element)) is None:
+                    return res.failure(RTError(element.pos_start, element.pos_end, TOO_LARGE, values.context))
+                floats.append(value)
+            self.values = memoryview(array("d", floats))
+        elif (other := numarray(values)) is not None:
+            self.values = memoryview(array("d", other.values))
+        else:
+            return res.failure(
+                RTError(values.pos_start, values.pos_end, "Cannot make a NumArray out of this value", values.context)
+            )
+        return res.success(Null.null())
+
+    def new(self, values: memoryview | array[float]) -> BuiltInInstance:
+        """Wrap `values` in a new NumArray without copying them"""
+        obj = NumArrayObject(self.parent_class)
+        obj.values = values if isinstance(values, memoryview) else memoryview(values)
+        return BuiltInInstance(self.parent_class, obj)
+
+    def elementwise(self, other: Value, func: Callable[[float, float], float]) -> RTResult[Value]:
+        res = RTResult[Value]()
+        if isinstance(other, Number):
+            if (value := to_float(other)) is None:
+                return res.failure(RTError(other.pos_start, other.pos_end, TOO_LARGE, other.context))
+            operands = repeat(value)
+        elif (other_obj := numarray(other)) is not None:
+            if len(other_obj.values) != len(self.values):
+                return res.failure(
+                    RTError(
+                        other.pos_start,
+                        other.pos_end,
+                        f"NumArray lengths differ ({len(self.values)} and {len(other_obj.values)})",
+                        other.context,
+                    )
+                )
+            operands = other_obj.values  # type: ignore
+        else:
+            return res.failure(RTError(other.pos_start, other.pos_end, "Illegal operation", other.context))
+        try:
+            return res.success(self.new(array("d", map(func, self.values, operands))))
+        except ZeroDivisionError:
+            return res.failure(RTError(other.pos_start, other.pos_end, "Division by zero", other.context))
+
+    @operator("__add__")
+    @check([Value])
+    def add(self, other: Value) -> RTResult[Value]:
+        return self.elementwise(other, op.add)
+
+    @operator("__sub__")
+    @check([Value])
+    def sub(self, other: Value) -> RTResult[Value]:
+        return self.elementwise(other, op.sub)
+
+    @operator("__mul__")
+    @check([Value])
+    def mul(self, other: Value) -> RTResult[Value]:
+        return self.elementwise(other, op.mul)
+
+    @operator("__div__")
+    @check([Value])
+    def div(self, other: Value) -> RTResult[Value]:
+        return self.elementwise(other, op.truediv)
+
+    def index(self, index: Number) -> Optional[int]:
+        i = int(index.value)
+        if not -len(self.values) <= i < len(self.values):
+            return None
+        return i
+
+    @operator("__getitem__")
+    @check([Number])
+    def getitem(self, index: Number) -> RTResult[Value]:
+        res = RTResult[Value]()
+        i = self.index(index)
+        if i is None:
+            return res.failure(
+                RNIndexError(index.pos_start, index.pos_end, "NumArray index out of range", index.context)
+            )
+        return res.success(Number(self.values[i]))
+
+    @operator("__setitem__")
+    @check([Number, Number])
+    def setitem(self, index: Number, value: Number) -> RTResult[Value]:
+        res = RTResult[Value]()
+        i = self.index(index)
+        if i is None:
+            return res.failure(
+                RNIndexError(index.pos_start, index.pos_end, "NumArray index out of range", index.context)
+            )
+        if (number := to_float(value)) is None:
+            return res.failure(RTError(value.pos_start, value.pos_end, TOO_LARGE, value.context))
+        self.values[i] = number  # type: ignore
+        return res.success(Null.null())
+
+    @operator("__truthy__")
+    @check([])
+    def truthy(self) -> RTResult[Value]:
+        return RTResult[Value]().success(Boolean.of(len(self.values) > 0))
+
+    def __string_display__(self) -> str:
+        """This method helps __repr__ to display as we want."""
+        return f"NumArray([{', '.join(repr(Number(value)) for value in self.values)}])"
+
+    def __len__(self) -> int:
+        """Return the length of the array."""
+        return len(self.values)
+
+    @args([])
+    @method
+    def length(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Number.of(len(self.values)))
+
+    @args([])
+    @method
+    def sum(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Number(sum(self.values)))
+
+    def reduce(self, ctx: Context, name: str, func: Callable[[memoryview], float]) -> RTResult[Value]:
+        res = RTResult[Value]()
+        if len(self.values) == 0:
+            return res.failure(
+                RTError(
+                    self.parent_class.pos_start,
+                    self.parent_class.pos_end,
+                    f"Cannot take the {name} of an empty NumArray",
+                    ctx,
+                )
+            )
+        return res.success(Number(func(self.values)))
+
+    @args([])
+    @method
+    def min(self, ctx: Context) -> RTResult[Value]:
+        return self.reduce(ctx, "min", min)
+
+    @args([])
+    @method
+    def max(self, ctx: Context) -> RTResult[Value]:
+        return self.reduce(ctx, "max", max)
+
+    @args([])
+    @method
+    def mean(self, ctx: Context) -> RTResult[Value]:
+        return self.reduce(ctx, "mean", lambda values: sum(values) / len(values))
+
+    @args(["start", "end", "step"], [Number.of(0), Null.null(), Number.of(1)])
+    @method
+    def slice(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        start = ctx.symbol_table.get("start")
+        end = ctx.symbol_table.get("end")
+        step = ctx.symbol_table.get("step")
+        assert start is not None and end is not None and step is not None
+        for bound in (start, end, step):
+            if not isinstance(bound, Number) and not (bound is end and isinstance(bound, Null)):
+                return res.failure(RTError(bound.pos_start, bound.pos_end, "NumArray bounds must be numbers", ctx))
+        assert isinstance(start, Number) and isinstance(step, Number)
+        if step.value == 0:
+            return res.failure(RTError(step.pos_start, step.pos_end, "Step cannot be zero.", ctx))
+        iend = int(end.value) if isinstance(end, Number) else None
+        return res.success(self.new(self.values[int(start.value) : iend : int(step.value)]))
+
+    @args([])
+    @method
+    def to_array(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Array([Number(value) for value in self.values]))
+
+
+def to_float(number: Number) -> Optional[float]:
+    """Return the value of `number` as stored in a NumArray, or None if it is too large for a float"""
+    try:
+        return float(number.value)
+    except (OverflowError, TypeError):
+        return None
+
+
+def numarray(value: Value) -> Optional[NumArrayObject]:
+    """Return the NumArray wrapped by `value`, or None if `value` is not a NumArray"""
+    if isinstance(value, BuiltInInstance) and isinstance(value.obj, NumArrayObject):
+        return value.obj
+    return None
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from typing import Callable, Generator, Optional, TypeAlias
+
+from core.builtin_classes.base_classes import BuiltInInstance, BuiltInObject, check, method, operator
+from core.builtin_funcs import args
+from core.datatypes import Array, Boolean, HashKey, KeyComparisonError, Null, Number, Value
+from core.errors import RNKeyError, RTError
+from core.parser import Context, RTResult
+
+
+class SetObject(BuiltInObject):
+    """Built-in set of values without duplicates, looked up by hash like the keys of a HashMap, so it holds the same
+    kinds of values: strings, numbers, booleans, null, and instances defining `__hash__` and `__eq__`.
+    `Set(iterable)` makes a set of the elements of an array, string, hashmap or set. `+` is the union, `*` the
+    intersection and `-` the difference of two sets."""
+
+    # Elements by what they are stored as, see `Value.hash_key`
+    values: dict[HashKey, Value]
+
+    @operator("__constructor__")
+    @check([Value], [Array([])])
+    def constructor(self, iterable: Value) -> RTResult[Value]:
+        res = RTResult[Value]()
+        values = res.register(collect(iterable))
+        if res.should_return():
+            return res
+        assert values is not None
+        self.values = values
+        return res.success(Null.null())
+
+    def new(self, values: dict[HashKey, Value]) -> BuiltInInstance:
+        """Wrap `values` in a new Set without copying them"""
+        obj = SetObject(self.parent_class)
+        obj.values = values
+        return BuiltInInstance(self.parent_class, obj)
+
+    def gen(self) -> Generator[RTResult[Value], None, None]:
+        # Over a snapshot, so that the loop body can add to the set or remove from it
+        for value in tuple(self.values.values()):
+            yield RTResult[Value]().success(value)
+
+    def combine(self, other: Value, operation: SetOperation, sets_only: bool = False) -> RTResult[Value]:
+        """Return the Set `operation` makes out of this set and the elements of `other`"""
+        res = RTResult[Value]()
+        if sets_only and set_values(other) is None:
+            return res.failure(RTError(other.pos_start, other.pos_end, "Illegal operation", other.context))
+        values = res.register(collect(other))
+        if res.should_return():
+            return res
+        assert values is not None
+        try:
+            return res.success(self.new(operation(self.values, values)))
+        except KeyComparisonError as e:
+            return res.failure(e.error)
+
+    def has(self, value: Value) -> RTResult[Value]:
+        res = RTResult[Value]()
+        key, error = value.hash_key()
+        if error is not None:
+            return res.failure(error)
+        try:
+            return res.success(Boolean.of(key in self.values))
+        except KeyComparisonError as e:
+            return res.failure(e.error)
+
+    def equals(self, other: Value) -> RTResult[bool]:
+        res = RTResult[bool]()
+        other_values = set_values(other)
+        if other_values is None:
+            return res.success(False)
+        try:
+            return res.success(self.values.keys() == other_values.keys())
+        except KeyComparisonError as e:
+            return res.failure(e.error)
+
+    @operator("__add__")
+    @check([Value])
+    def add_operator(self, other: Value) -> RTResult[Value]:
+        return self.combine(other, union_of, sets_only=True)
+
+    @operator("__mul__")
+    @check([Value])
+    def mul_operator(self, other: Value) -> RTResult[Value]:
+        return self.combine(other, intersection_of, sets_only=True)
+
+    @operator("__sub__")
+    @check([Value])
+    def sub_operator(self, other: Value) -> RTResult[Value]:
+        return self.combine(other, difference_of, sets_only=True)
+
+    @operator("__contains__")
+    @check([Value])
+    def contains_operator(self, value: Value) -> RTResult[Value]:
+        return self.has(value)
+
+    @operator("__eq__")
+    @check([Value])
+    def eq_operator(self, other: Value) -> RTResult[Value]:
+        res = RTResult[Value]()
+        equal = res.register(self.equals(other))
+        if res.should_return():
+            return res
+        return res.success(Boolean.of(bool(equal)))
+
+    @operator("__ne__")
+    @check([Value])
+    def ne_operator(self, other: Value) -> RTResult[Value]:
+        res = RTResult[Value]()
+        equal = res.register(self.equals(other))
+        if res.should_return():
+            return res
+        return res.success(Boolean.of(not equal))
+
+    @operator("__truthy__")
+    @check([])
+    def truthy(self) -> RTResult[Value]:
+        return RTResult[Value]().success(Boolean.of(len(self.values) > 0))
+
+    def __string_display__(self) -> str:
+        """This method helps __repr__ to display as we want."""
+        return f"Set([{', '.join(repr(value) for value in self.values.values())}])"
+
+    def __len__(self) -> int:
+        """Return the number of elements of the set."""
+        return len(self.values)
+
+    @args(["value"])
+    @method
+    def add(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        value = ctx.symbol_table.get("value")
+        assert value is not None
+        key, error = value.hash_key()
+        if error is not None:
+            return res.failure(error)
+        assert key is not None
+        try:
+            self.values.setdefault(key, value)
+        except KeyComparisonError as e:
+            return res.failure(e.error)
+        return res.success(Null.null())
+
+    @args(["value"])
+    @method
+    def remove(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        value = ctx.symbol_table.get("value")
+        assert value is not None
+        key, error = value.hash_key()
+        if error is not None:
+            return res.failure(error)
+        assert key is not None
+        try:
+            del self.values[key]
+        except KeyError:
+            return res.failure(RNKeyError(value.pos_start, value.pos_end, f"Value '{value}' not found in Set", ctx))
+        except KeyComparisonError as e:
+            return res.failure(e.error)
+        return res.success(Null.null())
+
+    @args(["value"])
+    @method
+    def contains(self, ctx: Context) -> RTResult[Value]:
+        value = ctx.symbol_table.get("value")
+        assert value is not None
+        return self.has(value)
+
+    @args(["other"])
+    @method
+    def union(self, ctx: Context) -> RTResult[Value]:
+        other = ctx.symbol_table.get("other")
+        assert other is not None
+        return self.combine(other, union_of)
+
+    @args(["other"])
+    @method
+    def intersection(self, ctx: Context) -> RTResult[Value]:
+        other = ctx.symbol_table.get("other")
+        assert other is not None
+        return self.combine(other, intersection_of)
+
+    @args(["other"])
+    @method
+    def difference(self, ctx: Context) -> RTResult[Value]:
+        other = ctx.symbol_table.get("other")
+        assert other is not None
+        return self.combine(other, difference_of)
+
+    @args([])
+    @method
+    def length(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Number.of(len(self.values)))
+
+    @args([])
+    @method
+    def to_array(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Array(list(self.values.values())))
+
+
+SetOperation: TypeAlias = Callable[[dict[HashKey, Value], dict[HashKey, Value]], dict[HashKey, Value]]
+
+
+def union_of(a: dict[HashKey, Value], b: dict[HashKey, Value]) -> dict[HashKey, Value]:
+    return a | b
+
+
+def intersection_of(a: dict[HashKey, Value], b: dict[HashKey, Value]) -> dict[HashKey, Value]:
+    return {key: value for key, value in a.items() if key in b}
+
+
+def difference_of(a: dict[HashKey, Value], b: dict[HashKey, Value]) -> dict[HashKey, Value]:
+    return {key: value for key, value in a.items() if key not in b}
+
+
+def set_values(value: Value) -> Optional[dict[HashKey, Value]]:
+    """Return the elements of `value` by hash key, or None if `value` is not a Set"""
+    if isinstance(value, BuiltInInstance) and isinstance(value.obj, SetObject):
+        return value.obj.values
+    return None
+
+
+def collect(iterable: Value) -> RTResult[dict[HashKey, Value]]:
+    """Return the elements of a Set, or of any other iterable value, by hash key"""
+    res = RTResult[dict[HashKey, Value]]()
+    values = set_values(iterable)
+    if values is not None:
+        return res.success(dict(values))
+
+    values = {}
+    for it_res in iterable.iter():
+        element = res.register(it_res)
+        if res.should_return():
+            return res
+        assert element is not None
+        key, error = element.hash_key()
+        if error is not None:
+            return res.failure(error)
+        assert key is not None
+        try:
+            values.setdefault(key, element)
+        except KeyComparisonError as e:
+            return res.failure(e.error)
+    return res.success(values)
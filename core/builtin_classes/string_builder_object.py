@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from core.builtin_classes.base_classes import BuiltInObject, check, method, operator
+from core.builtin_funcs import args
+from core.datatypes import Boolean, Null, Number, String, Value
+from core.errors import RTError
+from core.parser import Context, RTResult
+
+
+class StringBuilderObject(BuiltInObject):
+    """Built-in builder of a string out of many pieces. `+` on strings copies both of them every time, so building a
+    string piece by piece in a loop takes time quadratic in its length; a StringBuilder keeps the pieces and joins
+    them once. `StringBuilder(string)` starts with `string`, `build()` returns the string built so far."""
+
+    parts: list[str]
+    # Total length of the parts
+    size: int
+
+    @operator("__constructor__")
+    @check([String], [String("")])
+    def constructor(self, string: String) -> RTResult[Value]:
+        self.parts = [string.value] if len(string.value) > 0 else []
+        self.size = len(string.value)
+        return RTResult[Value]().success(Null.null())
+
+    def push(self, value: Value, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        if not isinstance(value, String):
+            return res.failure(RTError(value.pos_start, value.pos_end, "StringBuilder can only append strings", ctx))
+        self.parts.append(value.value)
+        self.size += len(value.value)
+        return res.success(Null.null())
+
+    def build_string(self) -> str:
+        # Keep the joined string as the only part, so that building again without appending does not join again
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]
+        return self.parts[0] if len(self.parts) > 0 else ""
+
+    @operator("__truthy__")
+    @check([])
+    def truthy(self) -> RTResult[Value]:
+        return RTResult[Value]().success(Boolean.of(self.size > 0))
+
+    def __string_display__(self) -> str:
+        """This method helps __repr__ to display as we want."""
+        return f"StringBuilder({String(self.build_string())!r})"
+
+    def __len__(self) -> int:
+        """Return the length of the string built so far."""
+        return self.size
+
+    @args(["string"])
+    @method
+    def append(self, ctx: Context) -> RTResult[Value]:
+        string = ctx.symbol_table.get("string")
+        assert string is not None
+        return self.push(string, ctx)
+
+    @args(["strings"])
+    @method
+    def extend(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        strings = ctx.symbol_table.get("strings")
+        assert strings is not None
+        for it_res in strings.iter():
+            string = res.register(it_res)
+            if res.should_return():
+                return res
+            assert string is not None
+            res.register(self.push(string, ctx))
+            if res.should_return():
+                return res
+        return res.success(Null.null())
+
+    @args([])
+    @method
+    def build(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(String(self.build_string()))
+
+    @args([])
+    @method
+    def length(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Number.of(self.size))
+
+    @args([])
+    @method
+    def clear(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        self.parts = []
+        self.size = 0
+        return res.success(Null.null())
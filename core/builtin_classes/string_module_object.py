@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from core.builtin_classes.base_classes import BuiltInObject, attribute, check, method, operator
+from core.builtin_funcs import args
+from core.datatypes import Boolean, Null, Number, String, Value
+from core.errors import RTError
+from core.parser import Context, RTResult
+
+
+class StringModuleObject(BuiltInObject):
+    """The string class of the `string` standard library module. `String(value)` converts `value` to a string, which
+    `this.value` is, and every String has the character sets of Python's `string` module as attributes."""
+
+    # Builtin attributes
+    ascii_uppercase = String("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    ascii_lowercase = String("abcdefghijklmnopqrstuvwxyz")
+    ascii_letters = String("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+    digits = String("0123456789")
+    hexdigits = String("0123456789abcdefABCDEF")
+    octdigits = String("01234567")
+    punctuation = String("!#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+    whitespace = String(" ")
+    tab = String("    ")
+
+    value = attribute(String)
+
+    @operator("__constructor__")
+    @check([Value])
+    def constructor(self, value: Value) -> RTResult[Value]:
+        self.value = value if isinstance(value, String) else String(str(value))
+        return RTResult[Value]().success(Null.null())
+
+    def __string_display__(self) -> str:
+        """Display like instances of the class written in Radon this one replaces."""
+        return f"<instance of class {self.parent_class.name}>"
+
+    def __len__(self) -> int:
+        """Return the length of the string."""
+        return len(self.value.value)
+
+    @args(["separator"], [String(" ")])
+    @method
+    def join(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        separator = ctx.symbol_table.get("separator")
+        assert separator is not None
+        if not isinstance(separator, String):
+            return res.failure(
+                RTError(separator.pos_start, separator.pos_end, "Cannot join with a non-string", separator.context)
+            )
+        return res.success(String(separator.value.join(self.value.value)))
+
+    @args(["data"])
+    @method
+    def find(self, ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        data = ctx.symbol_table.get("data")
+        assert data is not None
+        if not isinstance(data, String):
+            return res.failure(RTError(data.pos_start, data.pos_end, "Cannot find a non-string", data.context))
+        return res.success(Number.of(self.value.value.find(data.value)))
+
+    @args([])
+    @method
+    def to_int(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        try:
+            return res.success(Number.of(int(self.value.value)))
+        except ValueError:
+            return res.success(Boolean.false())
+
+    @args([])
+    @method
+    def len(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(Number.of(len(self.value.value)))
+
+    @args([])
+    @method
+    def to_string(self, _ctx: Context) -> RTResult[Value]:
+        res = RTResult[Value]()
+        return res.success(String(self.value.value))
@@ -62,7 +62,7 @@ class StringObject(BuiltInObject):
     @method
     def length(self, _ctx: Context) -> RTResult[Value]:
         res = RTResult[Value]()
-        return res.success(Number(len(self.value)))
+        return res.success(Number.of(len(self.value)))
 
     @args(["string"], [String("")])
     @method
@@ -76,7 +76,7 @@ class StringObject(BuiltInObject):
             return res.failure(
                 RTError(string.pos_start, string.pos_end, "Cannot count an empty string", string.context)
             )
-        return res.success(Number(self.value.count(string.value)))
+        return res.success(Number.of(self.value.count(string.value)))
 
     @args(["string", "value"], [String(""), String("")])
     @method
@@ -100,7 +100,7 @@ class StringObject(BuiltInObject):
         assert string is not None
         if not isinstance(string, String):
             return res.failure(RTError(string.pos_start, string.pos_end, "Cannot find a non-string", string.context))
-        return res.success(Number(self.value.find(string.value)))
+        return res.success(Number.of(self.value.find(string.value)))
 
     @args(["string"], [String("")])
     @method
@@ -112,7 +112,7 @@ class StringObject(BuiltInObject):
             return res.failure(
                 RTError(string.pos_start, string.pos_end, "Cannot startswith a non-string", string.context)
             )
-        return res.success(Boolean(self.value.startswith(string.value)))
+        return res.success(Boolean.of(self.value.startswith(string.value)))
 
     @args(["string"], [String("")])
     @method
@@ -124,7 +124,7 @@ class StringObject(BuiltInObject):
             return res.failure(
                 RTError(string.pos_start, string.pos_end, "Cannot endswith a non-string", string.context)
             )
-        return res.success(Boolean(self.value.endswith(string.value)))
+        return res.success(Boolean.of(self.value.endswith(string.value)))
 
     @args(["string"], [String(" ")])
     @method
@@ -2,20 +2,23 @@ from __future__ import annotations
 
 import os
 from sys import stdout
-from typing import Callable, Generic, NoReturn, Optional, ParamSpec, Protocol, Sequence, Union, cast
+from typing import Callable, Generator, Generic, NoReturn, Optional, ParamSpec, Protocol, Sequence, Union, cast
 
-from core import security
+from core import cache, optimizer, security
 from core.datatypes import (
     Array,
+    BaseClass,
     BaseFunction,
     Boolean,
     Class,
     Function,
     HashMap,
+    Iterator,
     Module,
     Null,
     Number,
     PyAPI,
+    Range,
     String,
     Type,
     Value,
@@ -23,6 +26,7 @@ from core.datatypes import (
 from core.errors import Error, InvalidSyntaxError, RNModuleNotFoundError, RTError
 from core.lexer import Lexer
 from core.parser import Context, Parser, RTResult, SymbolTable
+from core.resolver import resolve
 from core.tokens import BASE_DIR, STDLIBS, Position
 
 P = ParamSpec("P")
@@ -54,6 +58,8 @@ def args(
 
 
 class BuiltInFunction(BaseFunction):
+    __slots__ = ("func",)
+
     def __init__(self, name: str, func: Optional[RadonCompatibleFunction[P]] = None):
         super().__init__(name, None)
         self.func = func
@@ -87,6 +93,11 @@ class BuiltInFunction(BaseFunction):
             return res
 
         return_value = res.register(method(exec_ctx))  # type: ignore
+        if res.error is not None:
+            # Arguments are passed without being copied into this context, errors reported against them belong to it
+            for arg in args:
+                if res.error.context is arg.context:
+                    res.error.context = exec_ctx
         if res.should_return():
             return res
         assert return_value is not None
@@ -128,7 +139,7 @@ class BuiltInFunction(BaseFunction):
                     ret = int(val.parent_class.instance_class.__len__())  # type: ignore
                 else:
                     raise TypeError()
-                return RTResult[Value]().success(Number(ret))
+                return RTResult[Value]().success(Number.of(ret))
             raise TypeError()
         except (TypeError, AttributeError):
             try:
@@ -172,7 +183,7 @@ class BuiltInFunction(BaseFunction):
                 break
             except ValueError:
                 print(f"'{text}' must be an integer. Try again!")
-        return RTResult[Value]().success(Number(number))
+        return RTResult[Value]().success(Number.of(number))
 
     @args([])
     def execute_clear(self, exec_ctx: Context) -> RTResult[Value]:
@@ -230,7 +241,7 @@ class BuiltInFunction(BaseFunction):
         array.elements.append(value)
         return RTResult[Value]().success(Null.null())
 
-    @args(["array", "index"], [None, Number(-1)])
+    @args(["array", "index"], [None, Number.of(-1)])
     def execute_arr_pop(self, exec_ctx: Context) -> RTResult[Value]:
         array = exec_ctx.symbol_table.get("array")
         index = exec_ctx.symbol_table.get("index")
@@ -246,7 +257,7 @@ class BuiltInFunction(BaseFunction):
             )
 
         try:
-            element = array.elements.pop(int(index.value))
+            element = array.mutable_elements().pop(int(index.value))
         except Exception:
             return RTResult[Value]().failure(
                 RTError(
@@ -327,7 +338,7 @@ class BuiltInFunction(BaseFunction):
         if not isinstance(array_, Array):
             return RTResult[Value]().failure(RTError(self.pos_start, self.pos_end, "Argument must be array", exec_ctx))
 
-        return RTResult[Value]().success(Number(len(array_.elements)))
+        return RTResult[Value]().success(Number.of(len(array_.elements)))
 
     @args(["string"])
     def execute_str_len(self, exec_ctx: Context) -> RTResult[Value]:
@@ -336,7 +347,7 @@ class BuiltInFunction(BaseFunction):
         if not isinstance(string, String):
             return RTResult[Value]().failure(RTError(self.pos_start, self.pos_end, "Argument must be string", exec_ctx))
 
-        return RTResult[Value]().success(Number(len(string.value)))
+        return RTResult[Value]().success(Number.of(len(string.value)))
 
     @args(["string", "value"])
     def execute_str_find(self, exec_ctx: Context) -> RTResult[Value]:
@@ -354,7 +365,7 @@ class BuiltInFunction(BaseFunction):
             )
 
         try:
-            return RTResult[Value]().success(Number(string.value.find(value.value)))
+            return RTResult[Value]().success(Number.of(string.value.find(value.value)))
         except Exception:
             return RTResult[Value]().failure(RTError(self.pos_start, self.pos_end, "Could't find that index", exec_ctx))
 
@@ -383,7 +394,7 @@ class BuiltInFunction(BaseFunction):
         """Convert to Integer value."""
         value = exec_ctx.symbol_table.get("value")
         try:
-            return RTResult[Value]().success(Number(int(value.value)))  # type: ignore
+            return RTResult[Value]().success(Number.of(int(value.value)))  # type: ignore
         except Exception:
             return RTResult[Value]().failure(
                 RTError(self.pos_start, self.pos_end, "Could not convert to int", exec_ctx)
@@ -394,7 +405,7 @@ class BuiltInFunction(BaseFunction):
         value = exec_ctx.symbol_table.get("value")
 
         try:
-            return RTResult[Value]().success(Number(float(value.value)))  # type: ignore
+            return RTResult[Value]().success(Number.of(float(value.value)))  # type: ignore
         except Exception:
             return RTResult[Value]().failure(
                 RTError(self.pos_start, self.pos_end, "Could not convert to float", exec_ctx)
@@ -450,11 +461,11 @@ class BuiltInFunction(BaseFunction):
     def execute_time_now(self, exec_ctx: Context) -> RTResult[Value]:
         import time  # Lazy import
 
-        return RTResult[Value]().success(Number(time.time()))
+        return RTResult[Value]().success(Number.of(time.time()))
 
     @args(["obj"])
     def execute_dir(self, exec_ctx: Context) -> RTResult[Value]:
-        from core.builtin_classes.base_classes import BuiltInInstance
+        from core.builtin_classes.base_classes import BuiltInClass, BuiltInInstance
 
         obj: Module = exec_ctx.symbol_table.get("obj")  # type: ignore
 
@@ -495,8 +506,10 @@ class BuiltInFunction(BaseFunction):
             # print(type(k), type(f))
             if isinstance(f, Function):
                 functions.add(k)
-            elif isinstance(f, Class):
+            elif isinstance(f, BaseClass):
                 classes.add(k)
+            elif isinstance(f, BuiltInFunction):
+                builtin_class_functions.add(k)
             elif variable_check(f):
                 if k not in {"true", "false", "null"}:
                     variables.add(k)
@@ -510,17 +523,46 @@ class BuiltInFunction(BaseFunction):
                         functions.add(bk)
                     elif isinstance(bf, Class):
                         classes.add(bk)
-                    elif variable_check(f):
-                        if k not in {"true", "false", "null"}:
+                    elif variable_check(bf):
+                        if bk not in {"true", "false", "null"}:
                             variables.add(bk)
                     elif isinstance(bf, BuiltInFunction):
                         builtin_class_functions.add(bk)
 
+        # Operators of built-in classes are listed like the methods of the same name in classes written in Radon
+        instance_class = None
+        if isinstance(obj, BuiltInClass):
+            instance_class = obj.instance_class
+        elif isinstance(obj, BuiltInInstance):
+            instance_class = type(obj.obj)
+        if instance_class is not None:
+            builtin_class_functions.update(instance_class.__operators__)
+            if hasattr(instance_class, "__len__"):
+                builtin_class_functions.add("__len__")
+
         result: list[str] = [*sorted(variables), *sorted(functions), *sorted(classes), *sorted(builtin_class_functions)]
         string_list: list[String] = list(map(String, result))
 
         return RTResult[Value]().success(Array(string_list))  # type: ignore
 
+    @args(["module"])
+    def execute_reload(self, exec_ctx: Context) -> RTResult[Value]:
+        from core.interpreter import reload_module  # Lazy import
+
+        module = exec_ctx.symbol_table.get("module")
+        if not isinstance(module, Module):
+            return RTResult[Value]().failure(
+                RTError(self.pos_start, self.pos_end, "First argument must be a module", exec_ctx)
+            )
+
+        res = RTResult[Value]()
+        res.register(reload_module(self.pos_start, self.pos_end, exec_ctx, module))
+        if res.error is not None:
+            return res
+        if res.should_exit:
+            return res.success_exit(module)
+        return res.success(module)
+
     @args(["module"])
     def execute_require(self, exec_ctx: Context) -> RTResult[Value]:
         module_val = exec_ctx.symbol_table.get("module")
@@ -558,7 +600,7 @@ class BuiltInFunction(BaseFunction):
             )
 
         error: Error | RTError | None
-        _, error, should_exit = run(module, script)  # type: ignore
+        _, error, should_exit = run(module, script, use_cache=True)  # type: ignore
 
         if error:
             return RTResult[Value]().failure(
@@ -583,9 +625,89 @@ class BuiltInFunction(BaseFunction):
         value = ctx.symbol_table.get("value")
 
         if isinstance(value, Null):
-            return RTResult[Value]().success(Boolean(True))
+            return RTResult[Value]().success(Boolean.true())
         else:
-            return RTResult[Value]().success(Boolean(False))
+            return RTResult[Value]().success(Boolean.false())
+
+    @args(["func", "iterable"])
+    def execute_map(self, exec_ctx: Context) -> RTResult[Value]:
+        func = exec_ctx.symbol_table.get("func")
+        iterable = exec_ctx.symbol_table.get("iterable")
+        assert func is not None and iterable is not None
+
+        def mapped() -> Generator[RTResult[Value], None, None]:
+            for it_res in iterable.iter():
+                if it_res.should_return():
+                    yield it_res
+                    return
+                assert it_res.value is not None
+                res = func.execute([it_res.value], {})
+                yield res
+                if res.should_return():
+                    return
+
+        return RTResult[Value]().success(Iterator(mapped()))
+
+    @args(["func", "iterable"])
+    def execute_filter(self, exec_ctx: Context) -> RTResult[Value]:
+        func = exec_ctx.symbol_table.get("func")
+        iterable = exec_ctx.symbol_table.get("iterable")
+        assert func is not None and iterable is not None
+
+        def filtered() -> Generator[RTResult[Value], None, None]:
+            for it_res in iterable.iter():
+                if it_res.should_return():
+                    yield it_res
+                    return
+                assert it_res.value is not None
+                res = func.execute([it_res.value], {})
+                if res.should_return():
+                    yield res
+                    return
+                assert res.value is not None
+                if res.value.is_true():
+                    yield it_res
+
+        return RTResult[Value]().success(Iterator(filtered()))
+
+    @args(["start", "end", "step"], [None, Null.null(), Number.of(1)])
+    def execute_range(self, exec_ctx: Context) -> RTResult[Value]:
+        start = exec_ctx.symbol_table.get("start")
+        end = exec_ctx.symbol_table.get("end")
+        step = exec_ctx.symbol_table.get("step")
+        assert start is not None and end is not None and step is not None
+
+        if isinstance(end, Null):
+            start, end = Number.of(0), start
+        for bound in (start, end, step):
+            if not isinstance(bound, Number):
+                return RTResult[Value]().failure(
+                    RTError(bound.pos_start, bound.pos_end, "Range bounds must be numbers", exec_ctx)
+                )
+        assert isinstance(start, Number) and isinstance(end, Number) and isinstance(step, Number)
+        if step.value == 0:
+            return RTResult[Value]().failure(RTError(step.pos_start, step.pos_end, "Step cannot be zero.", exec_ctx))
+
+        return RTResult[Value]().success(
+            Range(start.value, end.value, step.value).set_pos(self.pos_start, self.pos_end).set_context(exec_ctx)
+        )
+
+    @args(["a", "b"])
+    def execute_zip(self, exec_ctx: Context) -> RTResult[Value]:
+        a = exec_ctx.symbol_table.get("a")
+        b = exec_ctx.symbol_table.get("b")
+        assert a is not None and b is not None
+
+        def zipped() -> Generator[RTResult[Value], None, None]:
+            for a_res, b_res in zip(a.iter(), b.iter()):
+                for it_res in (a_res, b_res):
+                    if it_res.should_return():
+                        yield it_res
+                        return
+                assert a_res.value is not None and b_res.value is not None
+                yield RTResult[Value]().success(Array([a_res.value, b_res.value]))
+
+        return RTResult[Value]().success(Iterator(zipped()))
 
     # Shell functions
     @args([])
@@ -639,31 +761,40 @@ def run(
     return_result: bool = False,
     hide_paths: bool = False,
     import_cwd: Optional[str] = None,
+    use_cache: bool = False,
 ) -> Union[
     tuple[None, Error, bool],
     tuple[None, InvalidSyntaxError, bool],
     tuple[None, RTResult[Value], None],
     tuple[Optional[Value], Optional[RTError | Error], bool],
 ]:
-    from core.interpreter import Interpreter  # Lazy import
+    from core.interpreter import make_interpreter  # Lazy import
 
-    # Generate tokens
+    path = fn
     fn = "[REDACTED]" if hide_paths else fn
 
-    lexer = Lexer(fn, text)
-    tokens, error = lexer.make_tokens()
-    if error:
-        return None, error, False
-
-    # Generate AST
-    parser = Parser(tokens)
-    ast = parser.parse()
-    if ast.error:
-        return None, ast.error, False
-    assert ast.node is not None
+    # Modules read from `path` can skip lexing and parsing when their AST is cached
+    node = cache.load(path, fn, text) if use_cache else None
+    if node is None:
+        # Generate tokens
+        lexer = Lexer(fn, text)
+        tokens, error = lexer.make_tokens()
+        if error:
+            return None, error, False
+
+        # Generate AST
+        parser = Parser(tokens)
+        ast = parser.parse()
+        if ast.error:
+            return None, ast.error, False
+        assert ast.node is not None
+        node = optimizer.optimize(ast.node)
+        resolve(node)
+        if use_cache:
+            cache.store(path, fn, text, node)
 
     # Run program
-    interpreter = Interpreter()
+    interpreter = make_interpreter()
     # context = Context('<program>')
     # context.symbol_table = global_symbol_table
     context = Context("<program>", context, entry_pos, import_cwd=import_cwd)
@@ -671,18 +802,40 @@ def run(
         context.symbol_table = global_symbol_table
     else:
         context.symbol_table = context.parent.symbol_table
-    result = interpreter.visit(ast.node, context)
+    result = interpreter.visit(node, context)
 
     if return_result:
         return result  # type: ignore
     return result.value, result.error, result.should_exit
 
 
-# Setting all functions to global symbol table
-def create_global_symbol_table() -> SymbolTable:
+def create_global_symbol_table(file_path: Optional[str] = None) -> SymbolTable:
+    """Return a new global scope for a module, chained to the shared builtins.
+
+    The scope of a standard library module implemented natively starts with its native classes (see `stdlib_natives`).
+    """
+    symbol_table = SymbolTable(builtins_symbol_table)
+    if file_path is not None:
+        symbol_table.symbols.update(stdlib_natives.get(os.path.realpath(file_path), {}))
+    return symbol_table
+
+
+def program_builtins() -> SymbolTable:
+    """Return the builtins of the main program, to be modified by `builtins.set` and `builtins.remove`.
+
+    The shared builtins are copied the first time, so that modules keep seeing the original ones.
+    """
+    if global_symbol_table.parent is builtins_symbol_table:
+        global_symbol_table.parent = builtins_symbol_table.copy()
+    assert global_symbol_table.parent is not None
+    return global_symbol_table.parent
+
+
+# Setting all functions to builtins symbol table
+def create_builtins_symbol_table() -> SymbolTable:
     import core.builtin_classes as bic
 
-    ret = SymbolTable()
+    ret = SymbolTable(read_only=True)
     ret.set("null", Null.null())
     ret.set("false", Boolean.false())
     ret.set("true", Boolean.true())
@@ -721,10 +874,16 @@ def create_global_symbol_table() -> SymbolTable:
     ret.set("str", BuiltInFunction("str"))
     ret.set("bool", BuiltInFunction("bool"))
     ret.set("type", BuiltInFunction("type"))
+
+    ret.set("map", BuiltInFunction("map"))
+    ret.set("filter", BuiltInFunction("filter"))
+    ret.set("range", BuiltInFunction("range"))
+    ret.set("zip", BuiltInFunction("zip"))
     # PyAPI methods (Python API)
     ret.set("pyapi", BuiltInFunction("pyapi"))
     # System methods
     ret.set("require", BuiltInFunction("require"))
+    ret.set("reload", BuiltInFunction("reload"))
     ret.set("exit", BuiltInFunction("exit"))
     ret.set("time_now", BuiltInFunction("time_now"))
     # Shell functions
@@ -736,10 +895,33 @@ def create_global_symbol_table() -> SymbolTable:
     # Built-in classes
     ret.set("File", bic.BuiltInClass("File", bic.FileObject.__doc__, bic.FileObject))
     ret.set("String", bic.BuiltInClass("String", bic.StringObject.__doc__, bic.StringObject))
+    ret.set("NumArray", bic.BuiltInClass("NumArray", bic.NumArrayObject.__doc__, bic.NumArrayObject))
+    ret.set("Set", bic.BuiltInClass("Set", bic.SetObject.__doc__, bic.SetObject))
+    ret.set(
+        "StringBuilder", bic.BuiltInClass("StringBuilder", bic.StringBuilderObject.__doc__, bic.StringBuilderObject)
+    )
     ret.set("Json", bic.BuiltInClass("Json", bic.JSONObject.__doc__, bic.JSONObject))
     ret.set("Requests", bic.BuiltInClass("Requests", bic.RequestsObject.__doc__, bic.RequestsObject))
     ret.set("builtins", bic.BuiltInClass("builtins", bic.BuiltinsObject.__doc__, bic.BuiltinsObject))
     return ret
 
 
+def create_stdlib_natives() -> dict[str, dict[str, Value]]:
+    """Return the native classes of the standard library modules implemented natively, by the real path of the module"""
+    import core.builtin_classes as bic
+
+    def stdlib_path(module: str) -> str:
+        return os.path.realpath(os.path.join(BASE_DIR, "stdlib", f"{module}.rn"))
+
+    return {
+        stdlib_path("array"): {"Array": bic.BuiltInClass("Array", bic.ArrayObject.__doc__, bic.ArrayObject)},
+        stdlib_path("string"): {
+            "String": bic.BuiltInClass("String", bic.StringModuleObject.__doc__, bic.StringModuleObject)
+        },
+    }
+
+
+# Builtins shared by the global scopes of all modules, they are never modified in place (see `program_builtins`)
+builtins_symbol_table = create_builtins_symbol_table()
+stdlib_natives = create_stdlib_natives()
 global_symbol_table = create_global_symbol_table()
@@ -0,0 +1,105 @@
+"""On-disk cache of parsed modules, kept in `__rncache__` directories next to the modules like `__pycache__`"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import stat
+from typing import Any, Optional
+
+from core import nodes, tokens
+from core.nodes import Node
+
+CACHE_DIR = "__rncache__"
+# Bump whenever the pickled AST changes shape, e.g. when nodes gain attributes, or the optimizer changes what it folds
+CACHE_FORMAT = 9
+
+# Set to False to always re-parse modules (`radon.py --no-cache`)
+enabled = True
+
+
+def cache_key(fn: str, text: str) -> str:
+    """Key of a parsed module, changing with its source, its display name, the interpreter version and optimizer"""
+    from core import __version__, optimizer  # Lazy import
+
+    key = f"{__version__}\0{CACHE_FORMAT}\0{optimizer.enabled}\0{fn}\0{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def cache_file(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, CACHE_DIR, f"{name}c")
+
+
+class NodeUnpickler(pickle.Unpickler):
+    """Unpickler of ASTs, which refuses to load anything but nodes and tokens.
+
+    Unpickling may call any function a pickle names, so a planted cache file could otherwise run arbitrary code when
+    the module next to it is imported.
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == nodes.__name__ and isinstance(getattr(nodes, name, None), type):
+            return getattr(nodes, name)
+        if module == tokens.__name__ and name in ("Token", "Position"):
+            return getattr(tokens, name)
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a cached AST")
+
+
+def trusted(path: str, file: str) -> bool:
+    """Whether the cache `file` belongs to the owner of the module at `path`, and only they can change it"""
+    cache_stat = os.stat(file)
+    if cache_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return False
+    return cache_stat.st_uid == os.stat(path).st_uid
+
+
+def load(path: str, fn: str, text: str) -> Optional[Node]:
+    """Return the cached AST of the module at `path`, or None if it is missing, out of date or not trusted"""
+    if not enabled:
+        return None
+    try:
+        file = cache_file(path)
+        if not trusted(path, file):
+            return None
+        with open(file, "rb") as f:
+            if NodeUnpickler(f).load() != cache_key(fn, text):
+                return None
+            node: Node = NodeUnpickler(f).load()
+            return node
+    except Exception:
+        # A missing, unreadable, corrupt or refused cache is just a cache miss
+        return None
+
+
+def store(path: str, fn: str, text: str, node: Node) -> None:
+    if not enabled:
+        return
+    file = cache_file(path)
+    tmp_file = f"{file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(tmp_file, "wb") as f:
+            pickle.dump(cache_key(fn, text), f)
+            pickle.dump(node, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Whatever the umask, as `load` does not trust caches others can write to
+        os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, file)
+    except (OSError, pickle.PicklingError, RecursionError):
+        # Caching is best-effort, e.g. the module may live in a read-only directory
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+
+
+def clear(directories: list[str]) -> int:
+    """Remove every cache directory under `directories`, returning how many were removed"""
+    removed = 0
+    for directory in directories:
+        for root, dirs, _ in os.walk(directory):
+            if CACHE_DIR in dirs:
+                shutil.rmtree(os.path.join(root, CACHE_DIR), ignore_errors=True)
+                dirs.remove(CACHE_DIR)
+                removed += 1
+    return removed
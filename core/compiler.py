@@ -0,0 +1,393 @@
+"""Compiler from the AST to the bytecode run by `core.vm`"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, NewType, Optional, TypeAlias
+
+from core.datatypes import NUMBER_BINOPS, Boolean, Number, String
+from core.interpreter import BINOP_METHODS, KEYWORD_BINOP_METHODS
+from core.nodes import (
+    SCOPE_NEW,
+    ArrayNode,
+    AssertNode,
+    AttrAccessNode,
+    BinOpNode,
+    BooleanNode,
+    BreakNode,
+    CallNode,
+    ContinueNode,
+    DecNode,
+    ForInNode,
+    ForNode,
+    HashMapNode,
+    IfNode,
+    IncNode,
+    IndexGetNode,
+    IndexSetNode,
+    Node,
+    NumberNode,
+    ReturnNode,
+    SliceGetNode,
+    StringNode,
+    TryNode,
+    UnaryOpNode,
+    VarAccessNode,
+    VarAssignNode,
+    WhileNode,
+    YieldNode,
+)
+from core.resolver import make_lookup
+from core.tokens import TT_KEYWORD, TT_MINUS
+
+# OPCODES
+Opcode = NewType("Opcode", int)
+
+LOAD_CONST = Opcode(0)  # value -> push a value built at compile time
+LOAD_NULL = Opcode(2)  # push null
+LOAD_NAME = Opcode(3)  # (name, lookup, pos_start, pos_end) -> push the value of a variable
+STORE_NAME = Opcode(4)  # (name, node) -> assign TOS, leaving it on the stack
+BUILD_ARRAY = Opcode(5)  # (count, pos_start, pos_end) -> pop `count` values into an Array
+BUILD_HASHMAP = Opcode(6)  # count -> pop `count` key/value pairs into a HashMap
+CHECK_KEY = Opcode(7)  # key node -> fail unless TOS can be a HashMap key
+BINARY_OP = Opcode(8)  # (method name, number op, reverse, pos_start, pos_end, node)
+UNARY_OP = Opcode(9)  # (negate, pos_start, pos_end, node)
+POP_TOP = Opcode(10)
+JUMP = Opcode(11)  # target
+POP_JUMP_IF_FALSE = Opcode(12)  # target
+JUMP_IF_TRUE_OR_POP = Opcode(13)  # target
+PUSH_BLOCK = Opcode(14)  # (pos_start, scope) -> enter a block scope
+POP_BLOCK = Opcode(15)  # leave the current block scope
+CHECK_NUMBER = Opcode(16)  # (message, pos_start, pos_end) -> fail unless TOS is a Number
+SETUP_FOR = Opcode(17)  # (has_step, break target, continue target) -> pop start/end/step, push loop state
+FOR_ITER = Opcode(18)  # (name, exit target) -> advance a `for` loop
+SETUP_WHILE = Opcode(19)  # (break target, continue target) -> push loop state
+GET_ITER = Opcode(20)  # pop an iterable, push `for ... in` loop state
+FOR_IN_ITER = Opcode(21)  # (name, exit target, node) -> advance a `for ... in` loop
+LOOP_APPEND = Opcode(22)  # pop the value of one iteration into the loop state
+END_LOOP = Opcode(23)  # (has_block, should_return_null, pos_start, pos_end) -> pop loop state, push its result
+BREAK = Opcode(24)
+CONTINUE = Opcode(25)
+RETURN_VALUE = Opcode(26)  # return TOS from the function
+SETUP_TRY = Opcode(27)  # handler target
+POP_TRY = Opcode(28)
+BIND_ERROR = Opcode(29)  # name -> store the message of the handled error
+CALLEE = Opcode(30)  # (pos_start, pos_end) -> prepare TOS to be called
+CALL = Opcode(31)  # (arg count, kwarg names, node, tail), a tail call to a function returns it from the frame
+INDEX_GET = Opcode(32)  # node
+SLICE_GET = Opcode(33)  # (has_start, has_end, has_step, pos_start, pos_end, node)
+INDEX_SET = Opcode(34)  # node
+LOAD_ATTR = Opcode(35)  # (name, pos_start, pos_end)
+ASSERT_FAIL = Opcode(36)  # (node, has_message)
+INCDEC = Opcode(37)  # (name, method name, node)
+DELEGATE = Opcode(38)  # node -> evaluate a node with the tree-walking interpreter
+HALT = Opcode(39)  # end of the program, TOS is its value
+PUSH_LOOP_BLOCK = Opcode(40)  # (pos_start, scope) -> enter the block scope kept in the loop state at TOS
+YIELD = Opcode(41)  # suspend the frame, producing TOS, then push null
+
+Instruction: TypeAlias = tuple[Opcode, Any]
+
+
+@dataclass
+class Code:
+    """Compiled bytecode of a node, along with the node each instruction was generated from"""
+
+    instructions: list[Instruction] = field(default_factory=list)
+    nodes: list[Node] = field(default_factory=list)
+
+
+class Compiler:
+    """Compiles nodes into `Code` for the VM.
+
+    Every node compiles into instructions pushing exactly one value, the same value the tree-walking interpreter
+    would evaluate it to. Nodes without a `compile_*` method are delegated to the interpreter as a whole.
+    """
+
+    code: Code
+
+    def __init__(self) -> None:
+        self.code = Code()
+
+    def emit(self, op: Opcode, arg: Any, node: Node) -> int:
+        self.code.instructions.append((op, arg))
+        self.code.nodes.append(node)
+        return len(self.code.instructions) - 1
+
+    def label(self) -> int:
+        return len(self.code.instructions)
+
+    def patch(self, index: int, arg: Any) -> None:
+        op, _ = self.code.instructions[index]
+        self.code.instructions[index] = (op, arg)
+
+    def compile_program(self, node: Node) -> Code:
+        self.compile(node)
+        self.emit(HALT, None, node)
+        return self.code
+
+    def compile(self, node: Node) -> None:
+        getattr(self, f"compile_{type(node).__name__}", self.compile_delegate)(node)
+
+    def compile_block(self, node: Node, scope: int = SCOPE_NEW) -> None:
+        self.emit(PUSH_BLOCK, (node.pos_start, scope), node)
+        self.compile(node)
+        self.emit(POP_BLOCK, None, node)
+
+    def compile_loop_body(self, node: Node, scope: int) -> None:
+        if scope == SCOPE_NEW:
+            self.compile_block(node)
+            return
+        self.emit(PUSH_LOOP_BLOCK, (node.pos_start, scope), node)
+        self.compile(node)
+        self.emit(POP_BLOCK, None, node)
+
+    def emit_loop_append(self, should_return_null: bool, node: Node) -> None:
+        # Loops evaluating to null drop the value of each iteration instead of collecting it
+        self.emit(POP_TOP if should_return_null else LOOP_APPEND, None, node)
+
+    def compile_delegate(self, node: Node) -> None:
+        self.emit(DELEGATE, node, node)
+
+    ###################################
+
+    def compile_NullNode(self, node: Node) -> None:
+        self.emit(LOAD_NULL, None, node)
+
+    def compile_NumberNode(self, node: NumberNode) -> None:
+        value = node.tok.value
+        assert isinstance(value, int | float), "This could be a bug in the parser or the lexer"
+        self.emit(LOAD_CONST, Number(value).set_pos(node.pos_start, node.pos_end), node)
+
+    def compile_StringNode(self, node: StringNode) -> None:
+        value = node.tok.value
+        assert isinstance(value, str), "This could be a bug in the parser or the lexer"
+        self.emit(LOAD_CONST, String(value).set_pos(node.pos_start, node.pos_end), node)
+
+    def compile_BooleanNode(self, node: BooleanNode) -> None:
+        self.emit(LOAD_CONST, Boolean.of(node.value), node)
+
+    def compile_ArrayNode(self, node: ArrayNode) -> None:
+        if node.should_return_null:
+            for element_node in node.element_nodes:
+                self.compile(element_node)
+                self.emit(POP_TOP, None, element_node)
+            self.emit(LOAD_NULL, None, node)
+            return
+        for element_node in node.element_nodes:
+            self.compile(element_node)
+        self.emit(BUILD_ARRAY, (len(node.element_nodes), node.pos_start, node.pos_end), node)
+
+    def compile_HashMapNode(self, node: HashMapNode) -> None:
+        for key_node, value_node in node.pairs:
+            self.compile(key_node)
+            self.emit(CHECK_KEY, key_node, key_node)
+            self.compile(value_node)
+        self.emit(BUILD_HASHMAP, len(node.pairs), node)
+
+    def compile_VarAccessNode(self, node: VarAccessNode) -> None:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str), "This could be a bug in the lexer"
+        self.emit(LOAD_NAME, (var_name, make_lookup(var_name, node.depth), node.pos_start, node.pos_end), node)
+
+    def compile_VarAssignNode(self, node: VarAssignNode) -> None:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str)
+        self.compile(node.value_node)
+        self.emit(STORE_NAME, (var_name, node), node)
+
+    def compile_IncNode(self, node: IncNode) -> None:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str), "This could be a bug in the lexer"
+        self.emit(INCDEC, (var_name, "added_to", node), node)
+
+    def compile_DecNode(self, node: DecNode) -> None:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str), "This could be a bug in the lexer"
+        self.emit(INCDEC, (var_name, "subbed_by", node), node)
+
+    def compile_BinOpNode(self, node: BinOpNode) -> None:
+        # `x in y` is the only operator dispatched on its right operand
+        reverse = node.op_tok.matches(TT_KEYWORD, "in")
+        if reverse:
+            method_name = "contains"
+        elif node.op_tok.type == TT_KEYWORD:
+            assert isinstance(node.op_tok.value, str)
+            method_name = KEYWORD_BINOP_METHODS.get(node.op_tok.value, "")
+        else:
+            method_name = BINOP_METHODS.get(node.op_tok.type, "")
+        assert method_name, f"invalid binary operation: {node.op_tok}, this is probably a bug in the parser."
+
+        self.compile(node.left_node)
+        self.compile(node.right_node)
+        # Operations between two numbers skip the method, as looked up in NUMBER_BINOPS
+        number_op = None if reverse else NUMBER_BINOPS.get(method_name)
+        self.emit(BINARY_OP, (method_name, number_op, reverse, node.pos_start, node.pos_end, node), node)
+
+    def compile_UnaryOpNode(self, node: UnaryOpNode) -> None:
+        negate = node.op_tok.type == TT_MINUS
+        assert negate or node.op_tok.matches(
+            TT_KEYWORD, "not"
+        ), f"invalid unary operation: {node.op_tok}, this is probably a bug in the parser."
+
+        self.compile(node.node)
+        self.emit(UNARY_OP, (negate, node.pos_start, node.pos_end, node), node)
+
+    def compile_IfNode(self, node: IfNode) -> None:
+        end_jumps: list[int] = []
+        for (condition, expr, should_return_null), scope in zip(node.cases, node.scopes):
+            self.compile(condition)
+            next_case_jump = self.emit(POP_JUMP_IF_FALSE, None, condition)
+            self.compile_block(expr, scope)
+            if should_return_null:
+                self.emit(POP_TOP, None, expr)
+                self.emit(LOAD_NULL, None, expr)
+            end_jumps.append(self.emit(JUMP, None, node))
+            self.patch(next_case_jump, self.label())
+
+        if node.else_case is not None:
+            expr, should_return_null = node.else_case
+            self.compile_block(expr, node.scopes[-1])
+            if should_return_null:
+                self.emit(POP_TOP, None, expr)
+                self.emit(LOAD_NULL, None, expr)
+        else:
+            self.emit(LOAD_NULL, None, node)
+
+        for end_jump in end_jumps:
+            self.patch(end_jump, self.label())
+
+    def compile_ForNode(self, node: ForNode) -> None:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str), "this could be a bug in the parser"
+
+        self.compile(node.start_value_node)
+        start = node.start_value_node
+        self.emit(CHECK_NUMBER, ("Start value must be a number", start.pos_start, start.pos_end), start)
+        self.compile(node.end_value_node)
+        end = node.end_value_node
+        self.emit(CHECK_NUMBER, ("End value must be a number", end.pos_start, end.pos_end), end)
+        if node.step_value_node is not None:
+            self.compile(node.step_value_node)
+            step = node.step_value_node
+            self.emit(CHECK_NUMBER, ("Step value must be a number", step.pos_start, step.pos_end), step)
+
+        setup = self.emit(SETUP_FOR, None, node)
+        head = self.emit(FOR_ITER, None, node)
+        self.compile_loop_body(node.body_node, node.body_scope)
+        self.emit_loop_append(node.should_return_null, node)
+        self.emit(JUMP, head, node)
+
+        loop_exit = self.emit(END_LOOP, (True, node.should_return_null, node.pos_start, node.pos_end), node)
+        self.patch(setup, (node.step_value_node is not None, loop_exit, head))
+        self.patch(head, (var_name, loop_exit))
+
+    def compile_WhileNode(self, node: WhileNode) -> None:
+        setup = self.emit(SETUP_WHILE, None, node)
+        head = self.label()
+        self.compile(node.condition_node)
+        exit_jump = self.emit(POP_JUMP_IF_FALSE, None, node)
+        self.compile_loop_body(node.body_node, node.body_scope)
+        self.emit_loop_append(node.should_return_null, node)
+        self.emit(JUMP, head, node)
+
+        loop_exit = self.emit(END_LOOP, (True, node.should_return_null, node.pos_start, node.pos_end), node)
+        self.patch(setup, (loop_exit, head))
+        self.patch(exit_jump, loop_exit)
+
+    def compile_ForInNode(self, node: ForInNode) -> None:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str), "This could be a bug in the lexer"
+
+        # `break` and `continue` in the body of a `for ... in` apply to the enclosing loop, so unlike `for` and
+        # `while` it does not set up a loop block
+        self.compile(node.iterable_node)
+        self.emit(GET_ITER, None, node)
+        head = self.emit(FOR_IN_ITER, None, node)
+        self.compile(node.body_node)
+        self.emit_loop_append(node.should_return_null, node)
+        self.emit(JUMP, head, node)
+
+        loop_exit = self.emit(END_LOOP, (False, node.should_return_null, node.pos_start, node.pos_end), node)
+        self.patch(head, (var_name, loop_exit, node))
+
+    def compile_BreakNode(self, node: BreakNode) -> None:
+        self.emit(BREAK, None, node)
+
+    def compile_ContinueNode(self, node: ContinueNode) -> None:
+        self.emit(CONTINUE, None, node)
+
+    def compile_ReturnNode(self, node: ReturnNode) -> None:
+        if node.tail_call:
+            assert isinstance(node.node_to_return, CallNode)
+            self.compile_CallNode(node.node_to_return, tail=True)
+        elif node.node_to_return is not None:
+            self.compile(node.node_to_return)
+        else:
+            self.emit(LOAD_NULL, None, node)
+        self.emit(RETURN_VALUE, None, node)
+
+    def compile_YieldNode(self, node: YieldNode) -> None:
+        if node.node_to_yield is not None:
+            self.compile(node.node_to_yield)
+        else:
+            self.emit(LOAD_NULL, None, node)
+        self.emit(YIELD, None, node)
+
+    def compile_TryNode(self, node: TryNode) -> None:
+        setup = self.emit(SETUP_TRY, None, node)
+        self.compile(node.try_block)
+        self.emit(POP_TOP, None, node)
+        self.emit(POP_TRY, None, node)
+        end_jump = self.emit(JUMP, None, node)
+
+        self.patch(setup, self.label())
+        self.emit(BIND_ERROR, str(node.exc_iden.value), node)
+        self.compile(node.catch_block)
+        self.emit(POP_TOP, None, node)
+
+        self.patch(end_jump, self.label())
+        self.emit(LOAD_NULL, None, node)
+
+    def compile_CallNode(self, node: CallNode, tail: bool = False) -> None:
+        self.compile(node.node_to_call)
+        self.emit(CALLEE, (node.pos_start, node.pos_end), node)
+        for arg_node in node.arg_nodes:
+            self.compile(arg_node)
+        for kwarg_node in node.kwarg_nodes.values():
+            self.compile(kwarg_node)
+        kwarg_names = tuple(node.kwarg_nodes.keys())
+        self.emit(CALL, (len(node.arg_nodes), kwarg_names, node, tail), node)
+
+    def compile_IndexGetNode(self, node: IndexGetNode) -> None:
+        self.compile(node.indexee)
+        self.compile(node.index)
+        self.emit(INDEX_GET, node, node)
+
+    def compile_SliceGetNode(self, node: SliceGetNode) -> None:
+        self.compile(node.indexee)
+        indices: list[Optional[Node]] = [node.index_start, node.index_end, node.index_step]
+        for index in indices:
+            if index is not None:
+                self.compile(index)
+        has_start, has_end, has_step = (index is not None for index in indices)
+        self.emit(SLICE_GET, (has_start, has_end, has_step, node.pos_start, node.pos_end, node), node)
+
+    def compile_IndexSetNode(self, node: IndexSetNode) -> None:
+        self.compile(node.indexee)
+        self.compile(node.index)
+        self.compile(node.value)
+        self.emit(INDEX_SET, node, node)
+
+    def compile_AttrAccessNode(self, node: AttrAccessNode) -> None:
+        attr_name = node.attr_name_tok.value
+        assert isinstance(attr_name, str), "This could be a bug in the lexer"
+        self.compile(node.node_to_access)
+        self.emit(LOAD_ATTR, (attr_name, node.pos_start, node.pos_end), node)
+
+    def compile_AssertNode(self, node: AssertNode) -> None:
+        self.compile(node.condition)
+        end_jump = self.emit(JUMP_IF_TRUE_OR_POP, None, node)
+        if node.message is not None:
+            self.compile(node.message)
+        self.emit(ASSERT_FAIL, (node, node.message is not None), node)
+        self.patch(end_jump, self.label())
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import inspect
+import math
+import sys
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Generator
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Generator
 from typing import Iterator as PyIterator
 from typing import Optional, TypeAlias, TypeVar
 
 from core.colortools import Log
-from core.errors import Error, RNIndexError, RNKeyError, RNNameError, RTError
+from core.errors import Error, RNIndexError, RNKeyError, RNNameError, RNRecursionError, RTError
 from core.nodes import NullNode
-from core.parser import Context, RTResult, SymbolTable
+from core.parser import FLAG_TAIL_CALL, Context, RTResult, SymbolTable
 from core.tokens import STDLIBS, Position
 
 if TYPE_CHECKING:
@@ -20,9 +23,19 @@ if TYPE_CHECKING:
 # ResultTuple: TypeAlias = "tuple[None, Error] | tuple[Value, None]"
 ResultTuple: TypeAlias = tuple[Optional["Value"], Optional[Error]]
 
+# What a value is stored as when it is a HashMap key: strings and numbers as their Python value, anything else as a Key
+HashKey: TypeAlias = "str | int | float | Key"
+
 
 ClassInstance: TypeAlias = Any
 
+# Position and context of values that have not been given one. Shared by all of them rather than allocated for every
+# value, as most values are either positioned right away or never end up in an error message.
+UNSET_POSITION = Position(0, 0, 0, "<unset>", "<unset>")
+UNSET_CONTEXT = Context("<unset>")
+# Position of the values made for the keys of a HashMap when iterating over it
+HASHMAP_KEY_POSITION = Position(0, 0, 0, "<hashmap key>", "<native code>")
+
 
 def generate_help_docs(obj: ClassInstance) -> str:
     """Generate help() docs for any class instance."""
@@ -50,21 +63,24 @@ def generate_help_docs(obj: ClassInstance) -> str:
 
 
 class Value:
+    __slots__ = ("pos_start", "pos_end", "context")
+
     pos_start: Position
     pos_end: Position
     context: Context
 
     def __init__(self) -> None:
-        self.set_pos()
-        self.set_context()
+        self.pos_start = UNSET_POSITION
+        self.pos_end = UNSET_POSITION
+        self.context = UNSET_CONTEXT
 
     def set_pos(self: Self, pos_start: Optional[Position] = None, pos_end: Optional[Position] = None) -> Self:
-        self.pos_start = pos_start if pos_start is not None else Position(0, 0, 0, "<unset>", "<unset>")
-        self.pos_end = pos_end if pos_end is not None else Position(0, 0, 0, "<unset>", "<unset>")
+        self.pos_start = pos_start if pos_start is not None else UNSET_POSITION
+        self.pos_end = pos_end if pos_end is not None else UNSET_POSITION
         return self
 
     def set_context(self: Self, context: Optional[Context] = None) -> Self:
-        self.context = context if context is not None else Context("<unset>")
+        self.context = context if context is not None else UNSET_CONTEXT
         return self
 
     def added_to(self, other: Value) -> ResultTuple:
@@ -142,6 +158,10 @@ class Value:
     def is_true(self) -> bool:
         return False
 
+    def hash_key(self) -> tuple[Optional[HashKey], Optional[Error]]:
+        """Return what this value is stored as when it is a HashMap key"""
+        return None, RTError(self.pos_start, self.pos_end, f"Unhashable value: '{self!r}'", self.context)
+
     # Help text for help() in radon
     def __help_repr__(self) -> str:
         return generate_help_docs(self)
@@ -166,19 +186,68 @@ class Value:
             return RTError(self.pos_start, self.pos_end, f"Illegal operation for {self}", self.context)
 
 
+class KeyComparisonError(Exception):
+    """Raised out of a dict lookup when comparing two HashMap keys failed"""
+
+    def __init__(self, error: Error) -> None:
+        super().__init__(error.details)
+        self.error = error
+
+
+class Key:
+    """A HashMap key that is neither a string nor a number, hashed and compared through its value.
+
+    Instances are hashed by their `__hash__` and compared by their `__eq__`, which is only called when two hashes are
+    equal. Booleans and null only equal themselves.
+    """
+
+    __slots__ = ("value", "hash")
+
+    def __init__(self, value: Value, hash_: int) -> None:
+        self.value = value
+        self.hash = hash_
+
+    def __hash__(self) -> int:
+        return self.hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Key):
+            return NotImplemented
+        if self.value is other.value:
+            return True
+        if isinstance(self.value, BaseInstance):
+            cmp, error = self.value.get_comparison_eq(other.value)
+            if error is not None:
+                raise KeyComparisonError(error)
+            assert cmp is not None
+            return cmp.is_true()
+        return type(self.value) is type(other.value) and self.value.is_true() == other.value.is_true()
+
+    def __repr__(self) -> str:
+        return repr(self.value)
+
+
 class Iterator(Value):
     """An Iterator is an object that enables traversal over a collection, one element at a time."""
 
+    __slots__ = ("it",)
+
     def __init__(self, generator: Generator[RTResult[Value], None, None]) -> None:
         super().__init__()
         self.it = generator
 
     def __len__(self) -> int:
-        return len(list(self.it))
+        # Counting runs through the elements, which are kept so that the iterator can still be iterated afterwards
+        elements = list(self.it)
+        self.it = (element for element in elements)
+        return len(elements)
 
     def iter(self) -> Iterator:
         return self
 
+    def gen(self) -> Generator[RTResult[Value], None, None]:
+        yield from self.it
+
     def __iter__(self) -> Iterator:
         return self
 
@@ -202,7 +271,132 @@ An Iterator is an object that enables traversal over a collection, one element a
         return Iterator(self.it)
 
 
+def int_range(start: int | float, end: int | float, step: int | float) -> Optional[range]:
+    """Return the Python range counting from `start` up to `end` by `step`, or None unless they are integers and
+    `step` is not 0"""
+    if type(start) is int and type(end) is int and type(step) is int and step != 0:
+        return range(start, end, step)
+    return None
+
+
+def float_steps(start: int | float, end: int | float, step: int | float) -> Generator[int | float, None, None]:
+    """Count from `start` up to `end` by adding `step`, as `for` loops do when their bounds are not all integers"""
+    i = start
+    while i < end if step >= 0 else i > end:
+        yield i
+        i += step
+
+
+class Range(Value):
+    """The numbers from `start` up to, but not including, `end`, counting by `step`.
+
+    They are computed when they are needed, the i-th being `start + i * step`, so that a range takes the same memory
+    whatever its length, and its length, indexing and `in` take constant time.
+    """
+
+    __slots__ = ("start", "end", "step")
+
+    start: int | float
+    end: int | float
+    step: int | float
+
+    def __init__(self, start: int | float, end: int | float, step: int | float = 1) -> None:
+        super().__init__()
+        self.start = start
+        self.end = end
+        self.step = step
+
+    def ints(self) -> Optional[range]:
+        """Return the Python range of the same numbers, or None if they are not all integers"""
+        return int_range(self.start, self.end, self.step)
+
+    def number_at(self, i: int) -> int | float:
+        # The start as is, so that a range counting from 0 by 0.5 starts with 0 like the same `for` loop does
+        return self.start + i * self.step if i != 0 else self.start
+
+    def gen(self) -> Generator[RTResult[Value], None, None]:
+        ints = self.ints()
+        for n in ints if ints is not None else map(self.number_at, range(len(self))):
+            yield RTResult[Value]().success(Number.of(n))
+
+    def get_index(self, index: Value) -> ResultTuple:
+        if not isinstance(index, Number):
+            return None, self.illegal_operation(index)
+        i = int(index.value)
+        length = len(self)
+        if i < 0:
+            i += length
+        if not 0 <= i < length:
+            return None, RNIndexError(index.pos_start, index.pos_end, "Range index out of range", self.context)
+        return Number.of(self.number_at(i)), None
+
+    def contains(self, other: Value) -> ResultTuple:
+        if not isinstance(other, Number):
+            return Boolean.false(), None
+        ints = self.ints()
+        if ints is not None and type(other.value) is int:
+            return Boolean.of(other.value in ints), None
+        offset = (other.value - self.start) / self.step
+        if not math.isfinite(offset):
+            return Boolean.false(), None
+        i = round(offset)
+        return Boolean.of(0 <= i < len(self) and self.number_at(i) == other.value), None
+
+    def get_comparison_eq(self, other: Value) -> ResultTuple:
+        if not isinstance(other, Range):
+            return None, Value.illegal_operation(self, other)
+        # Like Python's, two ranges are equal when they have the same numbers, whatever their bounds
+        length = len(self)
+        if length != len(other):
+            return Boolean.false(), None
+        return Boolean.of(length == 0 or (self.start == other.start and (length == 1 or self.step == other.step))), None
+
+    def get_comparison_ne(self, other: Value) -> ResultTuple:
+        ret, error = self.get_comparison_eq(other)
+        if error is not None:
+            return None, error
+        assert ret is not None
+        return Boolean.of(not ret.is_true()), None
+
+    def is_true(self) -> bool:
+        return len(self) > 0
+
+    def __len__(self) -> int:
+        ints = self.ints()
+        if ints is not None:
+            return len(ints)
+        return max(0, math.ceil((self.end - self.start) / self.step))
+
+    def copy(self) -> Range:
+        copy = Range(self.start, self.end, self.step)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __repr__(self) -> str:
+        bounds = [self.start, self.end] + ([self.step] if self.step != 1 else [])
+        return f"range({', '.join(str(bound) for bound in bounds)})"
+
+    def __help_repr__(self) -> str:
+        return """
+Range
+
+A Range is the numbers from a start up to, but not including, an end, counting by a step. They are computed when
+they are needed, so a range takes the same memory whatever its length.
+
+Methods:
+    len(range)     -> Returns the number of numbers in the range.
+
+Example: range(0, 10, 2)
+"""
+
+
 class Number(Value):
+    __slots__ = ("value",)
+
     value: int | float
 
     def __init__(self, value: int | float) -> None:
@@ -211,7 +405,7 @@ class Number(Value):
 
     def added_to(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context), None
+            return Number.of(self.value + other.value).set_context(self.context), None
         elif isinstance(other, String):
             return String(str(self.value) + other.value).set_context(self.context), None
         else:
@@ -219,13 +413,13 @@ class Number(Value):
 
     def subbed_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context), None
+            return Number.of(self.value - other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def multed_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(self.value * other.value).set_context(self.context), None
+            return Number.of(self.value * other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
@@ -234,7 +428,7 @@ class Number(Value):
             if other.value == 0:
                 return None, RTError(other.pos_start, other.pos_end, "Division by zero", self.context)
 
-            return Number(self.value / other.value).set_context(self.context), None
+            return Number.of(self.value / other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
@@ -242,76 +436,76 @@ class Number(Value):
         if isinstance(other, Number):
             if other.value == 0:
                 return None, RTError(other.pos_start, other.pos_end, "Division by zero", self.context)
-            return Number(int(self.value // other.value)).set_context(self.context), None
+            return Number.of(int(self.value // other.value)).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def powed_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(self.value**other.value).set_context(self.context), None
+            return Number.of(self.value**other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def modded_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(self.value % other.value).set_context(self.context), None
+            return Number.of(self.value % other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_eq(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Boolean(self.value == other.value).set_context(self.context), None
+            return Boolean.of(self.value == other.value).set_context(self.context), None
         elif isinstance(other, String):
-            return Boolean(False).set_context(self.context), None
+            return Boolean.false().set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_ne(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Boolean(self.value != other.value).set_context(self.context), None
+            return Boolean.of(self.value != other.value).set_context(self.context), None
         elif isinstance(other, String):
-            return Boolean(True).set_context(self.context), None
+            return Boolean.true().set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_lt(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Boolean(self.value < other.value).set_context(self.context), None
+            return Boolean.of(self.value < other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_gt(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Boolean(self.value > other.value).set_context(self.context), None
+            return Boolean.of(self.value > other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_lte(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Boolean(self.value <= other.value).set_context(self.context), None
+            return Boolean.of(self.value <= other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_gte(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Boolean(self.value >= other.value).set_context(self.context), None
+            return Boolean.of(self.value >= other.value).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def anded_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(int(self.value and other.value)).set_context(self.context), None
+            return Number.of(int(self.value and other.value)).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def ored_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            return Number(int(self.value or other.value)).set_context(self.context), None
+            return Number.of(int(self.value or other.value)).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def notted(self) -> ResultTuple:
-        return Number(1 if self.value == 0 else 0).set_context(self.context), None
+        return Number.of(1 if self.value == 0 else 0).set_context(self.context), None
 
     def copy(self) -> Number:
         copy = Number(self.value)
@@ -322,6 +516,9 @@ class Number(Value):
     def is_true(self) -> bool:
         return self.value != 0
 
+    def hash_key(self) -> tuple[Optional[HashKey], Optional[Error]]:
+        return self.value, None
+
     def __str__(self) -> str:
         return str(self.value)
 
@@ -346,10 +543,26 @@ Example: 25
 
     @classmethod
     def one(cls) -> Number:
-        return cls(1)
+        return SMALL_INTS[1 - SMALL_INT_MIN]
+
+    @staticmethod
+    def of(value: int | float) -> Number:
+        """Return a Number of `value`, which is shared by the whole process for small integers"""
+        if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+            return SMALL_INTS[value - SMALL_INT_MIN]
+        return Number(value)
+
+
+# Numbers are immutable, so like Python the interpreter keeps one of each small integer instead of allocating them
+# for every counter, index and comparison
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+SMALL_INTS = [Number(i) for i in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
 
 
 class Boolean(Value):
+    __slots__ = ("value",)
+
     value: bool
 
     def __init__(self, value: bool) -> None:
@@ -357,35 +570,35 @@ class Boolean(Value):
         self.value = value
 
     def anded_by(self, other: Value) -> ResultTuple:
-        return Boolean(self.value and other.is_true()).set_context(self.context), None
+        return Boolean.of(self.value and other.is_true()).set_context(self.context), None
 
     def ored_by(self, other: Value) -> ResultTuple:
-        return Boolean(self.value or other.is_true()).set_context(self.context), None
+        return Boolean.of(self.value or other.is_true()).set_context(self.context), None
 
     def notted(self) -> ResultTuple:
-        return Boolean(not self.value).set_context(self.context), None
+        return Boolean.of(not self.value).set_context(self.context), None
 
     def get_comparison_eq(self, other: Value) -> ResultTuple:
         if isinstance(other, Boolean):
-            return Boolean(self.value == other.value).set_context(self.context), None
+            return Boolean.of(self.value == other.value).set_context(self.context), None
         elif isinstance(other, Number):
-            return Boolean(self.value == other.value).set_context(self.context), None
+            return Boolean.of(self.value == other.value).set_context(self.context), None
         elif isinstance(other, String):
-            return Boolean(False).set_context(self.context), None
+            return Boolean.false().set_context(self.context), None
         elif isinstance(other, Array):
-            return Boolean(False).set_context(self.context), None
+            return Boolean.false().set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_ne(self, other: Value) -> ResultTuple:
         if isinstance(other, Boolean):
-            return Boolean(self.value != other.value).set_context(self.context), None
+            return Boolean.of(self.value != other.value).set_context(self.context), None
         elif isinstance(other, Number):
-            return Boolean(self.value != other.value).set_context(self.context), None
+            return Boolean.of(self.value != other.value).set_context(self.context), None
         elif isinstance(other, String):
-            return Boolean(True).set_context(self.context), None
+            return Boolean.true().set_context(self.context), None
         elif isinstance(other, Array):
-            return Boolean(True).set_context(self.context), None
+            return Boolean.true().set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
@@ -398,6 +611,9 @@ class Boolean(Value):
     def is_true(self) -> bool:
         return self.value
 
+    def hash_key(self) -> tuple[Optional[HashKey], Optional[Error]]:
+        return Key(self, hash(self.value)), None
+
     def __len__(self) -> int:
         return 1 if self.value else 0
 
@@ -422,14 +638,45 @@ Example: true
 
     @classmethod
     def true(cls) -> Boolean:
-        return cls(True)
+        return TRUE
 
     @classmethod
     def false(cls) -> Boolean:
-        return cls(False)
+        return FALSE
+
+    @staticmethod
+    def of(value: bool) -> Boolean:
+        return TRUE if value else FALSE
+
+
+TRUE = Boolean(True)
+FALSE = Boolean(False)
+
+NumberOp: TypeAlias = Callable[[int | float, int | float], Optional[Value]]
+
+# Binary operations between two Numbers, by the name of the method implementing them, computed straight from their
+# values without the type checks and result tuples of the methods. They must agree with the methods, and return None
+# to leave the cases the methods report as errors (division by zero) to them.
+NUMBER_BINOPS: dict[str, NumberOp] = {
+    "added_to": lambda a, b: Number.of(a + b),
+    "subbed_by": lambda a, b: Number.of(a - b),
+    "multed_by": lambda a, b: Number.of(a * b),
+    "dived_by": lambda a, b: Number.of(a / b) if b != 0 else None,
+    "idived_by": lambda a, b: Number.of(int(a // b)) if b != 0 else None,
+    "modded_by": lambda a, b: Number.of(a % b) if b != 0 else None,
+    "powed_by": lambda a, b: Number.of(a**b),
+    "get_comparison_eq": lambda a, b: Boolean.of(a == b),
+    "get_comparison_ne": lambda a, b: Boolean.of(a != b),
+    "get_comparison_lt": lambda a, b: Boolean.of(a < b),
+    "get_comparison_gt": lambda a, b: Boolean.of(a > b),
+    "get_comparison_lte": lambda a, b: Boolean.of(a <= b),
+    "get_comparison_gte": lambda a, b: Boolean.of(a >= b),
+}
 
 
 class String(Value):
+    __slots__ = ("value",)
+
     value: str
 
     def __init__(self, value: str) -> None:
@@ -452,21 +699,21 @@ class String(Value):
 
     def get_comparison_eq(self, other: Value) -> ResultTuple:
         if isinstance(other, String):
-            return Boolean(self.value == other.value).set_context(self.context), None
+            return Boolean.of(self.value == other.value).set_context(self.context), None
         elif isinstance(other, Array):
-            return Boolean(False).set_context(self.context), None
+            return Boolean.false().set_context(self.context), None
         elif isinstance(other, Number):
-            return Boolean(False).set_context(self.context), None
+            return Boolean.false().set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_ne(self, other: Value) -> ResultTuple:
         if isinstance(other, String):
-            return Boolean(self.value != other.value).set_context(self.context), None
+            return Boolean.of(self.value != other.value).set_context(self.context), None
         elif isinstance(other, Array):
-            return Boolean(True).set_context(self.context), None
+            return Boolean.true().set_context(self.context), None
         elif isinstance(other, Number):
-            return Boolean(True).set_context(self.context), None
+            return Boolean.true().set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
@@ -514,20 +761,24 @@ class String(Value):
             return None, self.illegal_operation(index)
         if not isinstance(value, String):
             return None, self.illegal_operation(value)
+        # Strings are immutable, the variable holding this one is left unchanged
         try:
-            self.value = self.value[: int(index.value)] + value.value + self.value[int(index.value + 1) :]
+            new_value = self.value[: int(index.value)] + value.value + self.value[int(index.value + 1) :]
         except IndexError:
             return None, RNIndexError(index.pos_start, index.pos_end, "String index out of range", self.context)
-        return self, None
+        return String(new_value).set_context(self.context), None
 
     def contains(self, other: Value) -> ResultTuple:
         if not isinstance(other, String):
             return None, self.illegal_operation(other)
-        return Boolean(other.value in self.value), None
+        return Boolean.of(other.value in self.value), None
 
     def is_true(self) -> bool:
         return len(self.value) > 0
 
+    def hash_key(self) -> tuple[Optional[HashKey], Optional[Error]]:
+        return self.value, None
+
     def copy(self) -> String:
         copy = String(self.value)
         copy.set_pos(self.pos_start, self.pos_end)
@@ -572,24 +823,68 @@ Example: "Hello World!"
 
 
 class Array(Value):
+    """An array, with value semantics: `+`, `-` and `*` make a new array and never change their operands.
+
+    So that `arr = arr + [x]` in a loop doesn't copy the whole array every time, `+` hands the list of elements over to
+    the new array and appends to it there. The old array keeps reading the first `length` elements of that list,
+    which appending never changes, and only copies them if it is used again. The new array copies the list before
+    changing it in any other way while the old one may still read it (see `mutable_elements`).
+    """
+
+    __slots__ = ("_elements", "length", "shared")
+
+    # None unless this array handed its elements over, then how many of them are this array's
+    length: Optional[int]
+    # Whether an older array may still read the first elements of this array's list
+    shared: bool
+
     def __init__(self, elements: list[Value]) -> None:
         super().__init__()
-        self.elements = elements
+        self._elements = elements
+        self.length = None
+        self.shared = False
+
+    @property
+    def elements(self) -> list[Value]:
+        if self.length is not None:
+            self._elements = self._elements[: self.length]
+            self.length = None
+        return self._elements
+
+    @elements.setter
+    def elements(self, elements: list[Value]) -> None:
+        self._elements = elements
+        self.length = None
+        self.shared = False
+
+    def mutable_elements(self) -> list[Value]:
+        """Return the elements, copied first if changing them in place could change another array"""
+        elements = self.elements
+        if self.shared:
+            elements = self.elements = list(elements)
+        return elements
+
+    def new(self, elements: list[Value]) -> Array:
+        return Array(elements).set_pos(self.pos_start, self.pos_end).set_context(self.context)
 
     def added_to(self, other: Value) -> ResultTuple:
-        new_array = self.copy()
+        elements = self.elements
+        length = len(elements)
         if isinstance(other, Array):
-            new_array.elements.extend(other.elements)
+            elements.extend(other.elements)
         else:
-            new_array.elements.append(other)
+            elements.append(other)
+        self.length = length
+        new_array = self.new(elements)
+        new_array.shared = True
         return new_array, None
 
     def subbed_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Number):
-            new_array = self.copy()
+            elements = list(self.elements)
             try:
-                new_array.elements.pop(int(other.value))
-                return new_array, None
+                elements.pop(int(other.value))
+                return self.new(elements), None
             except Exception:
                 return None, RTError(
                     other.pos_start,
@@ -602,13 +897,9 @@ class Array(Value):
 
     def multed_by(self, other: Value) -> ResultTuple:
         if isinstance(other, Array):
-            new_array = self.copy()
-            new_array.elements.extend(other.elements)
-            return new_array, None
+            return self.new(self.elements + other.elements), None
         elif isinstance(other, Number):
-            new_array = self.copy()
-            new_array.elements *= int(other.value)
-            return new_array, None
+            return self.new(self.elements * int(other.value)), None
         else:
             return None, Value.illegal_operation(self, other)
 
@@ -650,7 +941,9 @@ class Array(Value):
         return Boolean.false() if ret.is_true() else Boolean.true(), None
 
     def gen(self) -> Generator[RTResult[Value], None, None]:
-        for element in self.elements:
+        # Only the elements there when the loop starts, as `arr = arr + [x]` in its body appends to the same list
+        elements = self.elements
+        for element in islice(elements, len(elements)):
             yield RTResult[Value]().success(element)
 
     def get_index(self, index: Value) -> ResultTuple:
@@ -693,7 +986,7 @@ class Array(Value):
         if not isinstance(index, Number):
             return None, self.illegal_operation(index)
         try:
-            self.elements[int(index.value)] = value
+            self.mutable_elements()[int(index.value)] = value
         except IndexError:
             return None, RNIndexError(index.pos_start, index.pos_end, "Array index out of range", self.context)
         return self, None
@@ -714,10 +1007,7 @@ class Array(Value):
         return len(self.elements) > 0
 
     def copy(self) -> Array:
-        copy: Array = Array(self.elements)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
+        return self.new(list(self.elements))
 
     def __str__(self) -> str:
         return self.__repr__()
@@ -759,9 +1049,11 @@ Example: [1,2,3,true,"Hello World!"]
 
 
 class HashMap(Value):
-    values: dict[str, Value]
+    __slots__ = ("values",)
+
+    values: dict[HashKey, Value]
 
-    def __init__(self, values: dict[str, Value]) -> None:
+    def __init__(self, values: dict[HashKey, Value]) -> None:
         super().__init__()
         self.values = values
 
@@ -769,41 +1061,63 @@ class HashMap(Value):
         if not isinstance(other, HashMap):
             return None, self.illegal_operation(other)
 
-        new_dict = self.copy()
-        for key, value in other.values.items():
-            new_dict.values[key] = value
-
+        try:
+            new_dict = HashMap(self.values | other.values)
+        except KeyComparisonError as e:
+            return None, e.error
+        new_dict.set_pos(self.pos_start, self.pos_end)
+        new_dict.set_context(self.context)
         return new_dict, None
 
+    def key_value(self, key: HashKey) -> Value:
+        """Return the value a key of `values` was stored for"""
+        if isinstance(key, Key):
+            return key.value
+        key_as_value = String(key) if isinstance(key, str) else Number(key)
+        return key_as_value.set_pos(HASHMAP_KEY_POSITION, HASHMAP_KEY_POSITION).set_context(self.context)
+
     def gen(self) -> Generator[RTResult[Value], None, None]:
-        fake_pos = Position(0, 0, 0, "<hashmap key>", "<native code>")
         for key in self.values.keys():
-            key_as_value = String(key).set_pos(fake_pos, fake_pos).set_context(self.context)
-            yield RTResult[Value]().success(key_as_value)
+            yield RTResult[Value]().success(self.key_value(key))
 
     def get_index(self, index: Value) -> ResultTuple:
-        if not isinstance(index, String):
-            return None, self.illegal_operation(index)
+        key, error = index.hash_key()
+        if error is not None:
+            return None, error
+        assert key is not None
 
         try:
-            return self.values[index.value], None
+            return self.values[key], None
         except KeyError:
-            return None, RNKeyError(
-                self.pos_start, self.pos_end, f"Key '{index.value}' not found in HashMap", self.context
-            )
+            return None, RNKeyError(self.pos_start, self.pos_end, f"Key '{index}' not found in HashMap", self.context)
+        except KeyComparisonError as e:
+            return None, e.error
 
     def set_index(self, index: Value, value: Value) -> ResultTuple:
-        if not isinstance(index, String):
-            return None, self.illegal_operation(index)
+        key, error = index.hash_key()
+        if error is not None:
+            return None, error
+        assert key is not None
 
-        self.values[index.value] = value
+        try:
+            self.values[key] = value
+        except KeyComparisonError as e:
+            return None, e.error
 
         return self, None
 
     def contains(self, other: Value) -> ResultTuple:
+        key, error = other.hash_key()
+        if error is None:
+            try:
+                return Boolean.of(key in self.values), None
+            except KeyComparisonError as e:
+                return None, e.error
+
+        # Unhashable values may still compare equal to a key, e.g. an instance defining `__eq__` but not `__hash__`
         ret = Boolean.false()
         for val in self.values.keys():
-            cmp, err = other.get_comparison_eq(String(val))
+            cmp, err = other.get_comparison_eq(self.key_value(val))
             if err:
                 return None, err
             assert cmp is not None
@@ -819,16 +1133,19 @@ class HashMap(Value):
         if len(self.values) != len(other.values):
             return Boolean.false(), None
 
-        for key, value in self.values.items():
-            if key not in other.values:
-                return Boolean.false(), None
+        try:
+            for key, value in self.values.items():
+                if key not in other.values:
+                    return Boolean.false(), None
 
-            cmp, err = value.get_comparison_eq(other.values[key])
-            if err:
-                return None, err
-            assert cmp is not None
-            if not cmp.is_true():
-                return Boolean.false(), None
+                cmp, err = value.get_comparison_eq(other.values[key])
+                if err:
+                    return None, err
+                assert cmp is not None
+                if not cmp.is_true():
+                    return Boolean.false(), None
+        except KeyComparisonError as e:
+            return None, e.error
 
         return Boolean.true(), None
 
@@ -839,16 +1156,19 @@ class HashMap(Value):
         if len(self.values) != len(other.values):
             return Boolean.true(), None
 
-        for key, value in self.values.items():
-            if key not in other.values:
-                return Boolean.true(), None
-
-            cmp, err = value.get_comparison_ne(other.values[key])
-            if err:
-                return None, err
-            assert cmp is not None
-            if cmp.is_true():
-                return Boolean.true(), None
+        try:
+            for key, value in self.values.items():
+                if key not in other.values:
+                    return Boolean.true(), None
+
+                cmp, err = value.get_comparison_ne(other.values[key])
+                if err:
+                    return None, err
+                assert cmp is not None
+                if cmp.is_true():
+                    return Boolean.true(), None
+        except KeyComparisonError as e:
+            return None, e.error
 
         return Boolean.false(), None
 
@@ -856,7 +1176,7 @@ class HashMap(Value):
         return len(self.values)
 
     def copy(self) -> HashMap:
-        copy = HashMap(self.values)
+        copy = HashMap(dict(self.values))
         copy.set_pos(self.pos_start, self.pos_end)
         copy.set_context(self.context)
         return copy
@@ -870,6 +1190,8 @@ HashMap
 
 A HashMap is a collection of key-value pairs.
 
+Keys can be strings, numbers, booleans, null, or instances of classes defining `__hash__` and `__eq__`.
+
 Example: {"key":"value"}
 """
 
@@ -879,6 +1201,8 @@ Example: {"key":"value"}
 
 
 class Type(Value):
+    __slots__ = ("variable", "type")
+
     variable: Value
     type: str
 
@@ -904,13 +1228,13 @@ class Type(Value):
 
     def get_comparison_eq(self, other: Value) -> ResultTuple:
         if isinstance(other, Type):
-            return Boolean(self.type == other.type).set_context(self.context), None
+            return Boolean.of(self.type == other.type).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
     def get_comparison_ne(self, other: Value) -> ResultTuple:
         if isinstance(other, Type):
-            return Boolean(self.type != other.type).set_context(self.context), None
+            return Boolean.of(self.type != other.type).set_context(self.context), None
         else:
             return None, Value.illegal_operation(self, other)
 
@@ -931,7 +1255,7 @@ def radonify(value: object, pos_start: Position, pos_end: Position, context: Con
             case str():
                 return String(value)
             case int() | float():
-                return Number(value)
+                return Number.of(value)
             case None:
                 return Null.null()
             case _ if inspect.isfunction(value):
@@ -967,7 +1291,7 @@ def deradonify(value: Optional[Value]) -> str | dict[str, Any] | int | float | l
         case String():
             return str(value.value)
         case HashMap():
-            return {k: deradonify(v) for k, v in value.values.items()}
+            return {(deradonify(k.value) if isinstance(k, Key) else k): deradonify(v) for k, v in value.values.items()}
         case Number():
             return value.value
         case Array():
@@ -994,6 +1318,8 @@ def deradonify(value: Optional[Value]) -> str | dict[str, Any] | int | float | l
 class PyObj(Value):
     """Thin wrapper around a Python object"""
 
+    __slots__ = ("value",)
+
     value: object
 
     def __init__(self, value: object) -> None:
@@ -1008,6 +1334,8 @@ class PyObj(Value):
 
 
 class PyAPI(Value):
+    __slots__ = ("code",)
+
     code: str
 
     def __init__(self, code: str) -> None:
@@ -1048,6 +1376,8 @@ class PyAPI(Value):
 
 
 class BaseFunction(Value):
+    __slots__ = ("name", "symbol_table", "desc", "arg_names", "va_name")
+
     name: str
     symbol_table: Optional[SymbolTable]
     desc: str
@@ -1127,21 +1457,16 @@ class BaseFunction(Value):
             arg_name = arg_names[i]
             if i >= max_pos_args or arg_name in kwargs or i >= len(args):
                 continue
-            arg_value = args[i]
-            arg_value.set_context(exec_ctx)
-            exec_ctx.symbol_table.set(arg_name, arg_value)
+            exec_ctx.symbol_table.set(arg_name, args[i])
             populated += 1
 
         if self.va_name is not None:
             va_list: list[Value] = []
             for i in range(populated, len(args)):
-                arg = args[i]
-                arg.set_context(exec_ctx)
-                va_list.append(arg)
+                va_list.append(args[i])
             exec_ctx.symbol_table.set(self.va_name, Array(va_list))
 
         for kw, kwarg in kwargs.items():
-            kwarg.set_context(exec_ctx)
             exec_ctx.symbol_table.set(kw, kwarg)
 
     def check_and_populate_args(
@@ -1162,6 +1487,8 @@ class BaseFunction(Value):
 
 
 class BaseInstance(Value, ABC):
+    __slots__ = ("parent_class", "symbol_table")
+
     def __init__(self, parent_class: BaseClass, symbol_table: Optional[SymbolTable]):
         super().__init__()
         self.parent_class = parent_class
@@ -1173,6 +1500,10 @@ class BaseInstance(Value, ABC):
     @abstractmethod
     def bind_method(self, method: BaseFunction) -> RTResult[BaseFunction]: ...
 
+    def attribute_type(self, name: str) -> Optional[type[Value]]:
+        """Return the type values assigned to the attribute `name` must have, or None if it can be assigned anything"""
+        return None
+
     def added_to(self, other: Value) -> ResultTuple:
         return self.operator("__add__", other)
 
@@ -1238,11 +1569,21 @@ class BaseInstance(Value, ABC):
         assert res is not None
         return res.is_true()
 
+    def hash_key(self) -> tuple[Optional[HashKey], Optional[Error]]:
+        res, err = self.operator("__hash__")
+        if err is not None:
+            return None, err
+        if not isinstance(res, Number) or not isinstance(res.value, int):
+            return None, RTError(self.pos_start, self.pos_end, "__hash__ must return an integer", self.context)
+        return Key(self, res.value), None
+
     def copy(self: Self) -> Self:
         return self
 
 
 class Instance(BaseInstance):
+    __slots__ = ()
+
     def __init__(self, parent_class: Class) -> None:
         super().__init__(parent_class, None)
 
@@ -1299,6 +1640,8 @@ class Instance(BaseInstance):
 
 
 class BaseClass(Value, ABC):
+    __slots__ = ("name", "desc", "symbol_table")
+
     name: str
     desc: Optional[str]
     symbol_table: SymbolTable
@@ -1346,6 +1689,8 @@ class BaseClass(Value, ABC):
 
 
 class Class(BaseClass):
+    __slots__ = ()
+
     def get(self, name: str) -> Optional[Value]:
         method = self.symbol_table.symbols.get(name, None)
         if method is None:
@@ -1411,12 +1756,32 @@ class Class(BaseClass):
         return f"<class {self.name!r}>"
 
 
+# How deeply calls to Radon functions can nest before failing with a RecursionError, like Python's recursion limit
+# (`radon.py --max-recursion-depth`). Recursive tail calls replace the call they are returned from, so they do not nest.
+DEFAULT_MAX_RECURSION_DEPTH = 1000
+max_recursion_depth = DEFAULT_MAX_RECURSION_DEPTH
+call_depth = 0
+# Python frames a Radon call takes at most, with room for the nested expressions and builtins between two calls
+PYTHON_FRAMES_PER_CALL = 30
+
+
+def set_max_recursion_depth(depth: int) -> None:
+    global max_recursion_depth
+    max_recursion_depth = depth
+    # Make sure Python lets the interpreter recurse deep enough to report it as a Radon error
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), depth * PYTHON_FRAMES_PER_CALL + 1000))
+
+
 class Function(BaseFunction):
+    __slots__ = ("body_node", "defaults", "should_auto_return", "max_pos_args", "generator")
+
     body_node: Node
     arg_names: list[str]
     defaults: list[Optional[Value]]
     should_auto_return: bool
     max_pos_args: int
+    # Whether calling the function returns an iterator over what its body yields
+    generator: bool
 
     def __help_repr__(self) -> str:
         return f"Help on function {Log.deep_white(self.name, bold=True)}:\n\n{self.__help_repr_method__()}"
@@ -1449,6 +1814,7 @@ class Function(BaseFunction):
         desc: str,
         va_name: Optional[str],
         max_pos_args: int,
+        generator: bool = False,
     ) -> None:
         super().__init__(name, symbol_table)
         self.body_node = body_node
@@ -1458,31 +1824,115 @@ class Function(BaseFunction):
         self.desc = desc
         self.va_name = va_name
         self.max_pos_args = max_pos_args
+        self.generator = generator
 
     def execute(self, args: list[Value], kwargs: dict[str, Value]) -> RTResult[Value]:
-        from core.interpreter import Interpreter  # Lazy import
+        global call_depth
+        from core.interpreter import make_interpreter  # Lazy import
 
-        res = RTResult[Value]()
-        interpreter = Interpreter()
-        exec_ctx = self.generate_new_context()
+        if call_depth >= max_recursion_depth:
+            return RTResult[Value]().failure(
+                RNRecursionError(
+                    self.pos_start,
+                    self.pos_end,
+                    f"Maximum recursion depth of {max_recursion_depth} exceeded",
+                    self.context,
+                )
+            )
 
-        res.register(
-            self.check_and_populate_args(self.arg_names, args, kwargs, self.defaults, self.max_pos_args, exec_ctx)
-        )
-        if res.should_return():
-            return res
+        interpreter = make_interpreter()
+        func = self
+        call_depth += 1
+        try:
+            # Each iteration runs one function, the next one being itself again when it returns a recursive tail call
+            while True:
+                res = RTResult[Value]()
+                exec_ctx = func.generate_new_context()
+
+                res.register(
+                    func.check_and_populate_args(
+                        func.arg_names, args, kwargs, func.defaults, func.max_pos_args, exec_ctx
+                    )
+                )
+                if res.should_return():
+                    return res
+
+                if func.generator:
+                    # The body only starts running once the iterator is advanced
+                    iterator = Iterator(func.generate(exec_ctx))
+                    return res.success(iterator.set_pos(func.pos_start, func.pos_end).set_context(func.context))
+
+                try:
+                    value = res.register(interpreter.visit(func.body_node, exec_ctx))
+                except RecursionError:
+                    # Python ran out of stack before the Radon limit, e.g. on deeply nested expressions
+                    return res.failure(
+                        RNRecursionError(func.pos_start, func.pos_end, "Maximum recursion depth exceeded", func.context)
+                    )
 
-        value = res.register(interpreter.visit(self.body_node, exec_ctx))
-        if res.should_return() and res.func_return_value is None:
-            return res
+                if res.flags & FLAG_TAIL_CALL:
+                    tail_func = res.return_value
+                    assert isinstance(tail_func, Function)
+                    args, kwargs = res.tail_call_args
+                    if tail_func.body_node is func.body_node:
+                        # A recursive call takes the place of this one, as if called from where this one was
+                        func = tail_func.set_pos(func.pos_start, func.pos_end).set_context(func.context)
+                        continue
+                    # The name of this function was rebound to another one, which is called as usual so that
+                    # tracebacks keep this function
+                    return tail_func.execute(args, kwargs)
+
+                if res.should_return() and res.func_return_value is None:
+                    return res
+
+                if func.should_auto_return:
+                    ret_value = value
+                else:
+                    ret_value = res.func_return_value
+                if ret_value is None:
+                    ret_value = Null.null()
+                return res.success(ret_value)
+        finally:
+            call_depth -= 1
+
+    def generate(self, exec_ctx: Context) -> Generator[RTResult[Value], None, None]:
+        """Run the body of a generator function up to each `yield` in turn, producing the values it yields.
+
+        Only the VM can suspend a body halfway through, so it runs generator bodies whichever engine is selected.
+        """
+        global call_depth
+        from core.vm import VM  # Lazy import
+
+        frame = VM().frame(VM.code_of(self.body_node), exec_ctx)
+        while True:
+            if call_depth >= max_recursion_depth:
+                yield RTResult[Value]().failure(
+                    RNRecursionError(
+                        self.pos_start,
+                        self.pos_end,
+                        f"Maximum recursion depth of {max_recursion_depth} exceeded",
+                        self.context,
+                    )
+                )
+                return
 
-        if self.should_auto_return:
-            ret_value = value
-        else:
-            ret_value = res.func_return_value
-        if ret_value is None:
-            ret_value = Null.null()
-        return res.success(ret_value)
+            call_depth += 1
+            try:
+                value = next(frame)
+            except StopIteration as stop:
+                res: RTResult[Value] = stop.value
+                # Returning ends the iteration, anything else unwinding out of the body is passed on
+                if res.should_return() and res.func_return_value is None:
+                    yield res
+                return
+            except RecursionError:
+                yield RTResult[Value]().failure(
+                    RNRecursionError(self.pos_start, self.pos_end, "Maximum recursion depth exceeded", self.context)
+                )
+                return
+            finally:
+                call_depth -= 1
+            yield RTResult[Value]().success(value)
 
     def copy(self) -> Function:
         copy = Function(
@@ -1495,6 +1945,7 @@ class Function(BaseFunction):
             self.desc,
             self.va_name,
             self.max_pos_args,
+            self.generator,
         )
         copy.set_context(self.context)
         copy.set_pos(self.pos_start, self.pos_end)
@@ -1505,6 +1956,8 @@ class Function(BaseFunction):
 
 
 class Module(Value):
+    __slots__ = ("name", "file_path", "docs", "symbol_table")
+
     name: str
     file_path: str
     docs: str
@@ -1527,6 +1980,8 @@ class Module(Value):
 
 
 class Null(Value):
+    __slots__ = ()
+
     def __repr__(self) -> str:
         return "null"
 
@@ -1536,6 +1991,9 @@ class Null(Value):
     def is_true(self) -> bool:
         return False
 
+    def hash_key(self) -> tuple[Optional[HashKey], Optional[Error]]:
+        return Key(self, hash(None)), None
+
     def get_comparison_eq(self, other: Value) -> ResultTuple:
         if isinstance(other, Null):
             return Boolean.true(), None
@@ -1550,4 +2008,7 @@ class Null(Value):
 
     @classmethod
     def null(cls) -> Null:
-        return cls()
+        return NULL
+
+
+NULL = Null()
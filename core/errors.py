@@ -237,3 +237,13 @@ class RNNameError(Error):
     def __init__(self, pos_start: Position, pos_end: Position, details: str, context: Optional[Context] = None):
         super().__init__(pos_start, pos_end, "NameError", details, context)
         self.context = context
+
+
+class RNRecursionError(Error):
+    """Recursion Error class"""
+
+    context: Optional[Context]
+
+    def __init__(self, pos_start: Position, pos_end: Position, details: str, context: Optional[Context] = None):
+        super().__init__(pos_start, pos_end, "RecursionError", details, context)
+        self.context = context
@@ -1,6 +1,7 @@
 import os
 import sys
-from typing import Callable, NoReturn, Optional
+from functools import partial
+from typing import Callable, Iterable, NoReturn, Optional, TypeAlias
 
 from core.builtin_funcs import create_global_symbol_table, run
 from core.colortools import Log
@@ -9,15 +10,22 @@ from core.datatypes import (
     BaseClass,
     BaseFunction,
     BaseInstance,
+    Boolean,
     Class,
     Function,
+    HashKey,
     HashMap,
-    Instance,
+    KeyComparisonError,
     Module,
+    NUMBER_BINOPS,
     Null,
     Number,
     String,
+    UNSET_CONTEXT,
+    UNSET_POSITION,
     Value,
+    float_steps,
+    int_range,
 )
 from core.errors import Error, RNModuleNotFoundError, RNNameError, RTError, TryError
 from core.nodes import (
@@ -25,6 +33,7 @@ from core.nodes import (
     AssertNode,
     AttrAccessNode,
     BinOpNode,
+    BooleanNode,
     BreakNode,
     CallNode,
     ClassNode,
@@ -46,6 +55,9 @@ from core.nodes import (
     NumberNode,
     RaiseNode,
     ReturnNode,
+    SCOPE_NEW,
+    SCOPE_REUSED,
+    SCOPE_SHARED,
     SliceGetNode,
     StringNode,
     SwitchNode,
@@ -55,8 +67,10 @@ from core.nodes import (
     VarAccessNode,
     VarAssignNode,
     WhileNode,
+    YieldNode,
 )
 from core.parser import Context, RTResult, SymbolTable
+from core.resolver import make_lookup
 from core.tokens import (
     BASE_DIR,
     STDLIBS,
@@ -76,38 +90,71 @@ from core.tokens import (
     TT_POW,
     Position,
     Token,
+    TokenType,
     TokenValue,
 )
 
-
-def resolve_module(pos_start: Position, pos_end: Position, exec_ctx: Context, module_ident: str) -> RTResult[Module]:
-    res = RTResult[Module]()
-    module_name = module_ident
+# A node compiled into a closure that evaluates it in a given context
+EvalFunc: TypeAlias = Callable[[Context], RTResult[Value]]
+
+# Name of the `Value` method implementing each binary operator
+BINOP_METHODS: dict[TokenType, str] = {
+    TT_PLUS: "added_to",
+    TT_MINUS: "subbed_by",
+    TT_MUL: "multed_by",
+    TT_DIV: "dived_by",
+    TT_POW: "powed_by",
+    TT_MOD: "modded_by",
+    TT_EE: "get_comparison_eq",
+    TT_NE: "get_comparison_ne",
+    TT_LT: "get_comparison_lt",
+    TT_GT: "get_comparison_gt",
+    TT_LTE: "get_comparison_lte",
+    TT_GTE: "get_comparison_gte",
+    TT_IDIV: "idived_by",
+}
+KEYWORD_BINOP_METHODS: dict[str, str] = {"and": "anded_by", "or": "ored_by"}
+
+
+def relocate(error: Error, context: Context, *operands: tuple[Value, Node]) -> Error:
+    """Point an error reported against one of the operands of an operation at the node that operand came from.
+
+    Values are not copied when they are read, so they keep the position and context they were created with. Errors
+    an operation reports at an operand are moved onto the expression the operand was evaluated from, as seen from
+    `context`, which is where they pointed when every read made a positioned copy. Only called on failure.
+    """
+    pos_start, pos_end, error_context = error.pos_start, error.pos_end, error.context
+    # Values without a position of their own share one, so like `illegal_operation` an error starts at the first
+    # operand it could start at and ends at the last one it could end at
+    for value, node in reversed(operands):
+        if value.pos_start is pos_start:
+            error.pos_start = node.pos_start
+    for value, node in operands:
+        if value.pos_end is pos_end:
+            error.pos_end = node.pos_end
+    for value, node in operands:
+        if value.context is error_context:
+            error.context = context
+            break
+    # An error reported against a value that was never placed, like a literal shared by every evaluation, is left at
+    # the operation rather than shown as unset
+    if error.context is UNSET_CONTEXT:
+        error.context = context
+    if len(operands) > 0 and error.pos_start is UNSET_POSITION:
+        error.pos_start, error.pos_end = operands[0][1].pos_start, operands[-1][1].pos_end
+    return error
+
+
+# Modules that have been imported, keyed by the real path of their file (like Python's `sys.modules`)
+modules: dict[str, Module] = {}
+
+
+def read_module(pos_start: Position, pos_end: Position, exec_ctx: Context, module_name: str) -> RTResult[str]:
+    """Return the source of the module at `module_name`"""
+    res = RTResult[str]()
     try:
-        if module_name not in STDLIBS:
-            file_extension = module_name.split("/")[-1].split(".")[-1]
-            if file_extension != "rn":
-                module_name += ".rn"
-            # module_file = module_name.split("/")[-1]
-            module_path = os.path.dirname(os.path.realpath(module_name))
-
-            module_name = os.path.join(exec_ctx.get_import_cwd(), module_name)
-            # module_name = os.path.join(module_path, module_file)
-        else:
-            # For STDLIB modules
-            module_path = os.path.join(BASE_DIR, "stdlib")
-            module_name = os.path.join(module_path, f"{module_name}.rn")
-
         with open(module_name, "r") as f:
-            script = f.read()
-            # take the first string as the docs
-            try:
-                docs = script.split('"')[1]
-            except IndexError:
-                docs = ""
-            except Exception as e:
-                return res.failure(RTError(pos_start, pos_end, "Failed to load script docs\n" + str(e), exec_ctx))
-
+            return res.success(f.read())
     except FileNotFoundError:
         return res.failure(
             RNModuleNotFoundError(
@@ -119,30 +166,108 @@ def resolve_module(pos_start: Position, pos_end: Position, exec_ctx: Context, mo
             )
         )
 
-    symbol_table = create_global_symbol_table()
-    new_ctx = Context(module_name, exec_ctx, pos_start)
+
+def execute_module(
+    pos_start: Position, pos_end: Position, exec_ctx: Context, module: Module, script: str, import_cwd: str
+) -> RTResult[Module]:
+    """Run `script` in a new global scope which becomes the symbol table of `module`"""
+    res = RTResult[Module]()
+    # take the first string as the docs
+    try:
+        module.docs = script.split('"')[1]
+    except IndexError:
+        module.docs = ""
+    except Exception as e:
+        return res.failure(RTError(pos_start, pos_end, "Failed to load script docs\n" + str(e), exec_ctx))
+
+    symbol_table = create_global_symbol_table(module.file_path)
+    module.symbol_table = symbol_table
+    new_ctx = Context(module.file_path, exec_ctx, pos_start)
     new_ctx.symbol_table = symbol_table
-    new_ctx.import_cwd = module_path
+    new_ctx.import_cwd = import_cwd
     # error: Error
-    _, error, should_exit = run(module_name, script, context=new_ctx)
+    _, error, should_exit = run(module.file_path, script, context=new_ctx, use_cache=True)
 
     if error:
-        return RTResult[Value]().failure(
+        return res.failure(
             RTError(
                 pos_start,
                 pos_end,
-                f"{Log.light_error('Failed to finish executing script')} {Log.light_info(module_name)}\n"
+                f"{Log.light_error('Failed to finish executing script')} {Log.light_info(module.file_path)}\n"
                 + error.as_string(),  # type: ignore
                 exec_ctx,
             )
         )
 
-    module = Module(module_ident, module_name, docs, symbol_table)
     if should_exit:
         return res.success_exit(module)
     return res.success(module)
 
 
+def resolve_module(pos_start: Position, pos_end: Position, exec_ctx: Context, module_ident: str) -> RTResult[Module]:
+    res = RTResult[Module]()
+    module_name = module_ident
+    if module_name not in STDLIBS:
+        file_extension = module_name.split("/")[-1].split(".")[-1]
+        if file_extension != "rn":
+            module_name += ".rn"
+        # module_file = module_name.split("/")[-1]
+        module_path = os.path.dirname(os.path.realpath(module_name))
+
+        module_name = os.path.join(exec_ctx.get_import_cwd(), module_name)
+        # module_name = os.path.join(module_path, module_file)
+    else:
+        # For STDLIB modules
+        module_path = os.path.join(BASE_DIR, "stdlib")
+        module_name = os.path.join(module_path, f"{module_name}.rn")
+
+    # Every module only runs once, later imports share its symbol table
+    real_path = os.path.realpath(module_name)
+    module = modules.get(real_path)
+    if module is not None:
+        return res.success(module)
+
+    script = res.register(read_module(pos_start, pos_end, exec_ctx, module_name))
+    if res.should_return():
+        return res
+    assert script is not None
+
+    # Registered before running so that circular imports get the partially initialized module
+    module = Module(module_ident, module_name, "", SymbolTable())
+    modules[real_path] = module
+    result = execute_module(pos_start, pos_end, exec_ctx, module, script, module_path)
+    if result.error is not None:
+        del modules[real_path]
+    return result
+
+
+def reload_module(pos_start: Position, pos_end: Position, exec_ctx: Context, module: Module) -> RTResult[Module]:
+    """Run an already imported module again, updating it in place"""
+    res = RTResult[Module]()
+    script = res.register(read_module(pos_start, pos_end, exec_ctx, module.file_path))
+    if res.should_return():
+        return res
+    assert script is not None
+
+    import_cwd = os.path.dirname(os.path.realpath(module.file_path))
+    return execute_module(pos_start, pos_end, exec_ctx, module, script, import_cwd)
+
+
+def with_note(func: EvalFunc, node: Node) -> EvalFunc:
+    """Wrap a compiled closure so that an internal error raised while it runs notes the position of `node`, like
+    `Interpreter.visit` does for the node it is called on"""
+
+    def noted(context: Context) -> RTResult[Value]:
+        try:
+            return func(context)
+        except Exception as e:
+            if sys.version_info >= (3, 11):
+                e.add_note(f"{node.pos_start} - {node.pos_end}: NOTE: happened here")
+            raise
+
+    return noted
+
+
 class Interpreter:
     def assign(
         self,
@@ -152,6 +277,7 @@ class Interpreter:
         context: Context,
         extra_names: list[Token] = [],
         qualifier: Optional[Token] = None,
+        depth: Optional[int] = None,
         pos_start: Position,
         pos_end: Position,
     ) -> RTResult[Value]:
@@ -170,7 +296,7 @@ class Interpreter:
                 name = name_tok.value
                 assert isinstance(name, str)
 
-                if not isinstance(nd, Class) and not isinstance(nd, Instance):
+                if not isinstance(nd, Class) and not isinstance(nd, BaseInstance):
                     return res.failure(RTError(pos_start, pos_end, "Value must be instance of class or class", context))
 
                 prev = nd
@@ -181,11 +307,25 @@ class Interpreter:
 
             assert prev is not None
             assert isinstance(name, str)
+            if isinstance(prev, BaseInstance):
+                attribute_type = prev.attribute_type(name)
+                if attribute_type is not None and not isinstance(value, attribute_type):
+                    return res.failure(
+                        RTError(
+                            pos_start, pos_end, f"Attribute '{name}' must be of type {attribute_type.__name__}", context
+                        )
+                    )
             res.register(prev.symbol_table.set(name, value))
             if res.should_return():
                 return res
             return res.success(value)
 
+        if qualifier is None and depth is not None:
+            res.register(context.symbol_table.set_var_at(var_name, value, depth))
+            if res.should_return():
+                return res
+            return res.success(value)
+
         qualifier_str = None if qualifier is None else qualifier.value
         assert qualifier_str is None or isinstance(qualifier_str, str)
         res.register(context.symbol_table.set_var(var_name, value, qualifier_str))
@@ -193,12 +333,14 @@ class Interpreter:
             return res
         return res.success(value)
 
-    def call_value(self, value_to_call: Value, node: CallNode, context: Context) -> RTResult[Value]:
+    def call_value(self, value_to_call: Value, node: CallNode, context: Context, tail: bool = False) -> RTResult[Value]:
+        """Call a value with the arguments of `node`, or if it is a tail call to a Radon function, leave it to the
+        calling function to do in place of itself"""
         res = RTResult[Value]()
 
         args: list[Value] = []
         for arg_node in node.arg_nodes:
-            arg = res.register(self.visit(arg_node, context))
+            arg = res.register(self.compile(arg_node)(context))
             if res.should_return():
                 return res
             assert arg is not None
@@ -206,33 +348,58 @@ class Interpreter:
 
         kwargs: dict[str, Value] = {}
         for kw, kwarg_node in node.kwarg_nodes.items():
-            kwarg = res.register(self.visit(kwarg_node, context))
+            kwarg = res.register(self.compile(kwarg_node)(context))
             if res.should_return():
                 return res
             assert kwarg is not None
             kwargs[kw] = kwarg
 
+        if tail and isinstance(value_to_call, Function):
+            return res.success_tail_call(value_to_call, args, kwargs)
+
         return_value = res.register(value_to_call.execute(args, kwargs))
+        if res.error is not None and not isinstance(value_to_call, (Function, Class)):
+            # Built-in functions, classes and methods report errors at the arguments they were given
+            relocate(res.error, context, *zip(args, node.arg_nodes), *zip(kwargs.values(), node.kwarg_nodes.values()))
         if res.should_return():
             return res
         assert return_value is not None
-        return_value = return_value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
         return res.success(return_value)
 
     def visit(self, node: Node, context: Context) -> RTResult[Value]:
-        method_name = f"visit_{type(node).__name__}"
-        method: Callable[[Node, Context], NoReturn] = getattr(self, method_name, self.no_visit_method)
-        try:
-            return method(node, context)
-        except Exception as e:
-            if sys.version_info >= (3, 11):
-                e.add_note(f"{node.pos_start} - {node.pos_end}: NOTE: happened here")
-            raise
+        return self.compile(node)(context)
+
+    def compile(self, node: Node) -> EvalFunc:
+        """Return the closure evaluating `node`, building and caching it on the node the first time.
+
+        Nodes with a `compile_*` method get a specialized closure with their children already compiled.
+        Every other node is bound to its `visit_*` method.
+        """
+        func: Optional[EvalFunc] = getattr(node, "compiled", None)
+        if func is None:
+            node_name = type(node).__name__
+            compile_method: Optional[Callable[[Node], EvalFunc]] = getattr(self, f"compile_{node_name}", None)
+            if compile_method is not None:
+                func = compile_method(node)
+            else:
+                visit_method: Callable[[Node, Context], RTResult[Value]] = getattr(
+                    self, f"visit_{node_name}", self.no_visit_method
+                )
+                func = partial(visit_method, node)
+            func = with_note(func, node)
+            setattr(node, "compiled", func)
+        return func
 
     def visit_block(self, node: Node, context: Context) -> RTResult[Value]:
-        new_context = Context("<block scope>", context, node.pos_start)
-        new_context.symbol_table = SymbolTable(context.symbol_table)
-        return self.visit(node, new_context)
+        return self.run_block(self.compile(node), node, context)
+
+    def run_block(self, func: EvalFunc, node: Node, context: Context, scope: int = SCOPE_NEW) -> RTResult[Value]:
+        return func(self.block_context(node, context, scope))
+
+    def block_context(self, node: Node, context: Context, scope: int = SCOPE_NEW) -> Context:
+        """Return a context to run a block in, with a symbol table of its own unless the block shares its parent's"""
+        symbol_table = context.symbol_table if scope == SCOPE_SHARED else SymbolTable(context.symbol_table)
+        return Context("<block scope>", context, node.pos_start, symbol_table)
 
     def no_visit_method(self, node: Node, context: Context) -> NoReturn:
         raise Exception(f"No visit_{type(node).__name__} method defined")
@@ -242,63 +409,114 @@ class Interpreter:
     def visit_NullNode(self, node: Node, context: Context) -> RTResult[Value]:
         return RTResult[Value]().success(Null.null())
 
-    def visit_NumberNode(self, node: NumberNode, context: Context) -> RTResult[Value]:
-        assert isinstance(node.tok.value, int | float), "This could be a bug in the parser or the lexer"
-        return RTResult[Value]().success(
-            Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+    def compile_NumberNode(self, node: NumberNode) -> EvalFunc:
+        value = node.tok.value
+        assert isinstance(value, int | float), "This could be a bug in the parser or the lexer"
+        # Values are immutable, so a literal evaluates to the same one every time
+        number = Number(value).set_pos(node.pos_start, node.pos_end)
 
-    def visit_StringNode(self, node: StringNode, context: Context) -> RTResult[Value]:
-        assert isinstance(node.tok.value, str), "This could be a bug in the parser or the lexer"
-        return RTResult[Value]().success(
-            String(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        def eval_number(context: Context) -> RTResult[Value]:
+            return RTResult[Value]().success(number)
 
-    def visit_ArrayNode(self, node: ArrayNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
-        elements: list[Value] = []
+        return eval_number
 
-        for element_node in node.element_nodes:
-            elt = res.register(self.visit(element_node, context))
-            if res.should_return():
-                return res
-            assert elt is not None
-            elements.append(elt)
+    def compile_StringNode(self, node: StringNode) -> EvalFunc:
+        value = node.tok.value
+        assert isinstance(value, str), "This could be a bug in the parser or the lexer"
+        string = String(value).set_pos(node.pos_start, node.pos_end)
 
-        return res.success(Array(elements).set_context(context).set_pos(node.pos_start, node.pos_end))
+        def eval_string(context: Context) -> RTResult[Value]:
+            return RTResult[Value]().success(string)
 
-    def visit_VarAccessNode(self, node: VarAccessNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
+        return eval_string
+
+    def compile_BooleanNode(self, node: BooleanNode) -> EvalFunc:
+        boolean = Boolean.of(node.value)
+
+        def eval_boolean(context: Context) -> RTResult[Value]:
+            return RTResult[Value]().success(boolean)
+
+        return eval_boolean
+
+    def compile_ArrayNode(self, node: ArrayNode) -> EvalFunc:
+        element_funcs = [self.compile(element_node) for element_node in node.element_nodes]
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if node.should_return_null:
+
+            def eval_statements(context: Context) -> RTResult[Value]:
+                res = RTResult[Value]()
+                for element_func in element_funcs:
+                    res.register(element_func(context))
+                    if res.should_return():
+                        return res
+                return res.success(Null.null())
+
+            return eval_statements
+
+        def eval_array(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+            elements: list[Value] = []
+
+            for element_func in element_funcs:
+                elt = res.register(element_func(context))
+                if res.should_return():
+                    return res
+                assert elt is not None
+                elements.append(elt)
+
+            return res.success(Array(elements).set_context(context).set_pos(pos_start, pos_end))
+
+        return eval_array
+
+    def compile_VarAccessNode(self, node: VarAccessNode) -> EvalFunc:
         var_name = node.var_name_tok.value
         assert isinstance(var_name, str), "This could be a bug in the lexer"
-        assert context.symbol_table is not None
-        value = context.symbol_table.get(var_name)
+        lookup = make_lookup(var_name, node.depth)
+        pos_start, pos_end = node.pos_start, node.pos_end
 
-        if value is None:
-            return res.failure(RNNameError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
+        def eval_var_access(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+            assert context.symbol_table is not None
+            value = lookup(context.symbol_table)
 
-        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-        assert value is not None
-        return res.success(value)
+            if value is None:
+                return res.failure(RNNameError(pos_start, pos_end, f"'{var_name}' is not defined", context))
+            if isinstance(value, BaseInstance):
+                # Instances are shared rather than copied, and they take the position of the latest read of them, so
+                # that errors about them, e.g. through `this` in a method, point at the call site
+                value.set_pos(pos_start, pos_end).set_context(context)
+            return res.success(value)
 
-    def visit_VarAssignNode(self, node: VarAssignNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
+        return eval_var_access
+
+    def compile_VarAssignNode(self, node: VarAssignNode) -> EvalFunc:
         var_name = node.var_name_tok.value
         assert isinstance(var_name, str)
-        value = res.register(self.visit(node.value_node, context))
-        if res.should_return():
+        value_func = self.compile(node.value_node)
+
+        def eval_var_assign(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+            value = res.register(value_func(context))
+            if res.should_return():
+                return res
+            assert value is not None
+
+            res = self.assign(
+                var_name=var_name,
+                value=value,
+                context=context,
+                extra_names=node.extra_names,
+                qualifier=node.qualifier,
+                depth=node.depth,
+                pos_start=node.pos_start,
+                pos_end=node.pos_end,
+            )
+            if res.error is not None:
+                relocate(res.error, context, (value, node.value_node))
             return res
-        assert value is not None
 
-        return self.assign(
-            var_name=var_name,
-            value=value,
-            context=context,
-            extra_names=node.extra_names,
-            qualifier=node.qualifier,
-            pos_start=node.pos_start,
-            pos_end=node.pos_end,
-        )
+        return eval_var_assign
 
     def visit_RaiseNode(self, node: RaiseNode, context: Context) -> RTResult[Value]:
         res = RTResult[Value]()
@@ -308,7 +526,7 @@ class Interpreter:
         if res.should_return():
             return res
         assert value_to_call is not None
-        value_to_call = value_to_call.copy().set_pos(call_node.pos_start, call_node.pos_end)
+        value_to_call = value_to_call.copy().set_pos(call_node.pos_start, call_node.pos_end).set_context(context)
 
         if isinstance(value_to_call, BaseFunction):
             errtype = value_to_call.name
@@ -330,7 +548,7 @@ class Interpreter:
         if res.should_return():
             return res
         assert func is not None
-        func = func.copy().set_pos(node.pos_start, node.pos_end)
+        func = func.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
 
         if isinstance(func, BaseFunction):
             errtype = func.name
@@ -416,217 +634,270 @@ class Interpreter:
             return res
         return res.success(module)
 
-    def visit_BinOpNode(self, node: BinOpNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
-        left = res.register(self.visit(node.left_node, context))
-        if res.should_return():
-            return res
-        assert left is not None
-        right = res.register(self.visit(node.right_node, context))
-        if res.should_return():
-            return res
-        assert right is not None
-
-        if node.op_tok.type == TT_PLUS:
-            result, error = left.added_to(right)
-        elif node.op_tok.type == TT_MINUS:
-            result, error = left.subbed_by(right)
-        elif node.op_tok.type == TT_MUL:
-            result, error = left.multed_by(right)
-        elif node.op_tok.type == TT_DIV:
-            result, error = left.dived_by(right)
-        elif node.op_tok.type == TT_POW:
-            result, error = left.powed_by(right)
-        elif node.op_tok.type == TT_MOD:
-            result, error = left.modded_by(right)
-        elif node.op_tok.type == TT_EE:
-            result, error = left.get_comparison_eq(right)
-        elif node.op_tok.type == TT_NE:
-            result, error = left.get_comparison_ne(right)
-        elif node.op_tok.type == TT_LT:
-            result, error = left.get_comparison_lt(right)
-        elif node.op_tok.type == TT_GT:
-            result, error = left.get_comparison_gt(right)
-        elif node.op_tok.type == TT_LTE:
-            result, error = left.get_comparison_lte(right)
-        elif node.op_tok.type == TT_GTE:
-            result, error = left.get_comparison_gte(right)
-        elif node.op_tok.matches(TT_KEYWORD, "and"):
-            result, error = left.anded_by(right)
-        elif node.op_tok.matches(TT_KEYWORD, "or"):
-            result, error = left.ored_by(right)
-        elif node.op_tok.type == TT_IDIV:
-            result, error = left.idived_by(right)
-        elif node.op_tok.matches(TT_KEYWORD, "in"):
-            result, error = right.contains(left)
+    def compile_BinOpNode(self, node: BinOpNode) -> EvalFunc:
+        left_node, right_node = node.left_node, node.right_node
+        left_func = self.compile(left_node)
+        right_func = self.compile(right_node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        # `x in y` is the only operator dispatched on its right operand
+        reverse = node.op_tok.matches(TT_KEYWORD, "in")
+        if reverse:
+            method_name = "contains"
+        elif node.op_tok.type == TT_KEYWORD:
+            assert isinstance(node.op_tok.value, str)
+            method_name = KEYWORD_BINOP_METHODS.get(node.op_tok.value, "")
         else:
-            assert False, f"invalid binary operation: {node.op_tok}, this is probably a bug in the parser."
+            method_name = BINOP_METHODS.get(node.op_tok.type, "")
+        assert method_name, f"invalid binary operation: {node.op_tok}, this is probably a bug in the parser."
+        number_op = None if reverse else NUMBER_BINOPS.get(method_name)
+
+        def eval_bin_op(context: Context) -> RTResult[Value]:
+            # The results of the operands are never shared, so rather than registering them into a result of its
+            # own, the operation returns the one of its right operand, which registering would have copied anyway
+            res = left_func(context)
+            if res.should_return():
+                return res
+            left = res.value
+            assert left is not None
+            res = right_func(context)
+            if res.should_return():
+                return res
+            right = res.value
+            assert right is not None
 
-        if error:
-            return res.failure(error)
-        else:
-            assert result is not None
-            return res.success(result.set_pos(node.pos_start, node.pos_end))
+            if number_op is not None and type(left) is Number and type(right) is Number:
+                number = number_op(left.value, right.value)
+                if number is not None:
+                    return res.success(number.set_context(left.context).set_pos(pos_start, pos_end))
 
-    def visit_UnaryOpNode(self, node: UnaryOpNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
-        number = res.register(self.visit(node.node, context))
-        if res.should_return():
-            return res
-        assert number is not None
+            if reverse:
+                result, error = right.contains(left)
+            else:
+                result, error = getattr(left, method_name)(right)
 
-        error = None
+            if error:
+                return res.failure(relocate(error, context, (left, left_node), (right, right_node)))
+            else:
+                assert result is not None
+                return res.success(result.set_pos(pos_start, pos_end))
 
-        if node.op_tok.type == TT_MINUS:
-            number, error = number.multed_by(Number(-1))
-        elif node.op_tok.matches(TT_KEYWORD, "not"):
-            number, error = number.notted()
-        else:
-            assert False, f"invalid unary operation: {node.op_tok}, this is probably a bug in the parser."
+        return eval_bin_op
 
-        if error:
-            assert error is not None
-            return res.failure(error)
-        else:
-            assert number is not None
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+    def compile_UnaryOpNode(self, node: UnaryOpNode) -> EvalFunc:
+        operand_func = self.compile(node.node)
+        pos_start, pos_end = node.pos_start, node.pos_end
 
-    def visit_IfNode(self, node: IfNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
+        negate = node.op_tok.type == TT_MINUS
+        assert negate or node.op_tok.matches(
+            TT_KEYWORD, "not"
+        ), f"invalid unary operation: {node.op_tok}, this is probably a bug in the parser."
 
-        for condition, expr, should_return_null in node.cases:
-            condition_value = res.register(self.visit(condition, context))
+        def eval_unary_op(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+            operand = res.register(operand_func(context))
             if res.should_return():
                 return res
-            assert condition_value is not None
+            assert operand is not None
+
+            if negate:
+                number, error = operand.multed_by(Number.of(-1))
+            else:
+                number, error = operand.notted()
+
+            if error:
+                assert error is not None
+                return res.failure(relocate(error, context, (operand, node.node)))
+            else:
+                assert number is not None
+                return res.success(number.set_pos(pos_start, pos_end))
+
+        return eval_unary_op
 
-            if condition_value.is_true():
-                expr_value = res.register(self.visit_block(expr, context))
+    def compile_IfNode(self, node: IfNode) -> EvalFunc:
+        cases = [
+            (self.compile(condition), self.compile(expr), expr, should_return_null, scope)
+            for (condition, expr, should_return_null), scope in zip(node.cases, node.scopes)
+        ]
+        else_case = None
+        if node.else_case is not None:
+            expr, should_return_null = node.else_case
+            else_case = (self.compile(expr), expr, should_return_null, node.scopes[-1])
+
+        def eval_if(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+
+            for condition_func, expr_func, expr, should_return_null, scope in cases:
+                condition_value = res.register(condition_func(context))
+                if res.should_return():
+                    return res
+                assert condition_value is not None
+
+                if condition_value.is_true():
+                    expr_value = res.register(self.run_block(expr_func, expr, context, scope))
+                    if res.should_return():
+                        return res
+                    assert expr_value is not None
+                    return res.success(Null.null() if should_return_null else expr_value)
+
+            if else_case is not None:
+                expr_func, expr, should_return_null, scope = else_case
+                expr_value = res.register(self.run_block(expr_func, expr, context, scope))
                 if res.should_return():
                     return res
                 assert expr_value is not None
                 return res.success(Null.null() if should_return_null else expr_value)
 
-        if node.else_case is not None:
-            expr, should_return_null = node.else_case
-            expr_value = res.register(self.visit_block(expr, context))
-            if res.should_return():
-                return res
-            assert expr_value is not None
-            return res.success(Null.null() if should_return_null else expr_value)
+            return res.success(Null.null())
 
-        return res.success(Null.null())
+        return eval_if
 
-    def visit_ForNode(self, node: ForNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
-        elements: list[Value] = []
+    def compile_ForNode(self, node: ForNode) -> EvalFunc:
+        var_name = node.var_name_tok.value
+        assert isinstance(var_name, str), "this could be a bug in the parser"
+        start_func = self.compile(node.start_value_node)
+        end_func = self.compile(node.end_value_node)
+        step_func = self.compile(node.step_value_node) if node.step_value_node else None
+        body_func = self.compile(node.body_node)
+        body_scope = node.body_scope
+        should_return_null = node.should_return_null
 
-        start_value = res.register(self.visit(node.start_value_node, context))
-        if res.should_return():
-            return res
-        if not isinstance(start_value, Number):
-            return res.failure(
-                RTError(
-                    node.start_value_node.pos_start,
-                    node.start_value_node.pos_end,
-                    "Start value must be a number",
-                    context,
-                )
-            )
+        def eval_for(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+            elements: list[Value] = []
 
-        end_value = res.register(self.visit(node.end_value_node, context))
-        if res.should_return():
-            return res
-        if not isinstance(end_value, Number):
-            return res.failure(
-                RTError(
-                    node.end_value_node.pos_start, node.end_value_node.pos_end, "End value must be a number", context
+            start_value = res.register(start_func(context))
+            if res.should_return():
+                return res
+            if not isinstance(start_value, Number):
+                return res.failure(
+                    RTError(
+                        node.start_value_node.pos_start,
+                        node.start_value_node.pos_end,
+                        "Start value must be a number",
+                        context,
+                    )
                 )
-            )
 
-        if node.step_value_node:
-            step_value = res.register(self.visit(node.step_value_node, context))
+            end_value = res.register(end_func(context))
             if res.should_return():
                 return res
-            if not isinstance(step_value, Number):
+            if not isinstance(end_value, Number):
                 return res.failure(
                     RTError(
-                        node.step_value_node.pos_start,
-                        node.step_value_node.pos_end,
-                        "Step value must be a number",
+                        node.end_value_node.pos_start,
+                        node.end_value_node.pos_end,
+                        "End value must be a number",
                         context,
                     )
                 )
-        else:
-            step_value = Number(1)
-
-        i = start_value.value
-
-        if step_value.value >= 0:
-
-            def condition() -> bool:
-                return i < end_value.value
-        else:
-
-            def condition() -> bool:
-                return i > end_value.value
 
-        while condition():
-            assert isinstance(node.var_name_tok.value, str), "this could be a bug in the parser"
-            assert context.symbol_table is not None
-            context.symbol_table.set(node.var_name_tok.value, Number(i))
-            i += step_value.value
+            if step_func is not None:
+                assert node.step_value_node is not None
+                step_value = res.register(step_func(context))
+                if res.should_return():
+                    return res
+                if not isinstance(step_value, Number):
+                    return res.failure(
+                        RTError(
+                            node.step_value_node.pos_start,
+                            node.step_value_node.pos_end,
+                            "Step value must be a number",
+                            context,
+                        )
+                    )
+            else:
+                step_value = Number.one()
+
+            start, end, step = start_value.value, end_value.value, step_value.value
+            numbers: Iterable[int | float] | None = int_range(start, end, step)
+            if numbers is None:
+                numbers = float_steps(start, end, step)
+
+            # Bodies that do not need a new scope every iteration run in the same context
+            body_context = None if body_scope == SCOPE_NEW else self.block_context(node.body_node, context, body_scope)
+
+            # The loop variable is stored straight into the scope, except a constant, which keeps its value
+            symbol_table = context.symbol_table
+            assert symbol_table is not None
+            symbols = symbol_table.symbols if var_name not in symbol_table.consts else {}
+
+            for i in numbers:
+                symbols[var_name] = Number.of(i)
+
+                if body_context is None:
+                    value = res.register(self.run_block(body_func, node.body_node, context))
+                else:
+                    if body_scope == SCOPE_REUSED:
+                        body_context.symbol_table.clear()
+                    value = res.register(body_func(body_context))
+                if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
+                    return res
 
-            value = res.register(self.visit_block(node.body_node, context))
-            if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
-                return res
+                if res.loop_should_continue:
+                    continue
 
-            if res.loop_should_continue:
-                continue
+                if res.loop_should_break:
+                    break
 
-            if res.loop_should_break:
-                break
+                if not should_return_null:
+                    assert value is not None
+                    elements.append(value)
 
-            assert value is not None
-            elements.append(value)
+            return res.success(
+                Null.null()
+                if should_return_null
+                else Array(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+            )
 
-        return res.success(
-            Null.null()
-            if node.should_return_null
-            else Array(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return eval_for
 
-    def visit_WhileNode(self, node: WhileNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
-        elements: list[Value] = []
+    def compile_WhileNode(self, node: WhileNode) -> EvalFunc:
+        condition_func = self.compile(node.condition_node)
+        body_func = self.compile(node.body_node)
+        body_scope = node.body_scope
+        should_return_null = node.should_return_null
 
-        while True:
-            condition = res.register(self.visit(node.condition_node, context))
-            if res.should_return():
-                return res
-            assert condition is not None
+        def eval_while(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+            elements: list[Value] = []
+            body_context = None if body_scope == SCOPE_NEW else self.block_context(node.body_node, context, body_scope)
 
-            if not condition.is_true():
-                break
+            while True:
+                condition = res.register(condition_func(context))
+                if res.should_return():
+                    return res
+                assert condition is not None
+
+                if not condition.is_true():
+                    break
+
+                if body_context is None:
+                    value = res.register(self.run_block(body_func, node.body_node, context))
+                else:
+                    if body_scope == SCOPE_REUSED:
+                        body_context.symbol_table.clear()
+                    value = res.register(body_func(body_context))
+                if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
+                    return res
 
-            value = res.register(self.visit_block(node.body_node, context))
-            if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
-                return res
+                if res.loop_should_continue:
+                    continue
 
-            if res.loop_should_continue:
-                continue
+                if res.loop_should_break:
+                    break
 
-            if res.loop_should_break:
-                break
+                if not should_return_null:
+                    assert value is not None
+                    elements.append(value)
 
-            assert value is not None
-            elements.append(value)
+            return res.success(
+                Null.null()
+                if should_return_null
+                else Array(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
+            )
 
-        return res.success(
-            Null.null()
-            if node.should_return_null
-            else Array(elements).set_context(context).set_pos(node.pos_start, node.pos_end)
-        )
+        return eval_while
 
     def visit_FuncDefNode(self, node: FuncDefNode, context: Context) -> RTResult[Value]:
         res = RTResult[Value]()
@@ -657,6 +928,7 @@ class Interpreter:
                 func_desc,
                 va_name=node.va_name,
                 max_pos_args=node.max_pos_args,
+                generator=node.generator,
             )
             .set_context(context)
             .set_pos(node.pos_start, node.pos_end)
@@ -672,29 +944,66 @@ class Interpreter:
 
         return res.success(func_value)
 
-    def visit_CallNode(self, node: CallNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
+    def compile_CallNode(self, node: CallNode) -> EvalFunc:
+        callee_func = self.compile(node.node_to_call)
+        pos_start, pos_end = node.pos_start, node.pos_end
 
-        value_to_call = res.register(self.visit(node.node_to_call, context))
-        if res.should_return():
-            return res
-        assert value_to_call is not None
-        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end)
+        def eval_call(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+
+            value_to_call = res.register(callee_func(context))
+            if res.should_return():
+                return res
+            assert value_to_call is not None
+            # Functions take their position and context for tracebacks, so the callee is the one value still copied
+            value_to_call = value_to_call.copy().set_pos(pos_start, pos_end).set_context(context)
 
-        return self.call_value(value_to_call, node, context)
+            return self.call_value(value_to_call, node, context)
 
-    def visit_ReturnNode(self, node: ReturnNode, context: Context) -> RTResult[Value]:
-        res = RTResult[Value]()
+        return eval_call
+
+    def compile_ReturnNode(self, node: ReturnNode) -> EvalFunc:
+        if node.tail_call:
+            assert isinstance(node.node_to_return, CallNode)
+            return with_note(self.compile_tail_call(node.node_to_return), node.node_to_return)
+        value_func = self.compile(node.node_to_return) if node.node_to_return else None
+
+        def eval_return(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+
+            if value_func is not None:
+                value = res.register(value_func(context))
+                if res.should_return():
+                    return res
+            else:
+                value = Null.null()
+            assert value is not None
+
+            return res.success_return(value)
+
+        return eval_return
 
-        if node.node_to_return:
-            value = res.register(self.visit(node.node_to_return, context))
+    def compile_tail_call(self, node: CallNode) -> EvalFunc:
+        callee_func = self.compile(node.node_to_call)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def eval_tail_call(context: Context) -> RTResult[Value]:
+            res = RTResult[Value]()
+
+            value_to_call = res.register(callee_func(context))
             if res.should_return():
                 return res
-        else:
-            value = Null.null()
-        assert value is not None
+            assert value_to_call is not None
+            value_to_call = value_to_call.copy().set_pos(pos_start, pos_end).set_context(context)
+
+            # Returns the tail call itself when calling a function
+            value = res.register(self.call_value(value_to_call, node, context, tail=True))
+            if res.should_return():
+                return res
+            assert value is not None
+            return res.success_return(value)
 
-        return res.success_return(value)
+        return eval_tail_call
 
     def visit_ContinueNode(self, node: ContinueNode, context: Context) -> RTResult[Value]:
         return RTResult[Value]().success_continue()
@@ -702,6 +1011,13 @@ class Interpreter:
     def visit_BreakNode(self, node: BreakNode, context: Context) -> RTResult[Value]:
         return RTResult[Value]().success_break()
 
+    def visit_YieldNode(self, node: YieldNode, context: Context) -> RTResult[Value]:
+        # The bodies of generator functions run on the VM (see `Function.generate`), which delegates the statements
+        # it has no instructions for, like `switch`, back here where they cannot be suspended
+        return RTResult[Value]().failure(
+            RTError(node.pos_start, node.pos_end, "Cannot yield from inside this statement", context)
+        )
+
     def visit_TryNode(self, node: TryNode, context: Context) -> RTResult[Value]:
         res = RTResult[Value]()
         res.register(self.visit(node.try_block, context))
@@ -745,6 +1061,8 @@ class Interpreter:
 
         for it_res in it:
             element = res.register(it_res)
+            if res.error is not None:
+                relocate(res.error, context, (iterable, node.iterable_node))
             if res.should_return() and not res.loop_should_continue and not res.loop_should_break:
                 return res
 
@@ -761,8 +1079,9 @@ class Interpreter:
             element = res.register(self.visit(body, context))
             if res.should_return():
                 return res
-            assert element is not None
-            elements.append(element)
+            if not should_return_null:
+                assert element is not None
+                elements.append(element)
 
         if should_return_null:
             return res.success(Null.null())
@@ -796,7 +1115,15 @@ class Interpreter:
         result, error = indexee.get_slice(index_start, index_end, index_step)
 
         if error is not None:
-            return res.failure(error)
+            operands = [(indexee, node.indexee)]
+            for index_value, index_node in [
+                (index_start, node.index_start),
+                (index_end, node.index_end),
+                (index_step, node.index_step),
+            ]:
+                if index_value is not None and index_node is not None:
+                    operands.append((index_value, index_node))
+            return res.failure(relocate(error, context, *operands))
         assert result is not None
         return res.success(result.set_pos(node.pos_start, node.pos_end).set_context(context))
 
@@ -814,7 +1141,7 @@ class Interpreter:
 
         result, error = indexee.get_index(index)
         if error is not None:
-            return res.failure(error)
+            return res.failure(relocate(error, context, (indexee, node.indexee), (index, node.index)))
         assert result is not None
 
         return res.success(result)
@@ -838,31 +1165,37 @@ class Interpreter:
 
         result, error = indexee.set_index(index, value)
         if error:
-            return res.failure(error)
+            return res.failure(
+                relocate(error, context, (indexee, node.indexee), (index, node.index), (value, node.value))
+            )
         assert result is not None
 
         return res.success(result)
 
     def visit_HashMapNode(self, node: HashMapNode, context: Context) -> RTResult[Value]:
         res = RTResult[Value]()
-        values: dict[str, Value] = {}
+        values: dict[HashKey, Value] = {}
 
         for key_node, value_node in node.pairs:
             key = res.register(self.visit(key_node, context))
             if res.should_return():
                 return res
+            assert key is not None
 
-            if not isinstance(key, String):
-                return res.failure(
-                    RTError(key_node.pos_start, key_node.pos_end, f"Non-string key for hashmap: '{key!r}'", context)
-                )
+            hash_key, error = key.hash_key()
+            if error is not None:
+                return res.failure(relocate(error, context, (key, key_node)))
+            assert hash_key is not None
 
             value = res.register(self.visit(value_node, context))
             if res.should_return():
                 return res
             assert value is not None
 
-            values[key.value] = value
+            try:
+                values[hash_key] = value
+            except KeyComparisonError as e:
+                return res.failure(relocate(e.error, context, (key, key_node)))
 
         return res.success(HashMap(values))
 
@@ -911,7 +1244,10 @@ class Interpreter:
         assert isinstance(var_name, str), "This could be a bug in the lexer"
         pre = node.is_pre
 
-        old_value = context.symbol_table.get(var_name)
+        if node.depth is None:
+            old_value = context.symbol_table.get(var_name)
+        else:
+            old_value = context.symbol_table.get_at(var_name, node.depth)
         if old_value is None:
             return res.failure(RNNameError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
 
@@ -927,6 +1263,7 @@ class Interpreter:
                 context=context,
                 extra_names=node.extra_names,
                 qualifier=node.qualifier,
+                depth=node.depth,
                 pos_start=node.pos_start,
                 pos_end=node.pos_end,
             )
@@ -942,7 +1279,10 @@ class Interpreter:
         assert isinstance(var_name, str), "This could be a bug in the lexer"
         pre = node.is_pre
 
-        old_value = context.symbol_table.get(var_name)
+        if node.depth is None:
+            old_value = context.symbol_table.get(var_name)
+        else:
+            old_value = context.symbol_table.get_at(var_name, node.depth)
         if old_value is None:
             return res.failure(RNNameError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
 
@@ -958,6 +1298,7 @@ class Interpreter:
                 context=context,
                 extra_names=node.extra_names,
                 qualifier=node.qualifier,
+                depth=node.depth,
                 pos_start=node.pos_start,
                 pos_end=node.pos_end,
             )
@@ -984,7 +1325,7 @@ class Interpreter:
                 assert value is not None
                 bool_, error = subject.get_comparison_eq(value)
                 if error is not None:
-                    return res.failure(error)
+                    return res.failure(relocate(error, context, (subject, node.subject_node), (value, expr)))
                 assert bool_ is not None
                 should_continue = bool(bool_.is_true())
 
@@ -1047,12 +1388,33 @@ class Interpreter:
             )
 
         if isinstance(orig_value, BaseInstance) and isinstance(value, BaseFunction):
-            value = res.register(orig_value.bind_method(value))
+            # Binding makes a new method, which can take the position of the access
+            method = res.register(orig_value.bind_method(value))
             if res.should_return():
                 return res
-        else:
-            value = value.copy()
-        assert value is not None
-        value.set_pos(node.pos_start, node.pos_end).set_context(context)
+            assert method is not None
+            value = method.set_pos(node.pos_start, node.pos_end).set_context(context)
+        elif isinstance(value, BaseInstance):
+            value.set_pos(node.pos_start, node.pos_end).set_context(context)
 
         return res.success(value)
+
+
+# Execution engines: the tree-walking `Interpreter` above, or the bytecode VM in `core.vm`
+ENGINES = ["tree", "vm"]
+engine = "tree"
+
+
+def set_engine(name: str) -> None:
+    global engine
+    assert name in ENGINES, f"unknown engine {name!r}"
+    engine = name
+
+
+def make_interpreter() -> Interpreter:
+    """Return an interpreter for the selected engine"""
+    if engine == "vm":
+        from core.vm import VM  # Lazy import
+
+        return VM()
+    return Interpreter()
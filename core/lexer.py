@@ -1,8 +1,8 @@
+import re
 from typing import Optional
 
 from core.errors import Error, ExpectedCharError, IllegalCharError
 from core.tokens import (
-    DIGITS,
     KEYWORDS,
     TT_ARROW,
     TT_COLON,
@@ -45,312 +45,181 @@ from core.tokens import (
     TT_SPREAD,
     TT_STRING,
     TT_TE,
-    VALID_IDENTIFIERS,
     Position,
     Token,
 )
 
 
+# Tokens made of the same characters every time, by text
+OPERATORS = {
+    "...": TT_SPREAD,
+    "//=": TT_IDE,
+    "//": TT_IDIV,
+    "/=": TT_DE,
+    "/": TT_DIV,
+    "+=": TT_PE,
+    "++": TT_PLUS_PLUS,
+    "+": TT_PLUS,
+    "-=": TT_ME,
+    "->": TT_ARROW,
+    "--": TT_MINUS_MINUS,
+    "-": TT_MINUS,
+    "*=": TT_TE,
+    "*": TT_MUL,
+    "%=": TT_MDE,
+    "%": TT_MOD,
+    "^=": TT_POWE,
+    "^": TT_POW,
+    "==": TT_EE,
+    "=": TT_EQ,
+    "<=": TT_LTE,
+    "<": TT_LT,
+    ">=": TT_GTE,
+    ">": TT_GT,
+    "!=": TT_NE,
+    ".": TT_DOT,
+}
+# Tokens of one character, which end where they start
+PUNCTUATION = {
+    ";": TT_NEWLINE,
+    "\n": TT_NEWLINE,
+    ":": TT_COLON,
+    "(": TT_LPAREN,
+    ")": TT_RPAREN,
+    "{": TT_LBRACE,
+    "}": TT_RBRACE,
+    "[": TT_LSQUARE,
+    "]": TT_RSQUARE,
+    ",": TT_COMMA,
+}
+KEYWORD_SET = frozenset(KEYWORDS)
+
+# Matches the token starting at a position, the name of the group which matched is the kind of token. Strings and
+# comments only match their first characters, the rest is matched by STRING_BODY and MULTI_LINE_COMMENT_BODY.
+TOKEN = re.compile(
+    r"(?P<space>[ \t]+)"
+    r"|(?P<punctuation>[;\n:(){}\[\],])"
+    r"|(?P<identifier>[A-Za-z$_][A-Za-z0-9$_]*)"
+    r"|(?P<number>[0-9]+(?:\.[0-9]*)?)"
+    r'|(?P<string>")'
+    r"|(?P<multi_line_comment>#!)"
+    r"|(?P<comment>#[^\n]*)"
+    r"|(?P<operator>" + "|".join(re.escape(op) for op in sorted(OPERATORS, key=len, reverse=True)) + ")"
+)
+# Up to the closing quote: a quote after a backslash is part of the string
+STRING_BODY = re.compile(r'(?:[^"]+|(?<=\\)")*')
+# Up to the closing `!#`: a `!` and the character after it never start it, so `!!#` does not end the comment. The
+# group matches a `!` at the end of the text, which skips one character past it.
+MULTI_LINE_COMMENT_BODY = re.compile(r"(?:[^!]+|![^#])*(?:!#|(!))?")
+
+
 class Lexer:
+    """Splits source code into tokens.
+
+    Every token is matched by a regular expression and sliced out of the text at once. The line and column of
+    positions are counted from the start of the current line, which only moves on newlines.
+    """
+
     fn: str
     text: str
-    pos: Position
-    current_char: Optional[str]
+    # Line of the current token and index of the first character of that line
+    ln: int
+    line_start: int
 
     def __init__(self, fn: str, text: str) -> None:
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
-        self.current_char = None
-        self.advance()
+        self.ln = 0
+        self.line_start = 0
+
+    def position(self, idx: int) -> Position:
+        """Return the position of `idx`, on the current line"""
+        return Position(idx, self.ln, idx - self.line_start, self.fn, self.text)
 
-    def advance(self) -> None:
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
+    def skip_lines(self, start: int, end: int) -> None:
+        """Move the current line past the newlines between `start` and `end`"""
+        newlines = self.text.count("\n", start, end)
+        if newlines > 0:
+            self.ln += newlines
+            self.line_start = self.text.rfind("\n", start, end) + 1
 
     def make_tokens(self) -> tuple[list[Token], Optional[Error]]:
         tokens: list[Token] = []
-
-        while self.current_char is not None:
-            if self.current_char in " \t":
-                self.advance()
-            elif self.current_char == "#":
-                self.skip_comment()
-            elif self.current_char in ";\n":
-                tokens.append(Token(TT_NEWLINE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "\\":
-                self.advance()
-                if self.current_char != "\n":
-                    return tokens, ExpectedCharError(self.pos, self.pos, "newline (after line continuation char)")
-                self.advance()
-            elif self.current_char in DIGITS:
-                tokens.append(self.make_number())
-            elif self.current_char in VALID_IDENTIFIERS:
-                tokens.append(self.make_identifier())
-            elif self.current_char == '"':
-                tokens.append(self.make_string())
-            elif self.current_char == ":":
-                tokens.append(Token(TT_COLON, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "+":
-                tokens.append(self.make_plus_equals())
-            elif self.current_char == "-":
-                tokens.append(self.make_minus_equals())
-            elif self.current_char == "*":
-                tokens.append(self.make_times_equals())
-            elif self.current_char == "/":
-                tokens.append(self.make_divide_equals())
-            elif self.current_char == "%":
-                tokens.append(self.make_mod_equals())
-            elif self.current_char == "^":
-                tokens.append(self.make_power_equals())
-            elif self.current_char == "(":
-                tokens.append(Token(TT_LPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ")":
-                tokens.append(Token(TT_RPAREN, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "{":
-                tokens.append(Token(TT_LBRACE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "}":
-                tokens.append(Token(TT_RBRACE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "[":
-                tokens.append(Token(TT_LSQUARE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == "]":
-                tokens.append(Token(TT_RSQUARE, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ":":
-                tokens.append(Token(TT_COLON, pos_start=self.pos))
-                self.advance()
-            elif self.current_char == ".":
-                tokens.append(self.make_dot())
-            elif self.current_char == "!":
-                token, error = self.make_not_equals()
-                if error is not None:
-                    return [], error
-                assert isinstance(token, Token)
-                tokens.append(token)
-            elif self.current_char == "=":
-                tokens.append(self.make_equals())
-            elif self.current_char == "<":
-                tokens.append(self.make_less_than())
-            elif self.current_char == ">":
-                tokens.append(self.make_greater_than())
-            elif self.current_char == ",":
-                tokens.append(Token(TT_COMMA, pos_start=self.pos))
-                self.advance()
+        text = self.text
+        length = len(text)
+        match_token = TOKEN.match
+        idx = 0
+
+        while idx < length:
+            m = match_token(text, idx)
+            if m is None:
+                if text[idx] == "\\":
+                    # Line continuation
+                    if text.startswith("\n", idx + 1):
+                        idx += 2
+                        self.ln += 1
+                        self.line_start = idx
+                        continue
+                    pos = self.position(idx + 1)
+                    return tokens, ExpectedCharError(pos, pos, "newline (after line continuation char)")
+                if text[idx] == "!":
+                    # Not followed by `=`, the character after it is skipped too
+                    pos_start = self.position(idx)
+                    self.skip_lines(idx, idx + 2)
+                    return [], ExpectedCharError(pos_start, self.position(idx + 2), "'=' (after '!')")
+                return [], IllegalCharError(self.position(idx), self.position(idx + 1), "'" + text[idx] + "'")
+
+            kind = m.lastgroup
+            end = m.end()
+            if kind == "space" or kind == "comment":
+                pass
+            elif kind == "punctuation":
+                char = m.group()
+                tokens.append(Token(PUNCTUATION[char], pos_start=self.position(idx)))
+                if char == "\n":
+                    self.ln += 1
+                    self.line_start = end
+            elif kind == "identifier":
+                id_str = m.group()
+                tok_type = TT_KEYWORD if id_str in KEYWORD_SET else TT_IDENTIFIER
+                tokens.append(Token(tok_type, id_str, pos_start=self.position(idx), pos_end=self.position(end)))
+            elif kind == "number":
+                num_str = m.group()
+                if "." in num_str:
+                    tok = Token(TT_FLOAT, float(num_str), pos_start=self.position(idx), pos_end=self.position(end))
+                else:
+                    tok = Token(TT_INT, int(num_str), pos_start=self.position(idx), pos_end=self.position(end))
+                tokens.append(tok)
+            elif kind == "string":
+                tokens.append(self.make_string(idx))
+                end = tokens[-1].pos_end.idx
+            elif kind == "multi_line_comment":
+                end = self.skip_multi_line_comment(end)
             else:
-                pos_start = self.pos.copy()
-                char = self.current_char
-                self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
+                tok_type = OPERATORS[m.group()]
+                tokens.append(Token(tok_type, pos_start=self.position(idx), pos_end=self.position(end)))
+            idx = end
 
-        tokens.append(Token(TT_EOF, pos_start=self.pos))
+        tokens.append(Token(TT_EOF, pos_start=self.position(idx)))
         return tokens, None
 
-    def make_number(self) -> Token:
-        num_str = ""
-        dot_count = 0
-        pos_start = self.pos.copy()
-
-        while self.current_char is not None and self.current_char in DIGITS + ".":
-            if self.current_char == ".":
-                if dot_count == 1:
-                    break
-                dot_count += 1
-            num_str += self.current_char
-            self.advance()
-
-        if dot_count == 0:
-            return Token(TT_INT, int(num_str), pos_start=pos_start, pos_end=self.pos)
-        else:
-            return Token(TT_FLOAT, float(num_str), pos_start=pos_start, pos_end=self.pos)
-
-    def make_string(self) -> Token:
-        string = ""
-        pos_start = self.pos.copy()
-        escape_character = False
-        self.advance()
-
-        while self.current_char is not None and (self.current_char != '"' or escape_character):
-            if self.current_char == "\\":
-                escape_character = True
-            else:
-                escape_character = False
-            string += self.current_char
-            self.advance()
-
-        self.advance()
-        return Token(TT_STRING, string.encode("utf-8").decode("unicode-escape"), pos_start=pos_start, pos_end=self.pos)
-
-    def make_identifier(self) -> Token:
-        id_str = ""
-        pos_start = self.pos.copy()
-
-        while self.current_char is not None and self.current_char in VALID_IDENTIFIERS:
-            id_str += self.current_char
-            self.advance()
-
-        tok_type = TT_KEYWORD if id_str in KEYWORDS else TT_IDENTIFIER
-        return Token(tok_type, id_str, pos_start=pos_start, pos_end=self.pos)
-
-    def make_not_equals(self) -> tuple[Token, None] | tuple[None, Error]:
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            return Token(TT_NE, pos_start=pos_start, pos_end=self.pos), None
-
-        self.advance()
-        return None, ExpectedCharError(pos_start, self.pos, "'=' (after '!')")
-
-    def make_equals(self) -> Token:
-        tok_type = TT_EQ
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            tok_type = TT_EE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_less_than(self) -> Token:
-        tok_type = TT_LT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            tok_type = TT_LTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_greater_than(self) -> Token:
-        tok_type = TT_GT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            tok_type = TT_GTE
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_plus_equals(self) -> Token:
-        tok_type = TT_PLUS
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            tok_type = TT_PE
-            self.advance()
-        elif self.current_char == "+":
-            tok_type = TT_PLUS_PLUS
-            self.advance()
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_minus_equals(self) -> Token:
-        tok_type = TT_MINUS
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            tok_type = TT_ME
-            self.advance()
-
-        elif self.current_char == ">":
-            tok_type = TT_ARROW
-            self.advance()
-        elif self.current_char == "-":
-            tok_type = TT_MINUS_MINUS
-            self.advance()
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_times_equals(self) -> Token:
-        tok_type = TT_MUL
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            tok_type = TT_TE
-            self.advance()
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_divide_equals(self) -> Token:
-        tok_type = TT_DIV
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            tok_type = TT_DE
-            self.advance()
-        elif self.current_char == "/":
-            tok_type = TT_IDIV
-            self.advance()
-            if self.current_char == "=":
-                tok_type = TT_IDE
-                self.advance()
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_mod_equals(self) -> Token:
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            self.advance()
-            return Token(TT_MDE, pos_start=pos_start, pos_end=self.pos)
-        return Token(TT_MOD, pos_start=pos_start, pos_end=self.pos)
-
-    def make_power_equals(self) -> Token:
-        tok_type = TT_POW
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == "=":
-            tok_type = TT_POWE
-            self.advance()
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
-
-    def make_dot(self) -> Token:
-        tok_type = TT_DOT
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.text[self.pos.idx :].startswith(".."):
-            self.advance()
-            self.advance()
-            tok_type = TT_SPREAD
-
-        return Token(tok_type, pos_start=pos_start, pos_end=self.pos.copy())
-
-    def skip_comment(self) -> None:
-        multi_line = False
-        self.advance()
-
-        if self.current_char == "!":
-            multi_line = True
-            self.advance()
-
-        while True:
-            if self.current_char is None:
-                return
-            if multi_line:
-                if self.current_char == "!":
-                    self.advance()
-                    if self.current_char == "#":
-                        self.advance()
-                        return
-            else:
-                if self.current_char == "\n":
-                    return
-            self.advance()
+    def make_string(self, idx: int) -> Token:
+        """Return the string token starting at the quote at `idx`"""
+        pos_start = self.position(idx)
+        body = STRING_BODY.match(self.text, idx + 1)
+        assert body is not None
+        string = body.group()
+        # Without a closing quote, the string ends one character past the end of the text
+        end = body.end() + 1
+        self.skip_lines(idx, end)
+        return Token(
+            TT_STRING, string.encode("utf-8").decode("unicode-escape"), pos_start=pos_start, pos_end=self.position(end)
+        )
+
+    def skip_multi_line_comment(self, idx: int) -> int:
+        """Return the index after the multi-line comment whose body starts at `idx`"""
+        body = MULTI_LINE_COMMENT_BODY.match(self.text, idx)
+        assert body is not None
+        end = body.end() if body.group(1) is None else body.end() + 1
+        self.skip_lines(idx, end)
+        return end
@@ -59,14 +59,36 @@ class StringNode:
         return f"{self.tok}"
 
 
+class BooleanNode:
+    """A boolean known before running the program, e.g. a folded comparison. The parser never emits it."""
+
+    value: bool
+
+    pos_start: Position
+    pos_end: Position
+
+    def __init__(self, value: bool, pos_start: Position, pos_end: Position) -> None:
+        self.value = value
+
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
+    def __repr__(self) -> str:
+        return "true" if self.value else "false"
+
+
 class ArrayNode:
     element_nodes: list[Node]
+    # Whether the value is never used, as for the body of a loop, so that the elements are evaluated for their effects
+    # only and no Array is built, decided by the optimizer
+    should_return_null: bool
 
     pos_start: Position
     pos_end: Position
 
     def __init__(self, element_nodes: list[Node], pos_start: Position, pos_end: Position) -> None:
         self.element_nodes = element_nodes
+        self.should_return_null = False
 
         self.pos_start = pos_start
         self.pos_end = pos_end
@@ -74,12 +96,15 @@ class ArrayNode:
 
 class VarAccessNode:
     var_name_tok: Token
+    # How many scopes up the variable is declared, filled in by the resolver (None: look it up dynamically)
+    depth: Optional[int]
 
     pos_start: Position
     pos_end: Position
 
     def __init__(self, var_name_tok: Token) -> None:
         self.var_name_tok = var_name_tok
+        self.depth = None
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.var_name_tok.pos_end
@@ -90,6 +115,7 @@ class VarAssignNode:
     value_node: Node
     extra_names: list[Token]
     qualifier: Optional[Token]
+    depth: Optional[int]
 
     pos_start: Position
     pos_end: Position
@@ -101,6 +127,7 @@ class VarAssignNode:
         self.value_node = value_node
         self.extra_names = extra_names
         self.qualifier = qualifier
+        self.depth = None
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = (
@@ -184,10 +211,17 @@ class UnaryOpNode:
 
 Case: TypeAlias = tuple[Node, Node, bool]
 
+# How the body of an if/for/while is scoped, decided by the resolver
+SCOPE_NEW = 0  # A new symbol table every time the block runs
+SCOPE_SHARED = 1  # The enclosing symbol table, as the block declares nothing
+SCOPE_REUSED = 2  # One symbol table for the whole loop, cleared before each iteration
+
 
 class IfNode:
     cases: list[Case]
     else_case: Optional[tuple[Node, bool]]
+    # Scope of each case, then of the else case
+    scopes: list[int]
 
     pos_start: Position
     pos_end: Position
@@ -195,6 +229,7 @@ class IfNode:
     def __init__(self, cases: list[Case], else_case: Optional[tuple[Node, bool]]):
         self.cases = cases
         self.else_case = else_case
+        self.scopes = [SCOPE_NEW] * (len(cases) + (else_case is not None))
 
         self.pos_start = self.cases[0][0].pos_start
         self.pos_end = (else_case or cases[len(self.cases) - 1])[0].pos_end
@@ -208,6 +243,7 @@ class ForNode:
 
     body_node: Node
     should_return_null: bool
+    body_scope: int
 
     pos_start: Position
     pos_end: Position
@@ -227,6 +263,7 @@ class ForNode:
         self.step_value_node = step_value_node
         self.body_node = body_node
         self.should_return_null = should_return_null
+        self.body_scope = SCOPE_NEW
 
         self.pos_start = self.var_name_tok.pos_start
         self.pos_end = self.body_node.pos_end
@@ -236,6 +273,7 @@ class WhileNode:
     condition_node: Node
     body_node: Node
     should_return_null: bool
+    body_scope: int
 
     pos_start: Position
     pos_end: Position
@@ -244,6 +282,7 @@ class WhileNode:
         self.condition_node = condition_node
         self.body_node = body_node
         self.should_return_null = should_return_null
+        self.body_scope = SCOPE_NEW
 
         self.pos_start = self.condition_node.pos_start
         self.pos_end = self.body_node.pos_end
@@ -264,6 +303,9 @@ class FuncDefNode:
     pos_start: Position
     pos_end: Position
 
+    # Whether the body yields, making calls return an iterator over what it yields, decided by the resolver
+    generator: bool = False
+
 
 class CallNode:
     node_to_call: Node
@@ -293,6 +335,17 @@ class ReturnNode:
     pos_start: Position
     pos_end: Position
 
+    # Whether this returns a call that can replace the call of the function returning, decided by the resolver
+    tail_call: bool = False
+
+
+@dataclass
+class YieldNode:
+    node_to_yield: Optional[Node]
+
+    pos_start: Position
+    pos_end: Position
+
 
 @dataclass
 class ContinueNode:
@@ -407,6 +460,8 @@ class IncNode:
     pos_start: Position
     pos_end: Position
 
+    depth: Optional[int] = None
+
 
 @dataclass
 class DecNode:
@@ -418,6 +473,8 @@ class DecNode:
     pos_start: Position
     pos_end: Position
 
+    depth: Optional[int] = None
+
 
 @dataclass
 class SwitchNode:
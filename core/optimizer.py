@@ -0,0 +1,327 @@
+"""Optimizations of the AST, run between parsing and interpretation.
+
+Folds the operations of literal operands, e.g. `60 * 60 * 24`, `"a" + "b"` or `1 < 2`, into a single literal node so
+that they are computed once instead of every time they run. Folding goes through the same `Value` methods as the
+interpreter, and an operation that would fail at runtime (`1 / 0`, `"a" - 1`) is left alone so that it still fails
+where and when it used to. So is one whose result would be large (`7 ^ 30000000`, `"ab" * 4000000000`), which may
+never run at all.
+
+Then drops the cases of an `if` that can never run because their condition is a literal, and everything after a case
+whose literal condition always holds.
+
+Finally marks the blocks whose value is never used: the bodies of loops and `if` cases evaluating to null, and of
+functions without an automatic return. They run their statements without collecting the values into an Array.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from core.datatypes import Boolean, Number, String, Value
+from core.nodes import (
+    ArrayNode,
+    AssertNode,
+    AttrAccessNode,
+    BinOpNode,
+    BooleanNode,
+    CallNode,
+    ClassNode,
+    ForInNode,
+    ForNode,
+    FuncDefNode,
+    HashMapNode,
+    IfNode,
+    IndexGetNode,
+    IndexSetNode,
+    Node,
+    NumberNode,
+    RaiseNode,
+    ReturnNode,
+    SCOPE_NEW,
+    SliceGetNode,
+    StringNode,
+    SwitchNode,
+    TryNode,
+    UnaryOpNode,
+    UnitRaiseNode,
+    VarAssignNode,
+    WhileNode,
+    YieldNode,
+)
+from core.tokens import (
+    TT_DIV,
+    TT_EE,
+    TT_FLOAT,
+    TT_GT,
+    TT_GTE,
+    TT_IDIV,
+    TT_INT,
+    TT_KEYWORD,
+    TT_LT,
+    TT_LTE,
+    TT_MINUS,
+    TT_MOD,
+    TT_MUL,
+    TT_NE,
+    TT_PLUS,
+    TT_POW,
+    TT_STRING,
+    Token,
+    TokenType,
+)
+
+# Set to False to run programs exactly as parsed (`radon.py --no-optimize`)
+enabled = True
+
+# Largest result folded, in characters of a string and bits of an integer. Bigger results are left to be computed when
+# the operation runs, if it ever does, rather than every time the program starts
+MAX_FOLDED_SIZE = 4096
+
+# Operators folded when both operands are literals, by the `Value` method implementing them
+FOLDABLE_OPS: dict[TokenType, str] = {
+    TT_PLUS: "added_to",
+    TT_MINUS: "subbed_by",
+    TT_MUL: "multed_by",
+    TT_DIV: "dived_by",
+    TT_IDIV: "idived_by",
+    TT_MOD: "modded_by",
+    TT_POW: "powed_by",
+    TT_EE: "get_comparison_eq",
+    TT_NE: "get_comparison_ne",
+    TT_LT: "get_comparison_lt",
+    TT_GT: "get_comparison_gt",
+    TT_LTE: "get_comparison_lte",
+    TT_GTE: "get_comparison_gte",
+}
+
+
+def literal_value(node: Node) -> Optional[Value]:
+    """Return the value of a literal node, or None if `node` is not a literal"""
+    if isinstance(node, NumberNode) and isinstance(node.tok.value, int | float):
+        return Number(node.tok.value)
+    if isinstance(node, StringNode) and isinstance(node.tok.value, str):
+        return String(node.tok.value)
+    if isinstance(node, BooleanNode):
+        return Boolean.of(node.value)
+    return None
+
+
+def literal_node(value: Value, node: Node) -> Optional[Node]:
+    """Return a literal node for `value` spanning `node`, or None if `value` has no literal form"""
+    pos_start, pos_end = node.pos_start, node.pos_end
+    if isinstance(value, Boolean):
+        return BooleanNode(value.value, pos_start, pos_end)
+    if isinstance(value, Number) and type(value.value) in (int, float):
+        type_ = TT_INT if isinstance(value.value, int) else TT_FLOAT
+        return NumberNode(Token(type_, value.value, pos_start=pos_start, pos_end=pos_end))
+    if isinstance(value, String):
+        return StringNode(Token(TT_STRING, value.value, pos_start=pos_start, pos_end=pos_end))
+    return None
+
+
+def too_large(method_name: str, left: Value, right: Value) -> bool:
+    """Whether the result of `method_name` on `left` and `right` could be larger than MAX_FOLDED_SIZE"""
+    if not isinstance(right, Number):
+        return False
+    if method_name == "multed_by" and isinstance(left, String):
+        return len(left.value) * right.value > MAX_FOLDED_SIZE
+    if method_name == "powed_by" and isinstance(left, Number):
+        base, exponent = left.value, right.value
+        if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1:
+            return base.bit_length() * exponent > MAX_FOLDED_SIZE
+    return False
+
+
+def fold(node: Node, operation: Callable[[], tuple[Optional[Value], object]]) -> Node:
+    """Replace `node` with the literal result of `operation`, unless it fails"""
+    try:
+        result, error = operation()
+    except (ArithmeticError, ValueError, MemoryError):
+        # e.g. `1 % 0`, which raises instead of returning an error; leave it to the interpreter
+        return node
+    if error is not None or result is None:
+        return node
+    return literal_node(result, node) or node
+
+
+def discard(node: Node) -> None:
+    """Mark `node` as evaluated for its effects only, which saves building the Array of a block"""
+    if isinstance(node, ArrayNode):
+        node.should_return_null = True
+
+
+class Optimizer:
+    def visit(self, node: Node) -> Node:
+        method: Callable[[Node], Node] = getattr(self, f"visit_{type(node).__name__}", self.visit_leaf)
+        return method(node)
+
+    def visit_optional(self, node: Optional[Node]) -> Optional[Node]:
+        return None if node is None else self.visit(node)
+
+    def visit_leaf(self, node: Node) -> Node:
+        return node
+
+    ###################################
+
+    def visit_BinOpNode(self, node: BinOpNode) -> Node:
+        node.left_node = self.visit(node.left_node)
+        node.right_node = self.visit(node.right_node)
+
+        method_name = FOLDABLE_OPS.get(node.op_tok.type)
+        left, right = literal_value(node.left_node), literal_value(node.right_node)
+        if method_name is None or left is None or right is None or too_large(method_name, left, right):
+            return node
+        return fold(node, lambda: getattr(left, method_name)(right))
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode) -> Node:
+        node.node = self.visit(node.node)
+
+        operand = literal_value(node.node)
+        if operand is None:
+            return node
+        if node.op_tok.type == TT_MINUS:
+            return fold(node, lambda: operand.multed_by(Number.of(-1)))
+        if node.op_tok.matches(TT_KEYWORD, "not"):
+            return fold(node, operand.notted)
+        return node
+
+    def visit_IfNode(self, node: IfNode) -> Node:
+        cases = []
+        else_case = node.else_case
+        for condition, expr, should_return_null in node.cases:
+            condition = self.visit(condition)
+            value = literal_value(condition)
+            if value is None:
+                cases.append((condition, expr, should_return_null))
+            elif value.is_true():
+                # Every case after this one, and the else case, can never run
+                cases.append((condition, expr, should_return_null))
+                else_case = None
+                break
+            # A literal false condition never runs its case
+
+        # With no case left, the `if` evaluates to its else case, or to null without one
+        node.cases = [
+            (condition, self.visit(expr), should_return_null) for condition, expr, should_return_null in cases
+        ]
+        node.else_case = None if else_case is None else (self.visit(else_case[0]), else_case[1])
+        for _, expr, should_return_null in node.cases:
+            if should_return_null:
+                discard(expr)
+        if node.else_case is not None and node.else_case[1]:
+            discard(node.else_case[0])
+        node.scopes = [SCOPE_NEW] * (len(node.cases) + (node.else_case is not None))
+        return node
+
+    def visit_ArrayNode(self, node: ArrayNode) -> Node:
+        node.element_nodes = [self.visit(element_node) for element_node in node.element_nodes]
+        return node
+
+    def visit_VarAssignNode(self, node: VarAssignNode) -> Node:
+        node.value_node = self.visit(node.value_node)
+        return node
+
+    def visit_RaiseNode(self, node: RaiseNode) -> Node:
+        self.visit_CallNode(node.call)
+        return node
+
+    def visit_UnitRaiseNode(self, node: UnitRaiseNode) -> Node:
+        node.func = self.visit(node.func)
+        return node
+
+    def visit_ForNode(self, node: ForNode) -> Node:
+        node.start_value_node = self.visit(node.start_value_node)
+        node.end_value_node = self.visit(node.end_value_node)
+        node.step_value_node = self.visit_optional(node.step_value_node)
+        node.body_node = self.visit(node.body_node)
+        if node.should_return_null:
+            discard(node.body_node)
+        return node
+
+    def visit_WhileNode(self, node: WhileNode) -> Node:
+        node.condition_node = self.visit(node.condition_node)
+        node.body_node = self.visit(node.body_node)
+        if node.should_return_null:
+            discard(node.body_node)
+        return node
+
+    def visit_FuncDefNode(self, node: FuncDefNode) -> Node:
+        node.defaults = [self.visit_optional(default) for default in node.defaults]
+        node.body_node = self.visit(node.body_node)
+        if not node.should_auto_return:
+            discard(node.body_node)
+        return node
+
+    def visit_CallNode(self, node: CallNode) -> Node:
+        node.node_to_call = self.visit(node.node_to_call)
+        node.arg_nodes = [self.visit(arg_node) for arg_node in node.arg_nodes]
+        node.kwarg_nodes = {name: self.visit(kwarg_node) for name, kwarg_node in node.kwarg_nodes.items()}
+        return node
+
+    def visit_ReturnNode(self, node: ReturnNode) -> Node:
+        node.node_to_return = self.visit_optional(node.node_to_return)
+        return node
+
+    def visit_YieldNode(self, node: YieldNode) -> Node:
+        node.node_to_yield = self.visit_optional(node.node_to_yield)
+        return node
+
+    def visit_TryNode(self, node: TryNode) -> Node:
+        node.try_block = self.visit(node.try_block)
+        node.catch_block = self.visit(node.catch_block)
+        return node
+
+    def visit_ForInNode(self, node: ForInNode) -> Node:
+        node.iterable_node = self.visit(node.iterable_node)
+        node.body_node = self.visit(node.body_node)
+        if node.should_return_null:
+            discard(node.body_node)
+        return node
+
+    def visit_SliceGetNode(self, node: SliceGetNode) -> Node:
+        node.indexee = self.visit(node.indexee)
+        node.index_start = self.visit(node.index_start)
+        node.index_end = self.visit_optional(node.index_end)
+        node.index_step = self.visit_optional(node.index_step)
+        return node
+
+    def visit_IndexGetNode(self, node: IndexGetNode) -> Node:
+        node.indexee = self.visit(node.indexee)
+        node.index = self.visit(node.index)
+        return node
+
+    def visit_IndexSetNode(self, node: IndexSetNode) -> Node:
+        node.indexee = self.visit(node.indexee)
+        node.index = self.visit(node.index)
+        node.value = self.visit(node.value)
+        return node
+
+    def visit_HashMapNode(self, node: HashMapNode) -> Node:
+        node.pairs = [(self.visit(key_node), self.visit(value_node)) for key_node, value_node in node.pairs]
+        return node
+
+    def visit_ClassNode(self, node: ClassNode) -> Node:
+        node.body_nodes = self.visit(node.body_nodes)
+        return node
+
+    def visit_AssertNode(self, node: AssertNode) -> Node:
+        node.condition = self.visit(node.condition)
+        node.message = self.visit_optional(node.message)
+        return node
+
+    def visit_SwitchNode(self, node: SwitchNode) -> Node:
+        node.subject_node = self.visit(node.subject_node)
+        node.cases = [(self.visit(expr), self.visit(body)) for expr, body in node.cases]
+        node.default = self.visit_optional(node.default)
+        return node
+
+    def visit_AttrAccessNode(self, node: AttrAccessNode) -> Node:
+        node.node_to_access = self.visit(node.node_to_access)
+        return node
+
+
+def optimize(node: Node) -> Node:
+    """Return the optimized AST of a whole program, reusing the nodes of `node`"""
+    if not enabled:
+        return node
+    return Optimizer().visit(node)
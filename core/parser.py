@@ -41,6 +41,7 @@ from core.nodes import (
     VarAccessNode,
     VarAssignNode,
     WhileNode,
+    YieldNode,
 )
 from core.tokens import (
     TT_ARROW,
@@ -280,6 +281,22 @@ class Parser:
                 self.reverse(res.to_reverse_count)
             return res.success(ReturnNode(expr, pos_start, self.current_tok.pos_start.copy()))
 
+        if self.current_tok.matches(TT_KEYWORD, "yield"):
+            if not self.in_func:
+                return res.failure(
+                    RNSyntaxError(
+                        self.current_tok.pos_start,
+                        self.current_tok.pos_end,
+                        "Yield statement must be inside a function",
+                    )
+                )
+            self.advance(res)
+
+            expr = res.try_register(self.expr())
+            if expr is None:
+                self.reverse(res.to_reverse_count)
+            return res.success(YieldNode(expr, pos_start, self.current_tok.pos_start.copy()))
+
         if self.current_tok.matches(TT_KEYWORD, "continue"):
             if not self.in_loop:
                 return res.failure(
@@ -1718,79 +1735,132 @@ class Parser:
         return res.success(left)
 
 
+# Control flow flags of an `RTResult`
+FLAG_RETURN = 1
+FLAG_CONTINUE = 2
+FLAG_BREAK = 4
+FLAG_EXIT = 8
+FLAG_FALLTHROUGH = 16
+FLAG_FALLOUT = 32
+# Set along with FLAG_RETURN when the function is to return the result of calling `return_value` with `tail_call_args`
+FLAG_TAIL_CALL = 64
+# Flags that unwind the evaluation of the enclosing nodes
+FLAGS_UNWIND = FLAG_RETURN | FLAG_CONTINUE | FLAG_BREAK | FLAG_EXIT
+
+
 class RTResult(Generic[T]):
-    """Runtime result"""
+    """Runtime result
+
+    Holds either a value or an error, plus the non-local control flow (return, continue, break, exit, fallthrough
+    and fallout) as bits of `flags`. A plain success only ever sets `value`, so it costs the result object and no
+    more. The value returned by `return` is kept apart in `return_value`, only meaningful with FLAG_RETURN set.
+    """
+
+    __slots__ = ("value", "error", "flags", "return_value", "tail_call_args")
 
     value: Optional[T]
     error: Optional[RTError | Error]
-    func_return_value: Optional[Value]
-    loop_should_continue: bool
-    loop_should_break: bool
-    should_exit: bool
-    should_fallthrough: bool
-    should_fallout: bool
+    flags: int
+    return_value: Optional[Value]
+    tail_call_args: tuple[list[Value], dict[str, Value]]
+
+    if not TYPE_CHECKING:
+        # `RTResult[Value]()` would otherwise go through `typing` on every instantiation, which is several times
+        # slower than creating the result itself
+        def __class_getitem__(cls, item):
+            return cls
 
     def __init__(self) -> None:
-        self.reset()
+        self.value = None
+        self.error = None
+        self.flags = 0
 
     def reset(self) -> None:
         self.value = None
         self.error = None
-        self.func_return_value = None
-        self.loop_should_continue = False
-        self.loop_should_break = False
-        self.should_exit = False
-        self.should_fallthrough = False
-        self.should_fallout = False
+        self.flags = 0
+
+    @property
+    def func_return_value(self) -> Optional[Value]:
+        return self.return_value if self.flags & FLAG_RETURN else None
+
+    @property
+    def loop_should_continue(self) -> bool:
+        return bool(self.flags & FLAG_CONTINUE)
+
+    @property
+    def loop_should_break(self) -> bool:
+        return bool(self.flags & FLAG_BREAK)
+
+    @property
+    def should_exit(self) -> bool:
+        return bool(self.flags & FLAG_EXIT)
+
+    @property
+    def should_fallthrough(self) -> bool:
+        return bool(self.flags & FLAG_FALLTHROUGH)
+
+    @property
+    def should_fallout(self) -> bool:
+        return bool(self.flags & FLAG_FALLOUT)
 
     U = TypeVar("U")
 
     def register(self, res: RTResult[U]) -> Optional[U]:
         self.error = res.error
-        self.func_return_value = res.func_return_value
-        self.loop_should_continue = res.loop_should_continue
-        self.loop_should_break = res.loop_should_break
-        self.should_exit = res.should_exit
-        self.should_fallthrough = res.should_fallthrough
-        self.should_fallout = res.should_fallout
+        self.flags = flags = res.flags
+        if flags & FLAG_RETURN:
+            self.return_value = res.return_value
+            if flags & FLAG_TAIL_CALL:
+                self.tail_call_args = res.tail_call_args
         return res.value
 
     def success(self, value: T) -> RTResult[T]:
-        should_fallthrough = self.should_fallthrough  # Save `should_fallthrough` because we don't want to lose it
-        self.reset()
-        self.should_fallthrough = should_fallthrough
         self.value = value
+        self.error = None
+        if self.flags:
+            # Keep `should_fallthrough` because we don't want to lose it
+            self.flags &= FLAG_FALLTHROUGH
         return self
 
     def success_return(self, value: Value) -> RTResult[T]:
         self.reset()
-        self.func_return_value = value
+        self.flags = FLAG_RETURN
+        self.return_value = value
+        return self
+
+    def success_tail_call(self, func: Value, args: list[Value], kwargs: dict[str, Value]) -> RTResult[T]:
+        """Return from the function by calling `func`, which the function calling loop does in place of it"""
+        self.reset()
+        self.flags = FLAG_RETURN | FLAG_TAIL_CALL
+        self.return_value = func
+        self.tail_call_args = (args, kwargs)
         return self
 
     def success_continue(self) -> RTResult[T]:
         self.reset()
-        self.loop_should_continue = True
+        self.flags = FLAG_CONTINUE
         return self
 
     def success_break(self) -> RTResult[T]:
         self.reset()
-        self.loop_should_break = True
+        self.flags = FLAG_BREAK
         return self
 
     def success_exit(self, exit_value: T) -> RTResult[T]:
         self.reset()
-        self.should_exit = True
+        self.flags = FLAG_EXIT
         self.value = exit_value
         return self
 
     def fallthrough(self) -> RTResult[T]:
         # No `self.reset()` because this is meant to be used in conjunction with other methods
         # e.g. `res.success(Null.null()).fallthrough()`
-        self.should_fallthrough = True
+        self.flags |= FLAG_FALLTHROUGH
         return self
 
     def fallout(self) -> RTResult[T]:
-        self.should_fallout = True
+        self.flags |= FLAG_FALLOUT
         return self
 
     def failure(self, error: Error) -> RTResult[T]:
@@ -1800,13 +1870,7 @@ class RTResult(Generic[T]):
 
     def should_return(self) -> bool:
         # Note: this will allow you to continue and break outside the current function
-        return bool(
-            self.error is not None
-            or self.func_return_value is not None
-            or self.loop_should_continue
-            or self.loop_should_break
-            or self.should_exit
-        )
+        return self.error is not None or self.flags & FLAGS_UNWIND != 0
 
     def __repr__(self) -> str:
         return (
@@ -1826,22 +1890,59 @@ class SymbolTable:
     consts: set[str]
     statics: set[str]
     parent: Optional[SymbolTable]
+    # Read-only tables (the builtins) are shadowed by assignments from child scopes instead of being modified
+    read_only: bool
 
-    def __init__(self, parent: Optional[SymbolTable] = None) -> None:
+    def __init__(self, parent: Optional[SymbolTable] = None, read_only: bool = False) -> None:
         self.symbols = {}
         self.consts = set()
         self.statics = set()
         self.parent = parent
+        self.read_only = read_only
+
+    def copy(self) -> SymbolTable:
+        copy = SymbolTable(self.parent, self.read_only)
+        copy.symbols = self.symbols.copy()
+        copy.consts = self.consts.copy()
+        copy.statics = self.statics.copy()
+        return copy
+
+    def clear(self) -> None:
+        self.symbols.clear()
+        self.consts.clear()
+        self.statics.clear()
 
     @property
     def is_global(self) -> bool:
         return self.parent is None
 
     def get(self, name: str) -> Optional[Value]:
-        value = self.symbols.get(name, None)
-        if value is None and self.parent:
-            return self.parent.get(name)
-        return value
+        table: Optional[SymbolTable] = self
+        while table is not None:
+            value = table.symbols.get(name)
+            if value is not None:
+                return value
+            table = table.parent
+        return None
+
+    def ancestor(self, depth: int) -> Optional[SymbolTable]:
+        table: Optional[SymbolTable] = self
+        while depth > 0 and table is not None:
+            table = table.parent
+            depth -= 1
+        return table
+
+    def get_at(self, name: str, depth: int) -> Optional[Value]:
+        """Like `get`, looking in the table `depth` levels up first (see `core.resolver`)"""
+        table: Optional[SymbolTable] = self
+        while depth > 0 and table is not None:
+            table = table.parent
+            depth -= 1
+        if table is not None:
+            value = table.symbols.get(name)
+            if value is not None:
+                return value
+        return self.get(name)
 
     def set(self, name: str, value: Value) -> RTResult[None]:
         if name in self.consts:
@@ -1860,8 +1961,10 @@ class SymbolTable:
             case None:
                 if name in self.symbols:
                     self.symbols[name] = value
-                elif self.parent is not None:
+                elif self.parent is not None and not self.parent.read_only:
                     self.parent.set_var(name, value, qualifier)
+                elif self.parent is not None and self.parent.get(name) is not None:
+                    self.symbols[name] = value
                 else:
                     return RTResult[None]().failure(
                         RTError(
@@ -1885,6 +1988,14 @@ class SymbolTable:
                 pass
         return RTResult[None]().success(None)
 
+    def set_var_at(self, name: str, value: Value, depth: int) -> RTResult[None]:
+        """Like `set_var` without a qualifier, assigning in the table `depth` levels up if the variable is there"""
+        table = self.ancestor(depth)
+        if table is not None and name in table.symbols and name not in table.consts:
+            table.symbols[name] = value
+            return RTResult[None]().success(None)
+        return self.set_var(name, value)
+
     def set_static(self, name: str, value: Value, qualifier: Optional[str] = None) -> RTResult[None]:
         res = RTResult[None]()
         res.register(self.set_var(name, value, qualifier))
@@ -1900,9 +2011,9 @@ class SymbolTable:
         val = self.symbols.get(name, None)
         if val is not None:
             del self.symbols[name]
-            return res.success(Boolean(True))
+            return res.success(Boolean.true())
         else:
-            return res.success(Boolean(False))
+            return res.success(Boolean.false())
 
 
 @dataclass
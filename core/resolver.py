@@ -0,0 +1,379 @@
+"""Static scope resolution.
+
+Annotates variable nodes with the `depth` of the scope declaring them, i.e. how many symbol tables up from the one
+they are evaluated in, so that the interpreter can go straight to that table instead of searching every scope in
+between. Symbol tables stay dictionaries: a name that is missing at its resolved depth (declared later, only on some
+paths, or shadowed dynamically) is looked up the usual way, so the depth is only ever a shortcut.
+
+Also decides how the bodies of if/for/while are scoped: blocks declaring nothing share the enclosing symbol table,
+and loop bodies that no function or class can capture reuse a single one. And marks the `return f(...)` statements
+that can be tail calls, i.e. whose function has nothing left to do once the call returns: those in a function body,
+and not within a `try` that could still catch the errors of the call. Only calls to the function itself by name are
+marked, as eliminating a call drops the frame of the caller from tracebacks, which is only fine when the frame left is
+the same function's.
+
+Finally marks the functions whose body yields as generators. Their `return` statements are never tail calls, as a
+generator only stops when it returns, without passing on the value.
+"""
+
+from __future__ import annotations
+
+from operator import attrgetter, methodcaller
+from typing import TYPE_CHECKING, Callable, Optional
+
+from core.nodes import (
+    ArrayNode,
+    AssertNode,
+    AttrAccessNode,
+    BinOpNode,
+    CallNode,
+    ClassNode,
+    DecNode,
+    ForInNode,
+    ForNode,
+    FromImportNode,
+    FuncDefNode,
+    HashMapNode,
+    IfNode,
+    ImportNode,
+    SCOPE_NEW,
+    SCOPE_REUSED,
+    SCOPE_SHARED,
+    IncNode,
+    IndexGetNode,
+    IndexSetNode,
+    Node,
+    RaiseNode,
+    ReturnNode,
+    SliceGetNode,
+    SwitchNode,
+    TryNode,
+    UnaryOpNode,
+    UnitRaiseNode,
+    VarAccessNode,
+    VarAssignNode,
+    WhileNode,
+    YieldNode,
+)
+
+if TYPE_CHECKING:
+    from core.datatypes import Value
+    from core.parser import SymbolTable
+
+# Names bound at runtime without a declaration, which must always be looked up dynamically
+DYNAMIC_NAMES = {"this"}
+
+VariableNode = VarAccessNode | VarAssignNode | IncNode | DecNode
+
+
+class Scope:
+    """A scope of the program, mirroring one symbol table created by the interpreter"""
+
+    parent: Optional[Scope]
+    names: set[str]
+    # Class scopes can gain attributes from anywhere (`Class.attr = value`), so lookups never skip over them
+    is_class: bool
+    # Whether this is the body of an if/for/while, and whether a function or class defined in it keeps it alive
+    is_block: bool
+    captured: bool
+
+    def __init__(self, parent: Optional[Scope], is_class: bool = False, is_block: bool = False) -> None:
+        self.parent = parent
+        self.names = set()
+        self.is_class = is_class
+        self.is_block = is_block
+        self.captured = False
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether the block has no symbol table of its own"""
+        return self.is_block and len(self.names) == 0 and not self.captured
+
+    def block_scope(self, in_loop: bool) -> int:
+        if self.is_shared:
+            return SCOPE_SHARED
+        if in_loop and not self.captured:
+            return SCOPE_REUSED
+        return SCOPE_NEW
+
+    def depth_of(self, name: str) -> Optional[int]:
+        """Return how many scopes up `name` is declared, or None if it must be looked up dynamically"""
+        if name in DYNAMIC_NAMES:
+            return None
+        depth = 0
+        scope: Optional[Scope] = self
+        while scope is not None:
+            if name in scope.names:
+                return depth
+            if scope.is_class:
+                return None
+            if not scope.is_shared:
+                depth += 1
+            scope = scope.parent
+        return None
+
+
+class Resolver:
+    scope: Scope
+    references: list[tuple[VariableNode, str, Scope]]
+    blocks: list[tuple[IfNode | ForNode | WhileNode, list[Scope]]]
+    # Whether a `return` being visited directly leaves the function it is in
+    in_tail_position: bool
+    # The function whose body is being visited, if any, and its `return` statements
+    function: Optional[FuncDefNode]
+    returns: list[ReturnNode]
+
+    def __init__(self) -> None:
+        self.scope = Scope(None)
+        self.references = []
+        self.blocks = []
+        self.in_tail_position = False
+        self.function = None
+        self.returns = []
+
+    def resolve(self, node: Node) -> None:
+        self.visit(node)
+        # Resolve once every declaration is known, as a name may be used before the statement declaring it
+        for ref_node, name, scope in self.references:
+            ref_node.depth = scope.depth_of(name)
+        for block_node, scopes in self.blocks:
+            if isinstance(block_node, IfNode):
+                block_node.scopes = [scope.block_scope(in_loop=False) for scope in scopes]
+            else:
+                block_node.body_scope = scopes[0].block_scope(in_loop=True)
+
+    def visit(self, node: Optional[Node]) -> None:
+        if node is None:
+            return
+        method: Callable[[Node], None] = getattr(self, f"visit_{type(node).__name__}", self.visit_leaf)
+        method(node)
+
+    def visit_leaf(self, node: Node) -> None:
+        pass
+
+    def push_scope(self, is_class: bool = False, is_block: bool = False) -> Scope:
+        self.scope = Scope(self.scope, is_class, is_block)
+        return self.scope
+
+    def pop_scope(self) -> None:
+        assert self.scope.parent is not None
+        self.scope = self.scope.parent
+
+    def visit_block(self, node: Node) -> Scope:
+        scope = self.push_scope(is_block=True)
+        self.visit(node)
+        self.pop_scope()
+        return scope
+
+    def capture(self) -> None:
+        """Mark the blocks around a function or class being defined as referenced by it"""
+        scope: Optional[Scope] = self.scope
+        while scope is not None and scope.is_block:
+            scope.captured = True
+            scope = scope.parent
+
+    def declare(self, name: object) -> None:
+        if isinstance(name, str):
+            self.scope.names.add(name)
+
+    def reference(self, node: VariableNode) -> None:
+        name = node.var_name_tok.value
+        if isinstance(name, str):
+            self.references.append((node, name, self.scope))
+
+    ###################################
+
+    def visit_ArrayNode(self, node: ArrayNode) -> None:
+        for element_node in node.element_nodes:
+            self.visit(element_node)
+
+    def visit_VarAccessNode(self, node: VarAccessNode) -> None:
+        self.reference(node)
+
+    def visit_VarAssignNode(self, node: VarAssignNode) -> None:
+        self.visit(node.value_node)
+        if node.qualifier is not None:
+            self.declare(node.var_name_tok.value)
+        elif len(node.extra_names) == 0:
+            self.reference(node)
+
+    def visit_IncNode(self, node: IncNode) -> None:
+        if node.qualifier is None and len(node.extra_names) == 0:
+            self.reference(node)
+
+    def visit_DecNode(self, node: DecNode) -> None:
+        if node.qualifier is None and len(node.extra_names) == 0:
+            self.reference(node)
+
+    def visit_FromImportNode(self, node: FromImportNode) -> None:
+        for _, name_tok in node.names:
+            self.declare(name_tok.value)
+
+    def visit_ImportNode(self, node: ImportNode) -> None:
+        self.declare((node.name or node.module).value)
+
+    def visit_RaiseNode(self, node: RaiseNode) -> None:
+        self.visit(node.call)
+
+    def visit_UnitRaiseNode(self, node: UnitRaiseNode) -> None:
+        self.visit(node.func)
+
+    def visit_BinOpNode(self, node: BinOpNode) -> None:
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode) -> None:
+        self.visit(node.node)
+
+    def visit_IfNode(self, node: IfNode) -> None:
+        scopes: list[Scope] = []
+        for condition, expr, _ in node.cases:
+            self.visit(condition)
+            scopes.append(self.visit_block(expr))
+        if node.else_case is not None:
+            scopes.append(self.visit_block(node.else_case[0]))
+        self.blocks.append((node, scopes))
+
+    def visit_ForNode(self, node: ForNode) -> None:
+        # The loop variable lives in the enclosing scope, only the body gets a block scope
+        self.declare(node.var_name_tok.value)
+        self.visit(node.start_value_node)
+        self.visit(node.end_value_node)
+        self.visit(node.step_value_node)
+        self.blocks.append((node, [self.visit_block(node.body_node)]))
+
+    def visit_WhileNode(self, node: WhileNode) -> None:
+        self.visit(node.condition_node)
+        self.blocks.append((node, [self.visit_block(node.body_node)]))
+
+    def visit_FuncDefNode(self, node: FuncDefNode) -> None:
+        if node.var_name_tok is not None:
+            self.declare(node.var_name_tok.value)
+        for default in node.defaults:
+            self.visit(default)
+        self.capture()
+
+        self.push_scope()
+        for arg_name_tok in node.arg_name_toks:
+            self.declare(arg_name_tok.value)
+        self.declare(node.va_name)
+        in_tail_position, self.in_tail_position = self.in_tail_position, True
+        function, self.function = self.function, node
+        returns, self.returns = self.returns, []
+        self.visit(node.body_node)
+        if node.generator:
+            for return_node in self.returns:
+                return_node.tail_call = False
+        self.in_tail_position = in_tail_position
+        self.function = function
+        self.returns = returns
+        self.pop_scope()
+
+    def visit_CallNode(self, node: CallNode) -> None:
+        self.visit(node.node_to_call)
+        for arg_node in node.arg_nodes:
+            self.visit(arg_node)
+        for kwarg_node in node.kwarg_nodes.values():
+            self.visit(kwarg_node)
+
+    def visit_ReturnNode(self, node: ReturnNode) -> None:
+        node.tail_call = self.in_tail_position and self.calls_function(node.node_to_return)
+        self.returns.append(node)
+        self.visit(node.node_to_return)
+
+    def calls_function(self, node: Optional[Node]) -> bool:
+        """Whether `node` calls the function being visited by its name"""
+        if self.function is None or self.function.var_name_tok is None:
+            return False
+        if not isinstance(node, CallNode) or not isinstance(node.node_to_call, VarAccessNode):
+            return False
+        return node.node_to_call.var_name_tok.value == self.function.var_name_tok.value
+
+    def visit_YieldNode(self, node: YieldNode) -> None:
+        if self.function is not None:
+            self.function.generator = True
+        self.visit(node.node_to_yield)
+
+    def visit_TryNode(self, node: TryNode) -> None:
+        # Errors of the try block are caught, and those of the catch block are chained to the error it handles
+        in_tail_position, self.in_tail_position = self.in_tail_position, False
+        self.visit(node.try_block)
+        self.declare(node.exc_iden.value)
+        self.visit(node.catch_block)
+        self.in_tail_position = in_tail_position
+
+    def visit_ForInNode(self, node: ForInNode) -> None:
+        self.declare(node.var_name_tok.value)
+        self.visit(node.iterable_node)
+        self.visit(node.body_node)
+
+    def visit_SliceGetNode(self, node: SliceGetNode) -> None:
+        self.visit(node.indexee)
+        self.visit(node.index_start)
+        self.visit(node.index_end)
+        self.visit(node.index_step)
+
+    def visit_IndexGetNode(self, node: IndexGetNode) -> None:
+        self.visit(node.indexee)
+        self.visit(node.index)
+
+    def visit_IndexSetNode(self, node: IndexSetNode) -> None:
+        self.visit(node.indexee)
+        self.visit(node.index)
+        self.visit(node.value)
+
+    def visit_HashMapNode(self, node: HashMapNode) -> None:
+        for key_node, value_node in node.pairs:
+            self.visit(key_node)
+            self.visit(value_node)
+
+    def visit_ClassNode(self, node: ClassNode) -> None:
+        self.declare(node.class_name_tok.value)
+        self.capture()
+        self.push_scope(is_class=True)
+        in_tail_position, self.in_tail_position = self.in_tail_position, False
+        function, self.function = self.function, None
+        self.visit(node.body_nodes)
+        self.in_tail_position = in_tail_position
+        self.function = function
+        self.pop_scope()
+
+    def visit_AssertNode(self, node: AssertNode) -> None:
+        self.visit(node.condition)
+        self.visit(node.message)
+
+    def visit_SwitchNode(self, node: SwitchNode) -> None:
+        self.visit(node.subject_node)
+        for expr, body in node.cases:
+            self.visit(expr)
+            self.visit(body)
+        self.visit(node.default)
+
+    def visit_AttrAccessNode(self, node: AttrAccessNode) -> None:
+        self.visit(node.node_to_access)
+
+
+def resolve(node: Node) -> None:
+    """Annotate the variable nodes of a whole program with the depth of their declaring scope"""
+    Resolver().resolve(node)
+
+
+def make_lookup(name: str, depth: Optional[int]) -> Callable[[SymbolTable], Optional[Value]]:
+    """Return a function looking `name` up from a symbol table, going straight to the table at `depth` if resolved"""
+    if depth is None:
+        get: Callable[[SymbolTable], Optional[Value]] = methodcaller("get", name)
+        return get
+
+    symbols_at: Callable[[SymbolTable], dict[str, Value]] = attrgetter(".".join(["parent"] * depth + ["symbols"]))
+
+    def lookup(table: SymbolTable) -> Optional[Value]:
+        try:
+            value = symbols_at(table).get(name)
+        except AttributeError:
+            # Fewer scopes than resolved, which the resolver should never let happen
+            value = None
+        if value is None:
+            return table.get(name)
+        return value
+
+    return lookup
@@ -135,6 +135,7 @@ KEYWORDS = [
     "fallout",
     "var",
     "from",
+    "yield",
 ]
 
 TokenValue: TypeAlias = Optional[str | int | float]
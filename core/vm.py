@@ -0,0 +1,570 @@
+"""Stack-based virtual machine running the bytecode generated by `core.compiler`"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, Generator, Optional, TypeAlias
+
+from core.compiler import (
+    ASSERT_FAIL,
+    BIND_ERROR,
+    BINARY_OP,
+    BREAK,
+    BUILD_ARRAY,
+    BUILD_HASHMAP,
+    CALL,
+    CALLEE,
+    CHECK_KEY,
+    CHECK_NUMBER,
+    CONTINUE,
+    DELEGATE,
+    END_LOOP,
+    FOR_IN_ITER,
+    FOR_ITER,
+    GET_ITER,
+    HALT,
+    INCDEC,
+    INDEX_GET,
+    INDEX_SET,
+    JUMP,
+    JUMP_IF_TRUE_OR_POP,
+    LOAD_ATTR,
+    LOAD_NAME,
+    LOAD_NULL,
+    LOAD_CONST,
+    LOOP_APPEND,
+    POP_BLOCK,
+    POP_JUMP_IF_FALSE,
+    POP_TOP,
+    POP_TRY,
+    PUSH_BLOCK,
+    PUSH_LOOP_BLOCK,
+    RETURN_VALUE,
+    SETUP_FOR,
+    SETUP_TRY,
+    SETUP_WHILE,
+    SLICE_GET,
+    STORE_NAME,
+    UNARY_OP,
+    YIELD,
+    Code,
+    Compiler,
+)
+from core.datatypes import (
+    Array,
+    BaseClass,
+    BaseFunction,
+    BaseInstance,
+    Class,
+    Function,
+    HashKey,
+    HashMap,
+    KeyComparisonError,
+    Module,
+    Null,
+    Number,
+    String,
+    Value,
+    float_steps,
+    int_range,
+)
+from core.errors import Error, RNNameError, RTError
+from core.interpreter import Interpreter, relocate
+from core.nodes import SCOPE_REUSED, SCOPE_SHARED, Node
+from core.parser import Context, RTResult, SymbolTable
+
+# Kinds of entries on the block stack of a frame
+BLOCK_LOOP = 0
+BLOCK_TRY = 1
+
+# (kind, target, continue target, stack depth, context)
+# `target` is where a loop jumps on `break` and where a `try` jumps on error
+Block: TypeAlias = tuple[int, int, int, int, Context]
+
+
+class VM(Interpreter):
+    """Runs nodes by compiling them to bytecode, which is cached on the node.
+
+    Nodes the compiler has no instructions for (classes, imports, `raise`, `switch`...) are evaluated as a whole by
+    a tree-walking interpreter, so constructs relying on its result flags, like `fallthrough`, behave the same.
+    """
+
+    tree: Interpreter
+
+    def __init__(self) -> None:
+        self.tree = Interpreter()
+
+    def visit(self, node: Node, context: Context) -> RTResult[Value]:
+        return self.run(self.code_of(node), context)
+
+    @staticmethod
+    def code_of(node: Node) -> Code:
+        """Return the bytecode of `node`, compiling it the first time"""
+        code: Optional[Code] = getattr(node, "bytecode", None)
+        if code is None:
+            code = Compiler().compile_program(node)
+            setattr(node, "bytecode", code)
+        return code
+
+    def run(self, code: Code, context: Context) -> RTResult[Value]:
+        frame = self.frame(code, context)
+        try:
+            next(frame)
+        except StopIteration as stop:
+            result: RTResult[Value] = stop.value
+            return result
+        raise AssertionError("Only the bodies of generator functions yield, and they are not run to completion")
+
+    def frame(self, code: Code, context: Context) -> Generator[Value, None, RTResult[Value]]:
+        """Run `code`, suspending at each `yield` with the value yielded, and return its result"""
+        instructions = code.instructions
+        stack: list[Any] = []
+        blocks: list[Block] = []
+        error: Optional[Error] = None
+        pc = 0
+
+        try:
+            while True:
+                signal: RTResult[Value]
+
+                # Run instructions until one of them fails or needs to unwind the stack
+                while True:
+                    op, arg = instructions[pc]
+                    pc += 1
+
+                    if op == LOAD_NAME:
+                        name, lookup, pos_start, pos_end = arg
+                        value = lookup(context.symbol_table)
+                        if value is None:
+                            signal = RTResult[Value]().failure(
+                                RNNameError(pos_start, pos_end, f"'{name}' is not defined", context)
+                            )
+                            break
+                        if isinstance(value, BaseInstance):
+                            # Like the interpreter, instances take the position of the latest read of them
+                            value.set_pos(pos_start, pos_end).set_context(context)
+                        stack.append(value)
+
+                    elif op == LOAD_CONST:
+                        stack.append(arg)
+
+                    elif op == BINARY_OP:
+                        method_name, number_op, reverse, pos_start, pos_end, node = arg
+                        right = stack.pop()
+                        left = stack.pop()
+                        if number_op is not None and type(left) is Number and type(right) is Number:
+                            number = number_op(left.value, right.value)
+                            if number is not None:
+                                stack.append(number.set_context(left.context).set_pos(pos_start, pos_end))
+                                continue
+                        if reverse:
+                            result, err = right.contains(left)
+                        else:
+                            result, err = getattr(left, method_name)(right)
+                        if err is not None:
+                            relocate(err, context, (left, node.left_node), (right, node.right_node))
+                            signal = RTResult[Value]().failure(err)
+                            break
+                        stack.append(result.set_pos(pos_start, pos_end))
+
+                    elif op == POP_JUMP_IF_FALSE:
+                        if not stack.pop().is_true():
+                            pc = arg
+
+                    elif op == JUMP:
+                        pc = arg
+
+                    elif op == PUSH_BLOCK:
+                        pos_start, scope = arg
+                        symbol_table = context.symbol_table
+                        if scope != SCOPE_SHARED:
+                            symbol_table = SymbolTable(symbol_table)
+                        context = Context("<block scope>", context, pos_start, symbol_table)
+
+                    elif op == PUSH_LOOP_BLOCK:
+                        # The context of the body is created on the first iteration, then kept in the loop state
+                        state = stack[-1]
+                        body_context = state[-1]
+                        if body_context is None:
+                            pos_start, scope = arg
+                            symbol_table = context.symbol_table
+                            if scope != SCOPE_SHARED:
+                                symbol_table = SymbolTable(symbol_table)
+                            body_context = state[-1] = Context("<block scope>", context, pos_start, symbol_table)
+                        elif arg[1] == SCOPE_REUSED:
+                            body_context.symbol_table.clear()
+                        context = body_context
+
+                    elif op == POP_BLOCK:
+                        parent = context.parent
+                        assert parent is not None
+                        context = parent
+
+                    elif op == BUILD_ARRAY:
+                        count, pos_start, pos_end = arg
+                        if count > 0:
+                            elements = stack[-count:]
+                            del stack[-count:]
+                        else:
+                            elements = []
+                        stack.append(Array(elements).set_context(context).set_pos(pos_start, pos_end))
+
+                    elif op == STORE_NAME:
+                        name, node = arg
+                        value = stack.pop()
+                        res = self.assign(
+                            var_name=name,
+                            value=value,
+                            context=context,
+                            extra_names=node.extra_names,
+                            qualifier=node.qualifier,
+                            depth=node.depth,
+                            pos_start=node.pos_start,
+                            pos_end=node.pos_end,
+                        )
+                        if res.should_return():
+                            if res.error is not None:
+                                relocate(res.error, context, (value, node.value_node))
+                            signal = res
+                            break
+                        stack.append(res.value)
+
+                    elif op == CALLEE:
+                        pos_start, pos_end = arg
+                        stack[-1] = stack[-1].copy().set_pos(pos_start, pos_end).set_context(context)
+
+                    elif op == CALL:
+                        arg_count, kwarg_names, node, tail = arg
+                        kwargs: dict[str, Value] = {}
+                        if len(kwarg_names) > 0:
+                            kwargs = dict(zip(kwarg_names, stack[-len(kwarg_names) :]))
+                            del stack[-len(kwarg_names) :]
+                        if arg_count > 0:
+                            args = stack[-arg_count:]
+                            del stack[-arg_count:]
+                        else:
+                            args = []
+                        value_to_call = stack.pop()
+                        if tail and isinstance(value_to_call, Function):
+                            # Leave the call to the calling function, in place of itself
+                            return RTResult[Value]().success_tail_call(value_to_call, args, kwargs)
+                        res = value_to_call.execute(args, kwargs)
+                        if res.should_return():
+                            if res.error is not None and not isinstance(value_to_call, (Function, Class)):
+                                relocate(
+                                    res.error,
+                                    context,
+                                    *zip(args, node.arg_nodes),
+                                    *zip(kwargs.values(), node.kwarg_nodes.values()),
+                                )
+                            signal = res
+                            break
+                        stack.append(res.value)
+
+                    elif op == POP_TOP:
+                        stack.pop()
+
+                    elif op == LOAD_NULL:
+                        stack.append(Null.null())
+
+                    elif op == INCDEC:
+                        name, method_name, node = arg
+                        if node.depth is None:
+                            old_value = context.symbol_table.get(name)
+                        else:
+                            old_value = context.symbol_table.get_at(name, node.depth)
+                        if old_value is None:
+                            signal = RTResult[Value]().failure(
+                                RNNameError(node.pos_start, node.pos_end, f"'{name}' is not defined", context)
+                            )
+                            break
+                        new_value, err = getattr(old_value, method_name)(Number.one())
+                        if err is not None:
+                            signal = RTResult[Value]().failure(err)
+                            break
+                        res = self.assign(
+                            var_name=name,
+                            value=new_value,
+                            context=context,
+                            extra_names=node.extra_names,
+                            qualifier=node.qualifier,
+                            depth=node.depth,
+                            pos_start=node.pos_start,
+                            pos_end=node.pos_end,
+                        )
+                        if res.should_return():
+                            signal = res
+                            break
+                        stack.append(new_value if node.is_pre else old_value)
+
+                    elif op == UNARY_OP:
+                        negate, pos_start, pos_end, node = arg
+                        operand = stack.pop()
+                        if negate:
+                            result, err = operand.multed_by(Number.of(-1))
+                        else:
+                            result, err = operand.notted()
+                        if err is not None:
+                            relocate(err, context, (operand, node.node))
+                            signal = RTResult[Value]().failure(err)
+                            break
+                        stack.append(result.set_pos(pos_start, pos_end))
+
+                    elif op == FOR_ITER:
+                        name, loop_exit = arg
+                        i = next(stack[-1][1], None)
+                        if i is None:
+                            pc = loop_exit
+                        elif name not in context.symbol_table.consts:
+                            context.symbol_table.symbols[name] = Number.of(i)
+
+                    elif op == FOR_IN_ITER:
+                        name, loop_exit, node = arg
+                        it_res = next(stack[-1][1], None)
+                        if it_res is None or it_res.loop_should_break:
+                            pc = loop_exit
+                        elif it_res.loop_should_continue:
+                            pc -= 1
+                        elif it_res.should_return():
+                            if it_res.error is not None:
+                                relocate(it_res.error, context, (stack[-1][2], node.iterable_node))
+                            signal = RTResult[Value]()
+                            signal.register(it_res)
+                            break
+                        else:
+                            context.symbol_table.set(name, it_res.value)
+
+                    elif op == LOOP_APPEND:
+                        value = stack.pop()
+                        stack[-1][0].append(value)
+
+                    elif op == CHECK_NUMBER:
+                        if not isinstance(stack[-1], Number):
+                            message, pos_start, pos_end = arg
+                            signal = RTResult[Value]().failure(RTError(pos_start, pos_end, message, context))
+                            break
+
+                    elif op == SETUP_FOR:
+                        has_step, break_target, continue_target = arg
+                        step = stack.pop().value if has_step else 1
+                        end = stack.pop().value
+                        start = stack.pop().value
+                        numbers = int_range(start, end, step)
+                        stack.append(
+                            [[], iter(numbers) if numbers is not None else float_steps(start, end, step), None]
+                        )
+                        blocks.append((BLOCK_LOOP, break_target, continue_target, len(stack), context))
+
+                    elif op == SETUP_WHILE:
+                        break_target, continue_target = arg
+                        stack.append([[], None])
+                        blocks.append((BLOCK_LOOP, break_target, continue_target, len(stack), context))
+
+                    elif op == GET_ITER:
+                        iterable = stack.pop()
+                        stack.append([[], iterable.iter(), iterable])
+
+                    elif op == END_LOOP:
+                        has_block, should_return_null, pos_start, pos_end = arg
+                        if has_block:
+                            blocks.pop()
+                        elements = stack.pop()[0]
+                        if should_return_null:
+                            stack.append(Null.null())
+                        else:
+                            stack.append(Array(elements).set_context(context).set_pos(pos_start, pos_end))
+
+                    elif op == BREAK:
+                        signal = RTResult[Value]().success_break()
+                        break
+
+                    elif op == CONTINUE:
+                        signal = RTResult[Value]().success_continue()
+                        break
+
+                    elif op == RETURN_VALUE:
+                        return RTResult[Value]().success_return(stack.pop())
+
+                    elif op == SETUP_TRY:
+                        blocks.append((BLOCK_TRY, arg, arg, len(stack), context))
+
+                    elif op == POP_TRY:
+                        blocks.pop()
+
+                    elif op == BIND_ERROR:
+                        assert error is not None
+                        context.symbol_table.set(arg, String(error.details))  # type: ignore
+                        error = None
+
+                    elif op == INDEX_GET:
+                        index = stack.pop()
+                        indexee = stack.pop()
+                        result, err = indexee.get_index(index)
+                        if err is not None:
+                            node = arg
+                            relocate(err, context, (indexee, node.indexee), (index, node.index))
+                            signal = RTResult[Value]().failure(err)
+                            break
+                        stack.append(result)
+
+                    elif op == INDEX_SET:
+                        value = stack.pop()
+                        index = stack.pop()
+                        indexee = stack.pop()
+                        result, err = indexee.set_index(index, value)
+                        if err is not None:
+                            node = arg
+                            relocate(err, context, (indexee, node.indexee), (index, node.index), (value, node.value))
+                            signal = RTResult[Value]().failure(err)
+                            break
+                        stack.append(result)
+
+                    elif op == SLICE_GET:
+                        has_start, has_end, has_step, pos_start, pos_end, node = arg
+                        index_step = stack.pop() if has_step else None
+                        index_end = stack.pop() if has_end else None
+                        index_start = stack.pop() if has_start else None
+                        indexee = stack.pop()
+                        result, err = indexee.get_slice(index_start, index_end, index_step)
+                        if err is not None:
+                            operands = [(indexee, node.indexee)]
+                            for index_value, index_node in [
+                                (index_start, node.index_start),
+                                (index_end, node.index_end),
+                                (index_step, node.index_step),
+                            ]:
+                                if index_value is not None:
+                                    operands.append((index_value, index_node))
+                            relocate(err, context, *operands)
+                            signal = RTResult[Value]().failure(err)
+                            break
+                        stack.append(result.set_pos(pos_start, pos_end).set_context(context))
+
+                    elif op == CHECK_KEY:
+                        key = stack[-1]
+                        _, err = key.hash_key()
+                        if err is not None:
+                            signal = RTResult[Value]().failure(relocate(err, context, (key, arg)))
+                            break
+
+                    elif op == BUILD_HASHMAP:
+                        values: dict[HashKey, Value] = {}
+                        if arg > 0:
+                            pairs = stack[-2 * arg :]
+                            del stack[-2 * arg :]
+                            try:
+                                for key, value in zip(pairs[::2], pairs[1::2]):
+                                    # CHECK_KEY made sure the key is hashable
+                                    hash_key, _ = key.hash_key()
+                                    assert hash_key is not None
+                                    values[hash_key] = value
+                            except KeyComparisonError as e:
+                                signal = RTResult[Value]().failure(e.error)
+                                break
+                        stack.append(HashMap(values))
+
+                    elif op == LOAD_ATTR:
+                        name, pos_start, pos_end = arg
+                        orig_value = stack.pop()
+                        if not isinstance(orig_value, (BaseClass, BaseInstance, Module)):
+                            signal = RTResult[Value]().failure(
+                                RTError(
+                                    pos_start,
+                                    pos_end,
+                                    "Dotted attribute access may only be used on classes, instances and modules for now",
+                                    context,
+                                )
+                            )
+                            break
+                        value = orig_value.symbol_table.get(name)
+                        if value is None:
+                            signal = RTResult[Value]().failure(
+                                RTError(pos_start, pos_end, f"Attribute '{name}' does not exist", context)
+                            )
+                            break
+                        if isinstance(orig_value, BaseInstance) and isinstance(value, BaseFunction):
+                            method = orig_value.bind_method(value)
+                            if method.should_return():
+                                signal = RTResult[Value]()
+                                signal.register(method)
+                                break
+                            assert method.value is not None
+                            value = method.value.set_pos(pos_start, pos_end).set_context(context)
+                        elif isinstance(value, BaseInstance):
+                            value.set_pos(pos_start, pos_end).set_context(context)
+                        stack.append(value)
+
+                    elif op == JUMP_IF_TRUE_OR_POP:
+                        if stack[-1].is_true():
+                            pc = arg
+                        else:
+                            stack.pop()
+
+                    elif op == ASSERT_FAIL:
+                        node, has_message = arg
+                        message = "Assertion failed"
+                        if has_message:
+                            message_val = stack.pop()
+                            if not isinstance(message_val, String):
+                                signal = RTResult[Value]().failure(
+                                    RTError(
+                                        node.message.pos_start,
+                                        node.message.pos_end,
+                                        "Assertion message must be a string",
+                                        context,
+                                    )
+                                )
+                                break
+                            message = f"Assertion failed: {message_val.value}"
+                        signal = RTResult[Value]().failure(
+                            RTError(node.condition.pos_start, node.condition.pos_end, message, context)
+                        )
+                        break
+
+                    elif op == DELEGATE:
+                        res = self.tree.visit(arg, context)
+                        if res.should_return():
+                            signal = res
+                            break
+                        stack.append(res.value)
+
+                    elif op == YIELD:
+                        yield stack.pop()
+                        stack.append(Null.null())
+
+                    elif op == HALT:
+                        return RTResult[Value]().success(stack.pop())
+
+                    else:
+                        raise Exception(f"Unknown opcode {op}")
+
+                # Unwind the block stack to the handler of the signal, or leave the frame if there is none
+                if signal.error is not None:
+                    while len(blocks) > 0:
+                        kind, target, _, depth, block_context = blocks.pop()
+                        if kind == BLOCK_TRY:
+                            del stack[depth:]
+                            context = block_context
+                            error = signal.error
+                            pc = target
+                            break
+                    else:
+                        return signal
+                elif signal.loop_should_break or signal.loop_should_continue:
+                    while len(blocks) > 0:
+                        kind, target, continue_target, depth, block_context = blocks[-1]
+                        if kind == BLOCK_LOOP:
+                            del stack[depth:]
+                            context = block_context
+                            pc = target if signal.loop_should_break else continue_target
+                            break
+                        blocks.pop()
+                    else:
+                        return signal
+                else:
+                    return signal
+        except Exception as e:
+            if sys.version_info >= (3, 11):
+                node = code.nodes[pc - 1]
+                e.add_note(f"{node.pos_start} - {node.pos_end}: NOTE: happened here")
+            raise
@@ -6,7 +6,7 @@ import platform
 import sys
 from typing import IO, TYPE_CHECKING, Optional
 
-from core.datatypes import Value
+from core.datatypes import DEFAULT_MAX_RECURSION_DEPTH, Value, set_max_recursion_depth
 from core.errors import Error, RTError
 
 if not TYPE_CHECKING and sys.platform != "win32":
@@ -23,8 +23,9 @@ if not TYPE_CHECKING and sys.platform != "win32":
 
 import core as base_core
 from core.colortools import Log
+from core.interpreter import ENGINES, set_engine
 from core.parser import Context
-from core.tokens import Position
+from core.tokens import BASE_DIR, Position
 
 documentation_link = "https://radon-project.github.io/docs/"
 
@@ -86,7 +87,8 @@ def shell() -> None:
 
 def usage(program_name: str, stream: IO[str]) -> None:
     print(
-        f"Usage: {program_name} [--source | -s] [--command | -c] [source_file] [--version | -v] [--help | -h]",
+        f"Usage: {program_name} [--source | -s] [--command | -c] [source_file] [--engine=<engine>] [--version | -v] "
+        "[--help | -h]",
         file=stream,
     )
     print(
@@ -94,6 +96,12 @@ def usage(program_name: str, stream: IO[str]) -> None:
 Options and arguments:
     --source | -s    Run a source file
     --command | -c   Run a command
+    --engine=<name>  Select the execution engine: 'tree' (tree-walking interpreter, default) or 'vm' (bytecode VM)
+    --max-recursion-depth=<n>
+                     Set how deeply function calls can nest before raising a RecursionError (default 1000)
+    --no-cache       Do not read or write the cache of parsed modules (__rncache__)
+    --no-optimize    Run programs as parsed, without folding constants or removing dead branches
+    --clear-cache    Remove the cache directories of parsed modules in the current directory and the stdlib
     --version | -v   Print the version
     --help | -h      Print this help message
 
@@ -118,6 +126,7 @@ The Radon Programming Language. \
 
 def main(argv: list[str]) -> None:
     program_name = argv.pop(0)
+    set_max_recursion_depth(DEFAULT_MAX_RECURSION_DEPTH)
     source_file = None
     command = None
     while len(argv) > 0:
@@ -142,6 +151,14 @@ def main(argv: list[str]) -> None:
                     exit(1)
                 command = argv.pop(0)
             # These flags starting with --allow should only be used for testing, and not be allowed to be set by a user
+            case "--no-cache":
+                base_core.cache.enabled = False
+            case "--no-optimize":
+                base_core.optimizer.enabled = False
+            case "--clear-cache":
+                removed = base_core.cache.clear([os.getcwd(), os.path.join(BASE_DIR, "stdlib")])
+                print(f"Removed {removed} cache director{'y' if removed == 1 else 'ies'}")
+                exit(0)
             case "--allow-all" | "-A":
                 base_core.security.allow_all_permissions()
             case "--allow-disk" | "-D":
@@ -150,6 +167,20 @@ def main(argv: list[str]) -> None:
                 base_core.security.allowed["pyapi_access"] = True
             case "--allow-network" | "-W":
                 base_core.security.allowed["network_access"] = True
+            case _ if arg.startswith("--engine="):
+                engine = arg.removeprefix("--engine=")
+                if engine not in ENGINES:
+                    usage(program_name, sys.stderr)
+                    print(f"ERROR: Unknown engine '{engine}', expected one of {', '.join(ENGINES)}", file=sys.stderr)
+                    exit(1)
+                set_engine(engine)
+            case _ if arg.startswith("--max-recursion-depth="):
+                depth = arg.removeprefix("--max-recursion-depth=")
+                if not depth.isdigit() or int(depth) == 0:
+                    usage(program_name, sys.stderr)
+                    print(f"ERROR: Invalid recursion depth '{depth}', expected a positive integer", file=sys.stderr)
+                    exit(1)
+                set_max_recursion_depth(int(depth))
             case _:
                 usage(program_name, sys.stderr)
                 print(f"ERROR: Unknown argument '{arg}'", file=sys.stderr)
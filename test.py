@@ -25,9 +25,15 @@ class Output(NamedTuple):
             json.dump({"code": self.code, "stdout": self.stdout, "stderr": self.stderr}, f)
 
 
-def run_test(test: str) -> Output:
+# Every test is expected to produce the same output on all execution engines
+ENGINES = ["tree", "vm"]
+
+
+def run_test(test: str, engine: str = "tree") -> Output:
     proc = subprocess.run(
-        [sys.executable, "radon.py", "-s", test, "-A"], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        [sys.executable, "radon.py", "-s", test, "-A", f"--engine={engine}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
     )
     return Output(
         proc.returncode,
@@ -54,16 +60,17 @@ def run_tests(directory: str = "tests") -> int:
             print("NOTE: to create this file, run the `record` subcommand")
             continue
 
-        print(f"Running test {test!r}...", end="", flush=True)
-        output = run_test(f"{directory}/{test}")
         expected_output = Output.from_file(json_file)
-        if output != expected_output:
-            print(f"\rTest {test!r} failed!" + " " * 20)
-            print(f"Expected: {expected_output!r}")
-            print(f"Got:      {output!r}")
-            failed_tests.append(test)
-        else:
-            print(f"\rTest {test!r} passed!" + " " * 20)
+        for engine in ENGINES:
+            print(f"Running test {test!r} ({engine})...", end="", flush=True)
+            output = run_test(f"{directory}/{test}", engine)
+            if output != expected_output:
+                print(f"\rTest {test!r} ({engine}) failed!" + " " * 20)
+                print(f"Expected: {expected_output!r}")
+                print(f"Got:      {output!r}")
+                failed_tests.append(f"{test} ({engine})")
+            else:
+                print(f"\rTest {test!r} ({engine}) passed!" + " " * 20)
 
     print()
     print("TEST SUMMARY:")
@@ -111,7 +118,8 @@ SUBCOMMANDS:
     help           - Print this help message to stdout and exit successfully
     run            - Run tests
     record         - Record output of tests
-    diff <test.rn> - Show diff between expected and actual output
+    diff <test.rn> [engine]
+                   - Show diff between expected and actual output
     full           - Same as `{program_name} run` + `make lint`
 """,
         file=stream,
@@ -176,8 +184,13 @@ def main(argv: list[str]) -> int:
                 print("ERROR: no test to diff provided", file=sys.stderr)
                 return 1
             test = argv.pop(0)
+            engine = argv.pop(0) if len(argv) > 0 else "tree"
+            if engine not in ENGINES:
+                usage(program_name, sys.stderr)
+                print(f"ERROR: unknown engine '{engine}'", file=sys.stderr)
+                return 1
             try:
-                actual_output = run_test(f"tests/{test}")
+                actual_output = run_test(f"tests/{test}", engine)
             except FileNotFoundError:
                 print(f"ERROR: test {test!r} not found", file=sys.stderr)
                 return 1